@@ -2,6 +2,8 @@ FQN_SEPARATOR = "::"
 DEFAULT_BATCH_SIZE_FOR_VECTOR_STORE = 1000
 DATA_POINT_FQN_METADATA_KEY = "_data_point_fqn"
 DATA_POINT_HASH_METADATA_KEY = "_data_point_hash"
+DATA_POINT_CHUNK_INDEX_METADATA_KEY = "_data_point_chunk_index"
+DATA_SOURCE_FQN_METADATA_KEY = "_data_source_fqn"
 
 TEXT_SEPARATORS = ["\n1", "\n2", "\n3", "\n4", "\n5", "\n6", "\n7", "\n8", "\n9",
                    " Статья ", " а)", " б)", " в)", " г)", " д)", " е)", " Ж)", " з)",
@@ -1,16 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.auth.base_config import fastapi_users, auth_backend
 from backend.auth.schemas import UserRead, UserCreate, UserUpdate
+from backend.logger import logger
 from backend.rag.api_routers.components import router as components_router
 from backend.rag.api_routers.collection import router as collection_router
 from backend.rag.api_routers.internal import router as internal_router
 from backend.rag.api_routers.answer import router as answer_router
+from backend.rag.embedders.embedder import warmup_embedders, clear_embedder_cache
+from backend.rag.jobs.client import JOB_QUEUE
+from backend.rag.llms import close_ollama_sessions
+from backend.rag.metadata_store.client import ASYNC_METADATA_STORE_CLIENT
+from backend.rag.parsers.parser import shutdown_parser_executor
+from backend.settings import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Загрузка моделей Embedder'ов один раз на процесс
+    if settings.EMBEDDER_WARMUP:
+        try:
+            collections = await ASYNC_METADATA_STORE_CLIENT.get_collections() or []
+            await asyncio.to_thread(
+                warmup_embedders, [collection.embedder_config for collection in collections]
+            )
+        except Exception as exp:
+            logger.exception(exp)
+    await JOB_QUEUE.start()
+    yield
+    await JOB_QUEUE.stop()
+    shutdown_parser_executor()
+    clear_embedder_cache()
+    await close_ollama_sessions()
+
 
 app = FastAPI(
-    title="Интеллектуальный ассистент"
+    title="Интеллектуальный ассистент",
+    lifespan=lifespan,
 )
 
 app.include_router(
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Any, Dict, List
 from fastapi import APIRouter, HTTPException, Body, Depends
 from fastapi.responses import JSONResponse
 
@@ -7,9 +7,12 @@ from backend.auth.models import User
 from backend.logger import logger
 from backend.rag.api_routers.examples.collection import example_create_collection, example_associate_data_source, \
     example_unassociate_data_source, example_ingest, example_runs_list
-from backend.rag.embedders.embedder import get_embedder
-from backend.rag.metadata_store.client import METADATA_STORE_CLIENT
-from backend.rag.indexer.indexer import ingest_data as ingest_data_to_collection
+from backend.rag.bm25 import get_bm25_index
+from backend.rag.cache import bump_collection_generation
+from backend.rag.embedders.embedder import get_embedder, evict_embedder
+from backend.rag.metadata_store.client import METADATA_STORE_CLIENT, ASYNC_METADATA_STORE_CLIENT
+from backend.rag.indexer.indexer import ingest_data as ingest_data_to_collection, get_collection_ingestion_progress, \
+    resume_data_ingestion_run
 from backend.rag.schemas import CreateCollectionDto, Collection, CreateCollection, AssociateDataSourceWithCollection, \
     AssociateDataSourceWithCollectionDto, UnassociateDataSourceWithCollectionDto, IngestDataToCollectionDto, \
     ListDataIngestionRunsDto
@@ -46,11 +49,13 @@ def create_collection(
                 name=collection.name,
                 description=collection.description,
                 embedder_config=collection.embedder_config,
+                storage_config=collection.storage_config,
             )
         )
         VECTOR_STORE_CLIENT.create_collection(
             collection_name=collection.name,
             embeddings=get_embedder(collection.embedder_config),
+            storage_config=collection.storage_config,
         )
         if collection.associated_data_sources:
             for data_source in collection.associated_data_sources:
@@ -77,7 +82,7 @@ async def associate_data_source_to_collection(
 ) -> Dict[str, Collection]:
     """Добавление источника данных для коллекции"""
     try:
-        collection = METADATA_STORE_CLIENT.associate_data_source_with_collection(
+        collection = await ASYNC_METADATA_STORE_CLIENT.associate_data_source_with_collection(
             collection_name=request.collection_name,
             data_source_association=AssociateDataSourceWithCollection(
                 data_source_fqn=request.data_source_fqn,
@@ -99,7 +104,7 @@ async def unassociate_data_source_from_collection(
 ) -> Dict[str, Collection]:
     """Удаление источника данных из коллекции"""
     try:
-        collection = METADATA_STORE_CLIENT.unassociate_data_source_with_collection(
+        collection = await ASYNC_METADATA_STORE_CLIENT.unassociate_data_source_with_collection(
             collection_name=request.collection_name,
             data_source_fqn=request.data_source_fqn,
         )
@@ -129,8 +134,20 @@ async def ingest_data(
 def delete_collection(collection_name: str) -> Dict[str, bool]:
     """Удалить коллекцию по имени"""
     try:
+        collection = METADATA_STORE_CLIENT.get_collection_by_name(collection_name, no_cache=True)
         VECTOR_STORE_CLIENT.delete_collection(collection_name=collection_name)
+        bm25_index = get_bm25_index()
+        if bm25_index is not None:
+            bm25_index.delete_collection(collection_name)
         METADATA_STORE_CLIENT.delete_collection(collection_name, include_runs=True)
+        bump_collection_generation(collection_name)
+        # Free the embedder model if no other collection uses it
+        if collection and not any(
+                other.embedder_config == collection.embedder_config
+                for other in METADATA_STORE_CLIENT.get_collections() or []
+                if other is not None
+        ):
+            evict_embedder(collection.embedder_config)
         return {"deleted": True}
     except Exception as exp:
         logger.exception(exp)
@@ -149,8 +166,8 @@ def list_data_ingestion_runs(
 
 @router.get("/data_ingestion_runs/{data_ingestion_run_name}/status")
 def get_collection_status(
-        data_ingestion_run_name: str) -> Dict[str, str]:
-    """Возвращает статус задачи получения данных"""
+        data_ingestion_run_name: str) -> Dict[str, Any]:
+    """Возвращает статус и прогресс (последние метрики) задачи получения данных"""
     data_ingestion_run = METADATA_STORE_CLIENT.get_data_ingestion_run(
         data_ingestion_run_name=data_ingestion_run_name, no_cache=True
     )
@@ -164,4 +181,27 @@ def get_collection_status(
     return {
         "status": data_ingestion_run.status.value,
         "message": f"Data ingestion job run {data_ingestion_run.name} in {data_ingestion_run.status.value}. Check logs for more details.",
+        "progress": data_ingestion_run.metrics or {},
     }
+
+
+@router.post("/data_ingestion_runs/{data_ingestion_run_name}/resume")
+async def resume_data_ingestion(data_ingestion_run_name: str) -> JSONResponse:
+    """Продолжает прерванную задачу приема данных с последнего checkpoint"""
+    try:
+        return await resume_data_ingestion_run(data_ingestion_run_name)
+    except HTTPException as exp:
+        raise exp
+    except Exception as exp:
+        logger.exception(exp)
+        raise HTTPException(status_code=500, detail=str(exp))
+
+
+@router.get("/{collection_name}/ingestion_progress")
+async def get_ingestion_progress(collection_name: str) -> Dict[str, Any]:
+    """Возвращает сводный прогресс приема данных всех источников коллекции"""
+    try:
+        return await get_collection_ingestion_progress(collection_name)
+    except Exception as exp:
+        logger.exception(exp)
+        raise HTTPException(status_code=500, detail=str(exp))
@@ -4,6 +4,7 @@ from fastapi import APIRouter
 
 from backend.rag.dataloaders.loader import list_dataloaders
 from backend.rag.embedders.embedder import list_embedders
+from backend.rag.llms import list_llms
 from backend.rag.parsers.parser import list_parsers
 from backend.rag.query_controllers.query_controller import list_query_controllers
 from backend.rag.schemas import ComponentDto
@@ -28,6 +29,13 @@ def get_embedders() -> List[ComponentDto]:
     return embedders
 
 
+@router.get("/llms")
+def get_llms() -> List[ComponentDto]:
+    """Возвращает доступные клиенты LLM"""
+    llms = list_llms()
+    return llms
+
+
 @router.get("/dataloaders")
 def get_dataloaders() -> List[ComponentDto]:
     """Возвращает доступные загрузчики данных"""
@@ -3,12 +3,15 @@ from backend.rag.query_controllers.example.payload import QUERY_WITH_VECTOR_STOR
     QUERY_WITH_CONTEXTUAL_COMPRESSION_RETRIEVER_SEARCH_TYPE_SIMILARITY_WITH_SCORE_PAYLOAD, \
     QUERY_WITH_CONTEXTUAL_COMPRESSION_MULTI_QUERY_RETRIEVER_SIMILARITY_PAYLOAD, \
     QUERY_WITH_CONTEXTUAL_COMPRESSION_MULTI_QUERY_RETRIEVER_SIMILARITY_SCORE_PAYLOAD, \
-    QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_PAYLOAD, QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_SCORE_PAYLOAD
+    QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_PAYLOAD, QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_SCORE_PAYLOAD, \
+    QUERY_WITH_HYBRID_RETRIEVER_SIMILARITY_PAYLOAD, QUERY_WITH_MULTI_QUERY_RETRIEVER_STREAMING_PAYLOAD
 from backend.settings import settings
 
 example_answer_payload = {
     "vector-store-similarity": QUERY_WITH_VECTOR_STORE_RETRIEVER_PAYLOAD,
     "vector-store-similarity-threshold": QUERY_WITH_VECTOR_STORE_RETRIEVER_SIMILARITY_SCORE_PAYLOAD,
+    # Vector search + BM25
+    "hybrid-similarity": QUERY_WITH_HYBRID_RETRIEVER_SIMILARITY_PAYLOAD,
 
     # Search + re-ranking
     "contextual-compression-similarity": QUERY_WITH_CONTEXTUAL_COMPRESSION_RETRIEVER_PAYLOAD,
@@ -29,5 +32,6 @@ if settings.LOCAL:
         {
             "multi-query-similarity": QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_PAYLOAD,
             "multi-query-similarity-threshold": QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_SCORE_PAYLOAD,
+            "multi-query-streaming": QUERY_WITH_MULTI_QUERY_RETRIEVER_STREAMING_PAYLOAD,
         }
     )
@@ -28,7 +28,27 @@ example_create_collection = {
             "embedder_config": EMBEDDER_CONFIG,
             "associated_data_sources": [ASSOCIATED_DATA_SOURCE_LOCALDIR]
             },
-    }
+    },
+    "quantized": {
+        "summary": "Создание большой коллекции с квантованием",
+        "description": """
+            Исходные векторы и payload хранятся на диске, в RAM - векторы int8.
+            Поиск идет по квантованным векторам, oversampling * k лучших пересчитываются по исходным.""",
+        "value": {
+            "name": "large",
+            "description": "Quantized collection",
+            "embedder_config": EMBEDDER_CONFIG,
+            "storage_config": {
+                "quantization": "scalar",
+                "on_disk": True,
+                "on_disk_payload": True,
+                "hnsw_m": 16,
+                "hnsw_ef_construct": 100,
+                "hnsw_ef": 128,
+                "oversampling": 2.0,
+            },
+        },
+    },
 }
 
 example_associate_data_source = {
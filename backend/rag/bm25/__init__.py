@@ -0,0 +1,21 @@
+"""
+Лексический поиск: инвертированный индекс BM25 с русским стеммером Snowball
+и гибридный retriever, который объединяет его с векторным поиском (reciprocal rank fusion).
+Индекс пополняется при приеме данных (`ingest_data_points`) и очищается вместе с векторной БД.
+Коллекции, принятые до включения индекса, нужно принять заново в режиме FULL.
+
+API:
+```python
+from backend.rag.bm25 import get_bm25_index, HybridRetriever
+
+index = get_bm25_index()  # None, если BM25_INDEX_PATH пустой
+index.add_documents("example", documents)
+docs_and_scores = index.search("example", "статья 12.1", k=10)
+index.delete_data_points("example", data_point_fqns)
+
+retriever = HybridRetriever(retriever=vector_store_retriever, index=index, collection_name="example", k=5)
+docs = await retriever.ainvoke("статья 12.1")
+```
+"""
+from backend.rag.bm25.index import BM25Index, get_bm25_index, tokenize
+from backend.rag.bm25.retriever import HybridRetriever, reciprocal_rank_fusion
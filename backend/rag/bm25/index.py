@@ -0,0 +1,389 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import snowballstemmer
+from langchain.docstore.document import Document
+from qdrant_client import models
+
+from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_SOURCE_FQN_METADATA_KEY
+from backend.logger import logger
+from backend.rag.vector_db.utils import get_filter_sql, get_point_id
+from backend.settings import settings
+
+# Max number of SQL variables in one `IN (...)` query
+SQL_BATCH_SIZE = 500
+# Article and item numbers ("12.1", "2,5") are kept whole
+TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|[^\W\d_]+")
+CYRILLIC_PATTERN = re.compile(r"[а-я]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE,
+    df INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    data_point_fqn TEXT,
+    data_source_fqn TEXT,
+    length INTEGER NOT NULL,
+    term_ids BLOB NOT NULL,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_data_point_fqn ON chunks (data_point_fqn);
+CREATE INDEX IF NOT EXISTS chunks_data_source_fqn ON chunks (data_source_fqn);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term_id, row)
+) WITHOUT ROWID;
+"""
+
+# Stemmers keep state between calls, so every thread gets its own
+_STEMMERS = threading.local()
+
+
+def _get_stemmers() -> Tuple[Any, Any]:
+    stemmers = getattr(_STEMMERS, "stemmers", None)
+    if stemmers is None:
+        stemmers = _STEMMERS.stemmers = (snowballstemmer.stemmer("russian"), snowballstemmer.stemmer("english"))
+    return stemmers
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбивает текст на термы: слова приводятся к основе стеммером Snowball
+    (русским или английским), числа и номера статей остаются как есть
+    Args:
+        text (str): Текст
+    Returns:
+        List[str]: Термы в порядке появления
+    """
+    russian, english = _get_stemmers()
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower().replace("ё", "е")):
+        if token[0].isdigit():
+            terms.append(token)
+        elif CYRILLIC_PATTERN.match(token):
+            terms.append(russian.stemWord(token))
+        else:
+            terms.append(english.stemWord(token))
+    return terms
+
+
+def _batched(values: List[Any]) -> Iterable[List[Any]]:
+    for i in range(0, len(values), SQL_BATCH_SIZE):
+        yield values[i: i + SQL_BATCH_SIZE]
+
+
+class BM25Index:
+    """
+    Инвертированный индекс BM25 на диске: по файлу SQLite на коллекцию в каталоге path.
+    Списки вхождений хранят (терм, chunk, tf, длина chunk'а), поэтому score считается
+    без обращения к таблице chunk'ов. Chunk'и адресуются теми же ID, что и точки векторной БД.
+    Запись в коллекцию идет через одно соединение под блокировкой этой коллекции,
+    поиск - через соединения только для чтения, по одному на поток, и не ждет записи (WAL).
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._write_connections: Dict[str, sqlite3.Connection] = {}
+        self._write_locks: Dict[str, threading.Lock] = {}
+        # Bumped when a collection is deleted, read connections opened before that are reopened
+        self._epochs: Dict[str, int] = {}
+        self._read_connections = threading.local()
+        # Guards the dicts above only, not the queries
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.path, f"{collection_name}.sqlite")
+
+    def _get_write_lock(self, collection_name: str) -> threading.Lock:
+        with self._lock:
+            return self._write_locks.setdefault(collection_name, threading.Lock())
+
+    def _get_write_connection(self, collection_name: str) -> sqlite3.Connection:
+        # Called under the write lock of the collection
+        connection = self._write_connections.get(collection_name)
+        if connection is None:
+            connection = sqlite3.connect(self._get_collection_path(collection_name), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            with self._lock:
+                self._write_connections[collection_name] = connection
+        return connection
+
+    def _get_read_connection(self, collection_name: str) -> sqlite3.Connection:
+        with self._lock:
+            epoch = self._epochs.get(collection_name, 0)
+            has_schema = collection_name in self._write_connections
+        if not has_schema:
+            # The file may have been created by another process, make sure the tables exist
+            with self._get_write_lock(collection_name):
+                self._get_write_connection(collection_name)
+        connections = getattr(self._read_connections, "connections", None)
+        if connections is None:
+            connections = self._read_connections.connections = {}
+        cached = connections.get(collection_name)
+        if cached is not None and cached[0] == epoch:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        # Autocommit, search opens its own read transaction
+        connection = sqlite3.connect(self._get_collection_path(collection_name), isolation_level=None)
+        connection.execute("PRAGMA query_only=ON")
+        connections[collection_name] = (epoch, connection)
+        return connection
+
+    @staticmethod
+    def _get_stats(connection: sqlite3.Connection) -> Tuple[int, int]:
+        stats = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        return stats.get("documents_count", 0), stats.get("total_length", 0)
+
+    @staticmethod
+    def _add_stats(connection: sqlite3.Connection, documents_count: int, total_length: int):
+        connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            [("documents_count", documents_count), ("total_length", total_length)],
+        )
+
+    def _delete_rows(self, connection: sqlite3.Connection, rows: List[int]) -> int:
+        df_decrements: Counter = Counter()
+        postings = []
+        total_length = 0
+        for batch in _batched(rows):
+            for row, length, term_ids in connection.execute(
+                    f"SELECT row, length, term_ids FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch
+            ):
+                term_ids = np.frombuffer(term_ids, dtype=np.int64).tolist()
+                df_decrements.update(term_ids)
+                postings.extend((term_id, row) for term_id in term_ids)
+                total_length += length
+            connection.execute(f"DELETE FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch)
+        connection.executemany("DELETE FROM postings WHERE term_id = ? AND row = ?", postings)
+        connection.executemany(
+            "UPDATE terms SET df = df - ? WHERE term_id = ?",
+            [(count, term_id) for term_id, count in df_decrements.items()],
+        )
+        self._add_stats(connection, -len(rows), -total_length)
+        return len(rows)
+
+    def _get_term_ids(self, connection: sqlite3.Connection, terms: List[str]) -> Dict[str, int]:
+        term_ids = {}
+        for batch in _batched(terms):
+            term_ids.update(connection.execute(
+                f"SELECT term, term_id FROM terms WHERE term IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return term_ids
+
+    def add_documents(self, collection_name: str, documents: List[Document]):
+        """
+        Индексирует chunk'и. Прежние chunk'и их точек данных заменяются,
+        как при записи в векторную БД
+        Args:
+            collection_name (str): Имя коллекции
+            documents (List[Document]): Все chunk'и точек данных батча
+        """
+        if not documents:
+            return
+        # A chunk listed twice is indexed once
+        chunks = {get_point_id(document): document for document in documents}
+        point_ids, documents = list(chunks), list(chunks.values())
+        data_point_fqns = list({
+            document.metadata[DATA_POINT_FQN_METADATA_KEY]
+            for document in documents
+            if document.metadata.get(DATA_POINT_FQN_METADATA_KEY)
+        })
+        term_counts = [Counter(tokenize(document.page_content)) for document in documents]
+        with self._get_write_lock(collection_name):
+            connection = self._get_write_connection(collection_name)
+            with connection:
+                rows = set()
+                for batch in _batched(point_ids):
+                    rows.update(row for row, in connection.execute(
+                        f"SELECT row FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                    ))
+                for batch in _batched(data_point_fqns):
+                    rows.update(row for row, in connection.execute(
+                        f"SELECT row FROM chunks WHERE data_point_fqn IN ({','.join('?' * len(batch))})", batch
+                    ))
+                self._delete_rows(connection, list(rows))
+
+                terms = list(set().union(*term_counts))
+                connection.executemany("INSERT OR IGNORE INTO terms (term, df) VALUES (?, 0)", [(t,) for t in terms])
+                term_ids = self._get_term_ids(connection, terms)
+                df_increments: Counter = Counter()
+                postings = []
+                total_length = 0
+                for point_id, document, counts in zip(point_ids, documents, term_counts):
+                    length = sum(counts.values())
+                    chunk_term_ids = [term_ids[term] for term in counts]
+                    row = connection.execute(
+                        "INSERT INTO chunks "
+                        "(id, data_point_fqn, data_source_fqn, length, term_ids, page_content, metadata) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            point_id,
+                            document.metadata.get(DATA_POINT_FQN_METADATA_KEY),
+                            document.metadata.get(DATA_SOURCE_FQN_METADATA_KEY),
+                            length,
+                            np.asarray(chunk_term_ids, dtype=np.int64).tobytes(),
+                            document.page_content,
+                            json.dumps(document.metadata, ensure_ascii=False),
+                        ),
+                    ).lastrowid
+                    df_increments.update(chunk_term_ids)
+                    postings.extend((term_ids[term], row, tf, length) for term, tf in counts.items())
+                    total_length += length
+                connection.executemany("INSERT INTO postings (term_id, row, tf, length) VALUES (?, ?, ?, ?)", postings)
+                connection.executemany(
+                    "UPDATE terms SET df = df + ? WHERE term_id = ?",
+                    [(count, term_id) for term_id, count in df_increments.items()],
+                )
+                self._add_stats(connection, len(documents), total_length)
+        logger.debug(f"[BM25Index] Indexed {len(documents)} chunks of collection {collection_name}")
+
+    def delete_data_points(self, collection_name: str, data_point_fqns: List[str]):
+        """
+        Удаляет все chunk'и точек данных с заданными fqn
+        """
+        if not data_point_fqns or not os.path.exists(self._get_collection_path(collection_name)):
+            return
+        with self._get_write_lock(collection_name):
+            connection = self._get_write_connection(collection_name)
+            with connection:
+                rows = []
+                for batch in _batched(data_point_fqns):
+                    rows.extend(row for row, in connection.execute(
+                        f"SELECT row FROM chunks WHERE data_point_fqn IN ({','.join('?' * len(batch))})", batch
+                    ))
+                deleted_count = self._delete_rows(connection, rows)
+        logger.debug(f"[BM25Index] Deleted {deleted_count} chunks from collection {collection_name}")
+
+    def delete_collection(self, collection_name: str):
+        with self._get_write_lock(collection_name):
+            with self._lock:
+                connection = self._write_connections.pop(collection_name, None)
+                self._epochs[collection_name] = self._epochs.get(collection_name, 0) + 1
+            if connection is not None:
+                connection.close()
+            for suffix in ("", "-wal", "-shm"):
+                path = self._get_collection_path(collection_name) + suffix
+                if os.path.exists(path):
+                    os.remove(path)
+        logger.debug(f"[BM25Index] Deleted collection {collection_name}")
+
+    def search(self,
+               collection_name: str,
+               query: str,
+               k: int = 4,
+               query_filter: Optional[models.Filter] = None) -> List[Tuple[Document, float]]:
+        """
+        Поиск k chunk'ов с наибольшим score BM25
+        Args:
+            collection_name (str): Имя коллекции
+            query (str): Текст запроса
+            k (int): Число chunk'ов
+            query_filter (models.Filter): Фильтр Qdrant по fqn точки данных и источника данных
+        Returns:
+            List[Tuple[Document, float]]: Документы с теми же метаданными, что у векторной БД, и их score
+        """
+        terms = list(set(tokenize(query)))
+        if not terms or not os.path.exists(self._get_collection_path(collection_name)):
+            return []
+        connection = self._get_read_connection(collection_name)
+        # One snapshot for all queries, concurrent writes are not seen halfway
+        connection.execute("BEGIN")
+        try:
+            return self._search(connection, collection_name, terms, k, query_filter)
+        finally:
+            connection.execute("ROLLBACK")
+
+    def _search(self,
+                connection: sqlite3.Connection,
+                collection_name: str,
+                terms: List[str],
+                k: int,
+                query_filter: Optional[models.Filter]) -> List[Tuple[Document, float]]:
+        documents_count, total_length = self._get_stats(connection)
+        if documents_count <= 0:
+            return []
+        average_length = total_length / documents_count
+        rows, scores = [], []
+        for batch in _batched(terms):
+            for term_id, df in connection.execute(
+                    f"SELECT term_id, df FROM terms WHERE term IN ({','.join('?' * len(batch))}) AND df > 0",
+                    batch,
+            ):
+                postings = np.asarray(connection.execute(
+                    "SELECT row, tf, length FROM postings WHERE term_id = ?", (term_id,)
+                ).fetchall(), dtype=np.float64).reshape(-1, 3)
+                idf = math.log((documents_count - df + 0.5) / (df + 0.5) + 1)
+                tf, length = postings[:, 1], postings[:, 2]
+                rows.append(postings[:, 0].astype(np.int64))
+                scores.append(
+                    idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average_length))
+                )
+        if not rows:
+            return []
+        rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(scores))
+        if query_filter is not None:
+            sql, params = get_filter_sql(query_filter)
+            allowed_rows = [row for row, in connection.execute(f"SELECT row FROM chunks WHERE {sql}", params)]
+            mask = np.isin(rows, allowed_rows)
+            rows, scores = rows[mask], scores[mask]
+        if len(rows) > k:
+            top = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        rows, scores = rows[order].tolist(), scores[order].tolist()
+        documents = {}
+        for batch in _batched(rows):
+            for row, point_id, page_content, metadata in connection.execute(
+                    f"SELECT row, id, page_content, metadata FROM chunks "
+                    f"WHERE row IN ({','.join('?' * len(batch))})",
+                    batch,
+            ):
+                documents[row] = Document(
+                    page_content=page_content,
+                    metadata={**json.loads(metadata), "_id": point_id, "_collection_name": collection_name},
+                )
+        return [(documents[row], score) for row, score in zip(rows, scores) if row in documents]
+
+
+BM25_INDEX: Optional[BM25Index] = None
+_BM25_INDEX_LOCK = threading.Lock()
+
+
+def get_bm25_index() -> Optional[BM25Index]:
+    """
+    Возвращает общий индекс BM25 или None, если он отключен
+    """
+    global BM25_INDEX
+    if not settings.BM25_INDEX_PATH:
+        return None
+    with _BM25_INDEX_LOCK:
+        if BM25_INDEX is None:
+            BM25_INDEX = BM25Index(
+                path=settings.BM25_INDEX_PATH,
+                k1=settings.BM25_K1,
+                b=settings.BM25_B,
+            )
+    return BM25_INDEX
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from backend.logger import logger
+from backend.rag.bm25.index import BM25Index
+
+# Rank constant of reciprocal rank fusion, as in the original paper
+RRF_K = 60
+
+
+def _get_document_key(document: Document) -> str:
+    # Vector DB points and BM25 chunks share IDs
+    return str(document.metadata.get("_id") or document.page_content)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int = RRF_K) -> List[Document]:
+    """
+    Объединяет ранжированные списки документов: score документа - сумма 1 / (k + ранг) по спискам
+    Args:
+        rankings (Sequence[List[Document]]): Списки документов, лучшие первыми
+        k (int): Константа RRF, чем больше, тем меньше вес первых мест
+    Returns:
+        List[Document]: Документы без повторов по убыванию score
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = _get_document_key(document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Гибридный поиск: результаты vector retriever и индекса BM25 объединяются reciprocal rank fusion
+    """
+    retriever: BaseRetriever
+    index: BM25Index
+    collection_name: str
+    # Documents returned after fusion
+    k: int = 4
+    # Documents taken from the BM25 index
+    lexical_k: int = 20
+    rrf_k: int = RRF_K
+    # Qdrant filter, applied to the BM25 hits as well
+    filter: Optional[Any] = None
+
+    def _search_lexical(self, query: str) -> List[Document]:
+        return [
+            document
+            for document, _ in self.index.search(self.collection_name, query, k=self.lexical_k, query_filter=self.filter)
+        ]
+
+    def _fuse(self, vector_documents: List[Document], lexical_documents: List[Document]) -> List[Document]:
+        logger.debug(
+            f"[HybridRetriever] Fusing {len(vector_documents)} vector and {len(lexical_documents)} BM25 hits"
+        )
+        return reciprocal_rank_fusion([vector_documents, lexical_documents], k=self.rrf_k)[:self.k]
+
+    def _get_relevant_documents(self,
+                                query: str,
+                                *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._fuse(vector_documents, self._search_lexical(query))
+
+    async def _aget_relevant_documents(self,
+                                       query: str,
+                                       *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        vector_documents, lexical_documents = await asyncio.gather(
+            self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()}),
+            asyncio.to_thread(self._search_lexical, query),
+        )
+        return self._fuse(vector_documents, lexical_documents)
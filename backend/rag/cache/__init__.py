@@ -0,0 +1,25 @@
+"""
+Кэши ответов на запросы. Записи привязаны к поколению коллекции,
+которое увеличивается после каждого приема данных, изменившего коллекцию (`bump_collection_generation`).
+Поколение хранится в metadata store и читается при каждом обращении к кэшу, поэтому
+прием данных в другом процессе (Celery worker, другой uvicorn worker) сразу делает записи устаревшими.
+* `SemanticAnswerCache` возвращает готовый ответ /answer на похожий по embedding'у запрос
+* `RetrievalCache` хранит результаты поиска в векторной БД для точно совпадающих запросов,
+  `CachedRetriever` - обертка над `VectorStoreRetriever`, которая его использует
+
+API:
+```python
+from backend.rag.cache import ANSWER_CACHE, get_answer_cache_key, aget_collection_generation
+
+key = get_answer_cache_key(collection_name, prompt_template, llm_configuration, retriever_name, retriever_config)
+generation = await aget_collection_generation(collection_name)
+answer = ANSWER_CACHE.get(key, generation, query_vector)  # None, если похожего запроса нет
+ANSWER_CACHE.put(key, generation, query_vector, {"answer": "...", "docs": []})
+
+retriever = CachedRetriever(retriever=vector_store_retriever, collection_name=collection_name, cache=RETRIEVAL_CACHE)
+```
+"""
+from backend.rag.cache.generation import get_collection_generation, aget_collection_generation, \
+    bump_collection_generation, abump_collection_generation
+from backend.rag.cache.answer_cache import ANSWER_CACHE, SemanticAnswerCache, get_answer_cache_key
+from backend.rag.cache.retrieval_cache import RETRIEVAL_CACHE, RetrievalCache, CachedRetriever
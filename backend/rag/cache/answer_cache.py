@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from backend.logger import logger
+from backend.rag.cache.generation import register_invalidation_callback
+from backend.settings import settings
+
+# (collection, prompt template hash, llm config hash, retriever hash)
+AnswerCacheKey = Tuple[str, str, str, str]
+
+
+def _to_jsonable(value: Any) -> Any:
+    # Nested pydantic models, e.g. the qdrant filter in search_kwargs
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def get_config_hash(config: Any) -> str:
+    """
+    Возвращает hash конфигурации (pydantic модель, dict или строка)
+    """
+    return hashlib.sha256(
+        orjson.dumps(config, option=orjson.OPT_SORT_KEYS, default=_to_jsonable)
+    ).hexdigest()
+
+
+def get_answer_cache_key(collection_name: str,
+                         prompt_template: str,
+                         llm_configuration: Any,
+                         retriever_name: str,
+                         retriever_config: Any) -> AnswerCacheKey:
+    """
+    Возвращает ключ, в пределах которого похожие запросы получают один и тот же ответ
+    """
+    return (
+        collection_name,
+        get_config_hash(prompt_template),
+        get_config_hash(llm_configuration),
+        get_config_hash({"name": retriever_name, "config": retriever_config}),
+    )
+
+
+class _AnswerBucket:
+    """
+    Ответы на запросы с одинаковым ключом. Векторы запросов хранятся нормированными.
+    """
+
+    def __init__(self):
+        self.vectors: List[np.ndarray] = []
+        self.answers: List[dict] = []
+        self.created_at: List[float] = []
+        self.generations: List[int] = []
+
+    def __len__(self):
+        return len(self.answers)
+
+    def pop_oldest(self):
+        for column in (self.vectors, self.answers, self.created_at, self.generations):
+            column.pop(0)
+
+
+class SemanticAnswerCache:
+    """
+    Кэш ответов /answer. Ответ возвращается, если косинусная близость вектора запроса
+    к вектору закэшированного запроса не меньше similarity_threshold.
+    Записи коллекции сбрасываются при смене ее поколения (после приема данных).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._buckets: "OrderedDict[AnswerCacheKey, _AnswerBucket]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, key: AnswerCacheKey, generation: int, query_vector) -> Optional[dict]:
+        """
+        Возвращает закэшированный ответ на самый похожий запрос или None
+        Args:
+            key (AnswerCacheKey): Ключ, см. `get_answer_cache_key`
+            generation (int): Текущее поколение коллекции из metadata store
+            query_vector: Embedding запроса
+        Returns:
+            Optional[dict]: {"answer": ..., "docs": [...]}
+        """
+        query_vector = self._normalize(query_vector)
+        min_created_at = time.time() - self.ttl_seconds
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None and len(bucket):
+                similarities = np.stack(bucket.vectors) @ query_vector
+                for i in np.argsort(-similarities):
+                    if similarities[i] < self.similarity_threshold:
+                        break
+                    if bucket.generations[i] == generation and bucket.created_at[i] >= min_created_at:
+                        self._buckets.move_to_end(key)
+                        self.hits += 1
+                        logger.debug(f"[AnswerCache] Hit for collection {key[0]}, similarity {similarities[i]:.3f}")
+                        return bucket.answers[i]
+            self.misses += 1
+        return None
+
+    def put(self, key: AnswerCacheKey, generation: int, query_vector, answer: dict) -> None:
+        """
+        Сохраняет ответ. generation - поколение коллекции на момент начала поиска:
+        если коллекция изменилась во время ответа, запись не совпадет с новым поколением и не будет выдана
+        """
+        with self._lock:
+            bucket = self._buckets.setdefault(key, _AnswerBucket())
+            self._buckets.move_to_end(key)
+            bucket.vectors.append(self._normalize(query_vector))
+            bucket.answers.append(answer)
+            bucket.created_at.append(time.time())
+            bucket.generations.append(generation)
+            self._size += 1
+            # Evict the oldest answers of the least recently used keys
+            while self._size > self.max_entries:
+                lru_key, lru_bucket = next(iter(self._buckets.items()))
+                lru_bucket.pop_oldest()
+                self._size -= 1
+                if not len(lru_bucket):
+                    del self._buckets[lru_key]
+
+    def invalidate_collection(self, collection_name: str) -> None:
+        """
+        Удаляет все ответы по коллекции
+        """
+        with self._lock:
+            for key in [key for key in self._buckets if key[0] == collection_name]:
+                self._size -= len(self._buckets.pop(key))
+        logger.debug(f"[AnswerCache] Invalidated collection {collection_name}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"answer_cache_hits": self.hits, "answer_cache_misses": self.misses, "answer_cache_size": self._size}
+
+
+ANSWER_CACHE: Optional[SemanticAnswerCache] = None
+if settings.ANSWER_CACHE_MAX_ENTRIES > 0:
+    ANSWER_CACHE = SemanticAnswerCache(
+        max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SEC,
+        similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    )
+    register_invalidation_callback(ANSWER_CACHE.invalidate_collection)
@@ -0,0 +1,55 @@
+from backend.rag.metadata_store.client import ASYNC_METADATA_STORE_CLIENT, METADATA_STORE_CLIENT
+
+# Generation of every collection, bumped when its data changes.
+# Kept in the metadata store, so a bump in the indexer (e.g. a Celery worker) is seen by every API process.
+# Cache entries remember the generation they were created in and are never served after a bump.
+# Callbacks called with the collection name after a bump, they only free the memory of this process
+_INVALIDATION_CALLBACKS = []
+
+
+def get_collection_generation(collection_name: str) -> int:
+    """
+    Возвращает текущее поколение коллекции из metadata store
+    """
+    return METADATA_STORE_CLIENT.get_collection_generation(collection_name)
+
+
+async def aget_collection_generation(collection_name: str) -> int:
+    """
+    Асинхронная версия get_collection_generation
+    """
+    return await ASYNC_METADATA_STORE_CLIENT.get_collection_generation(collection_name)
+
+
+def bump_collection_generation(collection_name: str) -> int:
+    """
+    Увеличивает поколение коллекции после изменения ее данных и сбрасывает связанные кэши процесса
+    Args:
+        collection_name (str): Имя коллекции
+    Returns:
+        int: Новое поколение коллекции
+    """
+    generation = METADATA_STORE_CLIENT.bump_collection_generation(collection_name)
+    _run_invalidation_callbacks(collection_name)
+    return generation
+
+
+async def abump_collection_generation(collection_name: str) -> int:
+    """
+    Асинхронная версия bump_collection_generation
+    """
+    generation = await ASYNC_METADATA_STORE_CLIENT.bump_collection_generation(collection_name)
+    _run_invalidation_callbacks(collection_name)
+    return generation
+
+
+def _run_invalidation_callbacks(collection_name: str) -> None:
+    for callback in _INVALIDATION_CALLBACKS:
+        callback(collection_name)
+
+
+def register_invalidation_callback(callback) -> None:
+    """
+    Регистрирует функцию, которая вызывается с именем коллекции при смене ее поколения в этом процессе
+    """
+    _INVALIDATION_CALLBACKS.append(callback)
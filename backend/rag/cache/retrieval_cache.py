@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+
+from backend.logger import logger
+from backend.rag.cache.answer_cache import get_config_hash
+from backend.rag.cache.generation import aget_collection_generation, get_collection_generation, \
+    register_invalidation_callback
+from backend.settings import settings
+
+# (collection, collection generation, query, search type, search kwargs hash)
+RetrievalCacheKey = Tuple[str, int, str, str, str]
+
+
+class RetrievalCache:
+    """
+    LRU/TTL кэш результатов поиска в векторной БД.
+    Хранит тексты и метаданные (включая ID точек) найденных документов.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[RetrievalCacheKey, Tuple[float, List[Tuple[str, dict]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: RetrievalCacheKey) -> Optional[List[Document]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time() - self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Copies, so callers can not change the cached documents
+        return [Document(page_content=page_content, metadata=dict(metadata)) for page_content, metadata in entry[1]]
+
+    def put(self, key: RetrievalCacheKey, documents: List[Document]) -> None:
+        # The key holds the generation read before the search,
+        # results of a collection that changed during the search are never served
+        with self._lock:
+            self._entries[key] = (
+                time.time(),
+                [(document.page_content, dict(document.metadata)) for document in documents],
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_collection(self, collection_name: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == collection_name]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"retrieval_cache_hits": self.hits, "retrieval_cache_misses": self.misses,
+                "retrieval_cache_size": len(self._entries)}
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    VectorStoreRetriever, результаты которого кэшируются в `RetrievalCache`
+    """
+    retriever: VectorStoreRetriever
+    collection_name: str
+    cache: RetrievalCache
+
+    def _get_cache_key(self, query: str, generation: int) -> RetrievalCacheKey:
+        return (
+            self.collection_name,
+            generation,
+            query,
+            self.retriever.search_type,
+            get_config_hash(self.retriever.search_kwargs),
+        )
+
+    def _get_relevant_documents(self,
+                                query: str,
+                                *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        # Read on every lookup, the collection may be re-ingested by another process
+        key = self._get_cache_key(query, get_collection_generation(self.collection_name))
+        documents = self.cache.get(key)
+        if documents is None:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self.cache.put(key, documents)
+        else:
+            logger.debug(f"[RetrievalCache] Hit for collection {self.collection_name}")
+        return documents
+
+    async def _aget_relevant_documents(self,
+                                       query: str,
+                                       *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        key = self._get_cache_key(query, await aget_collection_generation(self.collection_name))
+        documents = self.cache.get(key)
+        if documents is None:
+            documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            self.cache.put(key, documents)
+        else:
+            logger.debug(f"[RetrievalCache] Hit for collection {self.collection_name}")
+        return documents
+
+
+RETRIEVAL_CACHE: Optional[RetrievalCache] = None
+if settings.RETRIEVAL_CACHE_MAX_ENTRIES > 0:
+    RETRIEVAL_CACHE = RetrievalCache(
+        max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SEC,
+    )
+    register_invalidation_callback(RETRIEVAL_CACHE.invalidate_collection)
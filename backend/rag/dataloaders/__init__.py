@@ -1,6 +1,8 @@
 """
 Нужны для перемещения данных из источника (веб страница, файл) в файл.
 * `WebLoader` скачивает в папку `/tmp/webloader`, определяемую `DEFAULT_BASE_DIR`
+* `LocalDirLoader` хэширует содержимое файлов и хранит хэши в manifest'е источника
+  (`DataSourceManifest`, папка `DATA_SOURCE_MANIFEST_DIR`), неизмененные файлы не читаются повторно
 
 API:
 ```python
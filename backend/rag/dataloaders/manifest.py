@@ -0,0 +1,100 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+import orjson
+
+from backend.logger import logger
+from backend.settings import settings
+
+# Size of the blocks read while hashing a file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_file_hash(filepath: str) -> str:
+    """
+    Потоковый хэш содержимого файла (blake2b), файл не читается в память целиком
+    """
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_manifest_path(data_source_fqn: str) -> str:
+    """
+    Путь к manifest'у источника данных
+    """
+    filename = hashlib.sha256(data_source_fqn.encode("utf-8")).hexdigest()
+    return os.path.join(settings.DATA_SOURCE_MANIFEST_DIR, f"{filename}.json")
+
+
+class DataSourceManifest:
+    """
+    Manifest источника данных: для каждого файла хранит (mtime_ns, size, inode) и хэш содержимого.
+    Хэш вычисляется заново, только если изменился stat файла,
+    поэтому неизмененные файлы при повторном приеме не читаются.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, dict] = {}
+        self._seen: Dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as file:
+                    self._entries = orjson.loads(file.read())
+            except Exception as exp:
+                logger.warning(f"[Manifest] Could not read manifest {path}, it will be rebuilt: {exp}")
+
+    @classmethod
+    def for_data_source(cls, data_source_fqn: str) -> "DataSourceManifest":
+        return cls(get_manifest_path(data_source_fqn))
+
+    def get_hash(self, rel_path: str, full_path: str, stat: Optional[os.stat_result] = None) -> str:
+        """
+        Возвращает хэш содержимого файла
+        Args:
+            rel_path (str): Путь файла относительно источника данных, ключ в manifest'е
+            full_path (str): Полный путь к файлу
+            stat (Optional[os.stat_result]): Результат os.stat, если уже получен
+        Returns:
+            str: Хэш содержимого файла
+        """
+        stat = stat or os.stat(full_path)
+        entry = self._entries.get(rel_path)
+        if (
+            entry
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+            and entry["inode"] == stat.st_ino
+        ):
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "inode": stat.st_ino,
+                "hash": get_file_hash(full_path),
+            }
+        self._seen[rel_path] = entry
+        return entry["hash"]
+
+    def save(self) -> None:
+        """
+        Сохраняет manifest. Файлы, которые не встретились при обходе, из него удаляются.
+        """
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(orjson.dumps(self._seen))
+        os.replace(tmp_path, self.path)
+        self._entries = self._seen
+        self._seen = {}
+        logger.debug(f"[Manifest] Saved {self.path}: {self.hits} unchanged, {self.misses} hashed")
@@ -1,10 +1,42 @@
+import fcntl
 import os
 import shutil
 from typing import Dict, Iterator, List
 
 from backend.logger import logger
 from backend.rag.dataloaders.loader import BaseDataLoader
+from backend.rag.dataloaders.manifest import DataSourceManifest
 from backend.rag.schemas import DataIngestionMode, DataPoint, DataSource, LoadedDataPoint
+from backend.settings import settings
+
+# How a loaded file is made available to the parsers:
+# none - the original file is parsed in place (read-only), nothing is copied
+# hardlink / reflink - a link or copy-on-write clone in dest_dir, falls back to copy
+# copy - a full copy in dest_dir
+ISOLATION_MODES = ("none", "hardlink", "reflink", "copy")
+# ioctl request of Linux copy-on-write clone (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+def materialize_file(source_path: str, dest_path: str, isolation: str) -> None:
+    """
+    Создает файл dest_path из source_path выбранным способом изоляции
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    try:
+        if isolation == "hardlink":
+            os.link(source_path, dest_path)
+            return
+        if isolation == "reflink":
+            with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+    except OSError as exp:
+        # Another filesystem or no copy-on-write support
+        logger.debug(f"Could not {isolation} {source_path}, copying instead: {exp}")
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+    shutil.copy2(source_path, dest_path)
 
 
 class LocalDirLoader(BaseDataLoader):
@@ -18,7 +50,10 @@ class LocalDirLoader(BaseDataLoader):
                            batch_size: int,
                            data_ingestion_mode: DataIngestionMode) -> Iterator[List[LoadedDataPoint]]:
         """
-        Загружает данные из локальной директории, определенной в URI
+        Загружает данные из локальной директории, определенной в URI.
+        Хэш точки данных - хэш содержимого файла, см. `DataSourceManifest`.
+        Способ изоляции файлов задается ключом `isolation` в метаданных источника
+        (по умолчанию `LOCALDIR_ISOLATION`): при "none" файлы не копируются.
         """
         # Data source URI is the path of the local directory.
         source_dir = data_source.uri
@@ -31,30 +66,30 @@ class LocalDirLoader(BaseDataLoader):
         if not os.path.exists(source_dir):
             raise Exception("Source directory does not exist")
 
-        # If the source directory and destination directory are the same, do nothing.
-        logger.info("source_dir: %s", source_dir)
-        logger.info("dest_dir: %s", dest_dir)
+        isolation = (data_source.metadata or {}).get("isolation", settings.LOCALDIR_ISOLATION)
+        if isolation not in ISOLATION_MODES:
+            raise ValueError(f"Unknown isolation mode {isolation}, expected one of {ISOLATION_MODES}")
+        # If the source directory and destination directory are the same, files are used in place.
         if source_dir == dest_dir:
-            # Temrinate the function
-            return
-
-        # Copy the entire directory (including subdirectories) from source to destination.
-        shutil.copytree(source_dir, dest_dir, dirs_exist_ok=True)
+            isolation = "none"
+        logger.info("source_dir: %s", source_dir)
+        logger.info("dest_dir: %s, isolation: %s", dest_dir, isolation)
 
+        # Content hashes are cached in the manifest by file stat,
+        # so unchanged files are neither read nor copied
+        manifest = DataSourceManifest.for_data_source(data_source.fqn)
         loaded_data_points: List[LoadedDataPoint] = []
-        for root, d_names, f_names in os.walk(dest_dir):
+        for root, d_names, f_names in os.walk(source_dir):
             for f in f_names:
                 if f.startswith("."):
                     continue
-                full_path = os.path.join(root, f)
-                rel_path = os.path.relpath(full_path, dest_dir)
+                source_path = os.path.join(root, f)
+                rel_path = os.path.relpath(source_path, source_dir)
                 file_ext = os.path.splitext(f)[1]
                 data_point = DataPoint(
                     data_source_fqn=data_source.fqn,
                     data_point_uri=rel_path,
-                    data_point_hash=str(os.path.getsize(full_path)),
-                    local_filepath=full_path,
-                    file_extension=file_ext,
+                    data_point_hash=manifest.get_hash(rel_path, source_path),
                 )
 
                 # If the data ingestion mode is incremental, check if the data point already exists.
@@ -66,6 +101,13 @@ class LocalDirLoader(BaseDataLoader):
                 ):
                     continue
 
+                # Only the files to be ingested are materialized
+                if isolation == "none":
+                    full_path = source_path
+                else:
+                    full_path = os.path.join(dest_dir, rel_path)
+                    materialize_file(source_path, full_path, isolation)
+
                 loaded_data_points.append(
                     LoadedDataPoint(
                         data_point_hash=data_point.data_point_hash,
@@ -73,9 +115,12 @@ class LocalDirLoader(BaseDataLoader):
                         data_source_fqn=data_point.data_source_fqn,
                         local_filepath=full_path,
                         file_extension=file_ext,
+                        # Never delete the original files
+                        delete_after_processing=isolation != "none",
                     )
                 )
                 if len(loaded_data_points) >= batch_size:
                     yield loaded_data_points
                     loaded_data_points.clear()
+        manifest.save()
         yield loaded_data_points
@@ -1,8 +1,11 @@
 """
 Возвращают объекты `Embeddings` из LangChain
-Можно кэшировать embeddings, чтобы избежать их повторного вычисления
-с помощью `CacheBackedEmbeddings`, но пока, кажется, что в данном
-случае это не полезно.
+Векторы документов кэшируются на диске (`backend.rag.embedders.cache`),
+ключ - (модель, sha256 текста chunk'а). Поэтому при повторном приеме данных
+неизмененные chunk'и не вычисляются заново. Используется SQLite, а не
+`CacheBackedEmbeddings`, чтобы иметь счетчики попаданий и удаление по размеру.
+Экземпляры Embeddings кэшируются на уровне процесса (LRU с ограничением по памяти),
+поэтому веса модели загружаются один раз, а не на каждый батч или запрос.
 
 API:
 ```python
@@ -14,6 +17,17 @@ embedder_config = EmbedderConfig(provider="local", config=config)
 embedder = get_embedder(embedder_config)
 # И затем можно делать embedder.embed_documents(["document", "document1"])...
 # или передать embedder в vectorstore
+
+# Повторный вызов вернет тот же объект из кэша, а удалить его можно так:
+from backend.rag.embedders.embedder import evict_embedder
+evict_embedder(embedder_config)
+
+# Embedder с дисковым кэшем векторов документов
+from backend.rag.embedders.cache import get_cached_embedder, get_embedding_store
+embedder = get_cached_embedder(embedder_config)
+embedder.embed_documents(["document"])
+embedder.stats()  # hits/misses of this embedder: {"embedding_cache_hits": ..., "embedding_cache_misses": ...}
+get_embedding_store().stats()  # the same for the whole process
 ```
 """
 from backend.rag.embedders.embedder import register_embedder
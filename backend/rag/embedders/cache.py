@@ -0,0 +1,280 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from backend.logger import logger
+from backend.rag.embedders.embedder import get_embedder, get_embedder_cache_key
+from backend.rag.schemas import EmbedderConfig
+from backend.settings import settings
+
+# Max number of SQL variables in one `IN (...)` query
+SQL_BATCH_SIZE = 500
+# After eviction the store is shrunk to this fraction of the max size
+EVICTION_TARGET_RATIO = 0.9
+
+
+def get_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Хранилище embeddings на диске (SQLite), адресуемое по содержимому.
+    Ключ - (model_id, sha256 текста chunk'а), значение - вектор float32.
+    При превышении max_size_bytes удаляются давно использованные векторы.
+    """
+
+    def __init__(self, path: str, max_size_bytes: int):
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model_id, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)"
+        )
+        # Total size kept by triggers in the same transaction as the change,
+        # so it stays exact with several processes writing to the file
+        self._conn.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS embeddings_size (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL);
+            INSERT OR IGNORE INTO embeddings_size (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM embeddings;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN
+                UPDATE embeddings_size SET size = size + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF size ON embeddings BEGIN
+                UPDATE embeddings_size SET size = size + NEW.size - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN
+                UPDATE embeddings_size SET size = size - OLD.size WHERE id = 0;
+            END;
+            COMMIT;
+            """
+        )
+
+    def _get_size_bytes(self) -> int:
+        return self._conn.execute("SELECT size FROM embeddings_size WHERE id = 0").fetchone()[0]
+
+    def get_many(self, model_id: str, text_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Возвращает найденные векторы по хэшам текстов
+        """
+        found: Dict[str, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(text_hashes), SQL_BATCH_SIZE):
+                batch = text_hashes[i: i + SQL_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({placeholders})",
+                    [model_id, *batch],
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model_id = ? AND text_hash = ?",
+                    [(now, model_id, text_hash) for text_hash in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(text_hashes)) - len(found)
+        return found
+
+    def put_many(self, model_id: str, vectors: Dict[str, np.ndarray]) -> None:
+        """
+        Сохраняет векторы и при необходимости освобождает место
+        """
+        now = time.time()
+        rows = []
+        for text_hash, vector in vectors.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((model_id, text_hash, blob, len(blob), now))
+        with self._lock:
+            # The write lock is taken first, so the size read below is not changed by other processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another run may have stored the same texts, the triggers count only the size difference
+                self._conn.executemany(
+                    "INSERT INTO embeddings (model_id, text_hash, vector, size, last_access) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (model_id, text_hash) DO UPDATE SET "
+                    "vector = excluded.vector, size = excluded.size, last_access = excluded.last_access",
+                    rows,
+                )
+                if self._get_size_bytes() > self.max_size_bytes:
+                    self._evict()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _evict(self) -> None:
+        # Called inside the write transaction of put_many
+        target_size = self.max_size_bytes * EVICTION_TARGET_RATIO
+        size_bytes = self._get_size_bytes()
+        evicted = 0
+        while size_bytes > target_size:
+            rows = self._conn.execute(
+                "SELECT model_id, text_hash, size FROM embeddings ORDER BY last_access LIMIT ?",
+                (SQL_BATCH_SIZE,),
+            ).fetchall()
+            if not rows:
+                break
+            rows_to_delete = []
+            for model_id, text_hash, size in rows:
+                if size_bytes <= target_size:
+                    break
+                rows_to_delete.append((model_id, text_hash))
+                size_bytes -= size
+            self._conn.executemany(
+                "DELETE FROM embeddings WHERE model_id = ? AND text_hash = ?",
+                rows_to_delete,
+            )
+            evicted += len(rows_to_delete)
+        logger.info(f"[EmbeddingStore] Evicted {evicted} vectors, size: {size_bytes / 1024 / 1024:.1f} MB")
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            size_bytes = self._get_size_bytes()
+        return {
+            "embedding_cache_hits": self.hits,
+            "embedding_cache_misses": self.misses,
+            "embedding_cache_size_mb": round(size_bytes / 1024 / 1024, 2),
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Обертка над Embeddings, которая берет векторы документов из `EmbeddingStore`
+    и вычисляет только отсутствующие в нем.
+    Счетчики hits/misses - только этого объекта (например, одного запуска приема данных).
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model_id: str):
+        self.embeddings = embeddings
+        self.store = store
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        text_hashes = [get_text_hash(text) for text in texts]
+        found = self.store.get_many(self.model_id, text_hashes)
+
+        # Embed every missing text only once
+        missing: Dict[str, str] = {}
+        for text_hash, text in zip(text_hashes, texts):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = text
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {
+                text_hash: np.asarray(vector, dtype=np.float32)
+                for text_hash, vector in zip(missing.keys(), vectors)
+            }
+            self.store.put_many(self.model_id, computed)
+            found.update(computed)
+
+        logger.debug(
+            f"[EmbeddingStore] {len(texts) - len(missing)}/{len(texts)} embeddings reused from cache"
+        )
+        return [found[text_hash].tolist() for text_hash in text_hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> Dict[str, int | float]:
+        return {
+            "embedding_cache_hits": self.hits,
+            "embedding_cache_misses": self.misses,
+            "embedding_cache_size_mb": self.store.stats()["embedding_cache_size_mb"],
+        }
+
+
+class QueryVectorEmbeddings(Embeddings):
+    """
+    Обертка над Embeddings с уже вычисленным вектором запроса:
+    embed_query для этого запроса возвращает его без повторного вызова модели
+    """
+
+    def __init__(self, embeddings: Embeddings, query: str, query_vector: List[float]):
+        self.embeddings = embeddings
+        self.query = query
+        self.query_vector = list(query_vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if text == self.query:
+            return list(self.query_vector)
+        return self.embeddings.embed_query(text)
+
+
+EMBEDDING_STORE: Optional[EmbeddingStore] = None
+_EMBEDDING_STORE_LOCK = threading.Lock()
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """
+    Возвращает общее хранилище embeddings или None, если кэш отключен
+    """
+    global EMBEDDING_STORE
+    if not settings.EMBEDDING_CACHE_PATH:
+        return None
+    with _EMBEDDING_STORE_LOCK:
+        if EMBEDDING_STORE is None:
+            EMBEDDING_STORE = EmbeddingStore(
+                path=settings.EMBEDDING_CACHE_PATH,
+                max_size_bytes=settings.EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024,
+            )
+    return EMBEDDING_STORE
+
+
+def get_cached_embedder(embedder_config: EmbedderConfig) -> Embeddings:
+    """
+    Возвращает Embeddings, векторы документов которого кэшируются на диске.
+    Если кэш отключен, возвращает обычный Embeddings.
+    Args:
+        embedder_config (EmbedderConfig): Конфигурация
+    Returns:
+        Embeddings: Объект класса Embeddings
+    """
+    embeddings = get_embedder(embedder_config)
+    store = get_embedding_store()
+    if store is None:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings=embeddings,
+        store=store,
+        model_id=get_embedder_cache_key(embedder_config),
+    )
@@ -1,13 +1,26 @@
 # A global registry to store all available embedders.
-from typing import List
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
 
+import orjson
 from langchain.embeddings.base import Embeddings
 
+from backend.logger import logger
 from backend.settings import settings
 from backend.rag.schemas import EmbedderConfig, ComponentDto
 
 EMBEDDER_REGISTRY = {}
 
+# A process-wide LRU cache of the live embedder instances.
+# Key is `provider:sha256(config)`, see `get_embedder_cache_key`.
+EMBEDDER_CACHE: "OrderedDict[str, Embeddings]" = OrderedDict()
+EMBEDDER_CACHE_SIZES: Dict[str, int] = {}
+_EMBEDDER_CACHE_LOCK = threading.RLock()
+# One lock per model being loaded: loads of other models and cache hits do not wait for it
+_EMBEDDER_LOAD_LOCKS: Dict[str, threading.Lock] = {}
+
 
 def register_embedder(provider: str, cls) -> None:
     """
@@ -27,9 +40,61 @@ def register_embedder(provider: str, cls) -> None:
     EMBEDDER_REGISTRY[provider] = cls
 
 
+def get_embedder_cache_key(embedder_config: EmbedderConfig) -> str:
+    """
+    Возвращает ключ Embedder'а в кэше: provider + hash конфигурации
+    Args:
+        embedder_config (EmbedderConfig): Конфигурация
+    Returns:
+        str: Ключ в EMBEDDER_CACHE
+    """
+    config_hash = hashlib.sha256(
+        orjson.dumps(embedder_config.config or {}, option=orjson.OPT_SORT_KEYS, default=str)
+    ).hexdigest()
+    return f"{embedder_config.provider}:{config_hash}"
+
+
+def _estimate_embedder_size(embedder: Embeddings) -> int:
+    """
+    Оценивает объем памяти (в байтах), занимаемый весами модели Embedder'а.
+    Для Embedder'ов, работающих через API (например, GigaChat), возвращает 0.
+    """
+    client = getattr(embedder, "client", None)
+    if client is None or not hasattr(client, "parameters"):
+        return 0
+    try:
+        size = sum(p.numel() * p.element_size() for p in client.parameters())
+        size += sum(b.numel() * b.element_size() for b in client.buffers())
+        return size
+    except Exception as e:
+        logger.debug(f"Could not estimate embedder size: {e}")
+        return 0
+
+
+def _evict_over_budget(keep_key: str) -> None:
+    """
+    Удаляет самые давно использованные Embedder'ы, пока кэш не уложится в лимиты.
+    Embedder с ключом keep_key не удаляется.
+    """
+    max_models = settings.EMBEDDER_CACHE_MAX_MODELS
+    memory_budget = settings.EMBEDDER_CACHE_MEMORY_BUDGET_MB * 1024 * 1024
+    while len(EMBEDDER_CACHE) > 1:
+        total_size = sum(EMBEDDER_CACHE_SIZES.values())
+        if len(EMBEDDER_CACHE) <= max_models and total_size <= memory_budget:
+            break
+        oldest_key = next(iter(EMBEDDER_CACHE))
+        if oldest_key == keep_key:
+            EMBEDDER_CACHE.move_to_end(oldest_key)
+            oldest_key = next(iter(EMBEDDER_CACHE))
+        EMBEDDER_CACHE.pop(oldest_key)
+        size = EMBEDDER_CACHE_SIZES.pop(oldest_key, 0)
+        logger.info(f"Evicted embedder {oldest_key} ({size / 1024 / 1024:.1f} MB) from cache")
+
+
 def get_embedder(embedder_config: EmbedderConfig) -> Embeddings:
     """
-    Возвращает экземпляр Embeddings на основании конфигурации
+    Возвращает экземпляр Embeddings на основании конфигурации.
+    Экземпляры кэшируются на уровне процесса, поэтому модель загружается один раз.
     Args:
         embedder_config (EmbedderConfig): Конфигурация
     Returns:
@@ -40,12 +105,77 @@ def get_embedder(embedder_config: EmbedderConfig) -> Embeddings:
         raise ValueError(
             f"No embedder registered with provider {embedder_config.provider}"
         )
-    embedder: Embeddings = EMBEDDER_REGISTRY[embedder_config.provider](
-        **embedder_config.config
-    )
+    key = get_embedder_cache_key(embedder_config)
+    with _EMBEDDER_CACHE_LOCK:
+        embedder = EMBEDDER_CACHE.get(key)
+        if embedder is not None:
+            EMBEDDER_CACHE.move_to_end(key)
+            return embedder
+        load_lock = _EMBEDDER_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    # The model is loaded once, concurrent callers of the same key wait for it
+    with load_lock:
+        with _EMBEDDER_CACHE_LOCK:
+            embedder = EMBEDDER_CACHE.get(key)
+            if embedder is not None:
+                EMBEDDER_CACHE.move_to_end(key)
+                return embedder
+
+        logger.info(f"Loading embedder {key}")
+        try:
+            embedder: Embeddings = EMBEDDER_REGISTRY[embedder_config.provider](
+                **(embedder_config.config or {})
+            )
+            size = _estimate_embedder_size(embedder)
+            with _EMBEDDER_CACHE_LOCK:
+                EMBEDDER_CACHE[key] = embedder
+                EMBEDDER_CACHE_SIZES[key] = size
+                _evict_over_budget(keep_key=key)
+        finally:
+            with _EMBEDDER_CACHE_LOCK:
+                if _EMBEDDER_LOAD_LOCKS.get(key) is load_lock:
+                    _EMBEDDER_LOAD_LOCKS.pop(key)
     return embedder
 
 
+def warmup_embedders(embedder_configs: Iterable[EmbedderConfig]) -> None:
+    """
+    Заранее загружает Embedder'ы в кэш (например, при старте приложения)
+    Args:
+        embedder_configs (Iterable[EmbedderConfig]): Конфигурации
+    Returns:
+        None
+    """
+    for embedder_config in embedder_configs:
+        try:
+            get_embedder(embedder_config)
+        except Exception as e:
+            logger.error(f"Failed to warm up embedder {embedder_config.provider}: {e}")
+
+
+def evict_embedder(embedder_config: EmbedderConfig) -> bool:
+    """
+    Удаляет Embedder из кэша
+    Args:
+        embedder_config (EmbedderConfig): Конфигурация
+    Returns:
+        bool: True, если Embedder был в кэше
+    """
+    key = get_embedder_cache_key(embedder_config)
+    with _EMBEDDER_CACHE_LOCK:
+        EMBEDDER_CACHE_SIZES.pop(key, None)
+        return EMBEDDER_CACHE.pop(key, None) is not None
+
+
+def clear_embedder_cache() -> None:
+    """
+    Очищает кэш Embedder'ов
+    """
+    with _EMBEDDER_CACHE_LOCK:
+        EMBEDDER_CACHE.clear()
+        EMBEDDER_CACHE_SIZES.clear()
+
+
 def list_embedders() -> List[ComponentDto]:
     """
     Возвращает список всех зарегистрированных Embeddings
@@ -1,33 +1,57 @@
+import asyncio
 import os
 import tempfile
-from typing import Dict, List
+import time
+from typing import AsyncIterable, Dict, List, Optional, Set
 
+import numpy as np
 from fastapi import HTTPException
+from pydantic import ValidationError
 from fastapi.responses import JSONResponse
+from langchain.docstore.document import Document
 
-from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_POINT_HASH_METADATA_KEY
+from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_POINT_HASH_METADATA_KEY, \
+    DATA_POINT_CHUNK_INDEX_METADATA_KEY, DATA_SOURCE_FQN_METADATA_KEY
 from backend.logger import logger
+from backend.rag.bm25 import get_bm25_index
+from backend.rag.cache import abump_collection_generation
 from backend.rag.dataloaders.loader import get_loader_for_data_source
-from backend.rag.embedders.embedder import get_embedder
-from backend.rag.indexer.schemas import DataIngestionConfig
-from backend.rag.metadata_store.client import METADATA_STORE_CLIENT
-from backend.rag.parsers.parser import get_parser_for_extension
-from backend.rag.schemas import DataPointVector, DataIngestionRunStatus, DataIngestionMode, LoadedDataPoint, \
-    IngestDataToCollectionDto, CreateDataIngestionRun
+from backend.rag.embedders.cache import CachedEmbeddings, get_cached_embedder
+from backend.rag.indexer.schemas import DataIngestionConfig, IngestionBudget
+from backend.rag.jobs.client import JOB_QUEUE
+from backend.rag.metadata_store.client import ASYNC_METADATA_STORE_CLIENT
+from backend.rag.parsers.parser import get_chunks_in_executor
+from backend.rag.schemas import DataIngestionRunStatus, DataIngestionMode, LoadedDataPoint, \
+    IngestDataToCollectionDto, CreateDataIngestionRun, DataIngestionRun, DataIngestionRunCheckpoint, DataSource
+from backend.rag.vector_db.base import DataPointVectorBatch
 from backend.rag.vector_db.client import VECTOR_STORE_CLIENT
 from backend.settings import settings
 
+# Limit of concurrent embedding calls of all the data sources ingested by the process
+_EMBEDDING_SEMAPHORE: Optional[asyncio.Semaphore] = None
 
-def get_data_point_fqn_to_hash_map(
-    data_point_vectors: List[DataPointVector],
+
+def get_embedding_semaphore() -> asyncio.Semaphore:
+    """
+    Возвращает семафор, ограничивающий число одновременных вычислений embeddings в процессе
+    """
+    global _EMBEDDING_SEMAPHORE
+    if _EMBEDDING_SEMAPHORE is None:
+        _EMBEDDING_SEMAPHORE = asyncio.Semaphore(settings.INGESTION_EMBED_CONCURRENCY)
+    return _EMBEDDING_SEMAPHORE
+
+
+async def get_data_point_fqn_to_hash_map(
+    data_point_vector_batches: AsyncIterable[DataPointVectorBatch],
     ) -> Dict[str, str]:
     """
-    Возвращает отображение из точки данных в hash
+    Возвращает отображение из точки данных в hash, батчи векторов обрабатываются по одному
     """
     data_point_fqn_to_hash: Dict[str, str] = {}
-    for data_point_vector in data_point_vectors:
-        if data_point_vector.data_point_fqn not in data_point_fqn_to_hash:
-            data_point_fqn_to_hash[data_point_vector.data_point_fqn] = data_point_vector.data_point_hash
+    async for batch in data_point_vector_batches:
+        for data_point_fqn, data_point_hash in zip(batch.data_point_fqns, batch.data_point_hashes):
+            if data_point_fqn not in data_point_fqn_to_hash:
+                data_point_fqn_to_hash[data_point_fqn] = data_point_hash
 
     return data_point_fqn_to_hash
 
@@ -41,8 +65,13 @@ async def sync_data_source_to_collection(inputs: DataIngestionConfig):
     4. Обновляет статус выполнения приема данных, чтобы показать, что прием данных начался
     5. Вызывает функцию _sync_data_source_to_collection для приема данных
     6. Обновляет статус выполнения приема данных, чтобы указать на завершение приема данных
-    7. Если для приема данных выбран режим FULL, устаревшие векторы точек данных удаляются из vectorstore
+    7. Если для приема данных выбран режим FULL, векторы точек данных, которых больше нет в источнике,
+       удаляются из vectorstore
     8. Обновляет статус выполнения приема данных, чтобы указать на завершение очистки данных.
+    9. Увеличивает поколение коллекции, чтобы закэшированные ответы по старым данным не возвращались.
+    После каждого записанного батча сохраняется checkpoint. Если checkpoint задачи уже есть
+    (повтор через resume или повторная доставка задачи celery), точки данных из него
+    с тем же hash не загружаются повторно. Checkpoint удаляется после успешного завершения.
     Args:
         inputs (DataIngestionConfig): Конфигурация приема данных
     Raises:
@@ -50,89 +79,198 @@ async def sync_data_source_to_collection(inputs: DataIngestionConfig):
     Returns:
         None
     """
-    METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+    await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
         data_ingestion_run_name=inputs.data_ingestion_run_name,
         status=DataIngestionRunStatus.FETCHING_EXISTING_VECTORS,
     )
     try:
-        existing_data_point_vectors = VECTOR_STORE_CLIENT.list_data_point_vectors(
-            collection_name=inputs.collection_name,
-            data_source_fqn=inputs.data_source.fqn,
-        )
-        previous_snapshot = get_data_point_fqn_to_hash_map(
-            data_point_vectors=existing_data_point_vectors
+        previous_snapshot = await get_data_point_fqn_to_hash_map(
+            VECTOR_STORE_CLIENT.aiter_data_point_vectors(
+                collection_name=inputs.collection_name,
+                data_source_fqn=inputs.data_source.fqn,
+            )
         )
 
         logger.info(
-            f"Total existing data point vectors in collection {inputs.collection_name}: {len(existing_data_point_vectors)}"
+            f"Total existing data points in collection {inputs.collection_name}: {len(previous_snapshot)}"
         )
     except Exception as e:
         logger.exception(e)
-        METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+        await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
             data_ingestion_run_name=inputs.data_ingestion_run_name,
             status=DataIngestionRunStatus.FETCHING_EXISTING_VECTORS_FAILED,
         )
         raise e
-    METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+    # New runs get a new name, a checkpoint only exists for a resumed or redelivered run
+    checkpoint = await ASYNC_METADATA_STORE_CLIENT.get_data_ingestion_run_checkpoint(
+        inputs.data_ingestion_run_name
+    )
+    if checkpoint is not None:
+        logger.info(
+            f"Resuming data ingestion run {inputs.data_ingestion_run_name} after batch {checkpoint.last_batch}, "
+            f"{len(checkpoint.data_point_hashes)} data points already ingested"
+        )
+    await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
         data_ingestion_run_name=inputs.data_ingestion_run_name,
         status=DataIngestionRunStatus.DATA_INGESTION_STARTED,
     )
     try:
-        await _sync_data_source_to_collection(
+        ingested_data_point_fqns = await _sync_data_source_to_collection(
             inputs=inputs,
             previous_snapshot=previous_snapshot,
+            checkpoint=checkpoint,
         )
     except Exception as e:
         logger.exception(e)
-        METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+        await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
             data_ingestion_run_name=inputs.data_ingestion_run_name,
             status=DataIngestionRunStatus.DATA_INGESTION_FAILED,
         )
+        # Batches upserted before the failure, even one cancelled in flight, are already searchable
+        await abump_collection_generation(inputs.collection_name)
         raise e
-    METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+    await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
         data_ingestion_run_name=inputs.data_ingestion_run_name,
         status=DataIngestionRunStatus.DATA_INGESTION_COMPLETED,
     )
     # Delete the outdated data point vectors from the vector store
     if inputs.data_ingestion_mode == DataIngestionMode.FULL:
-        METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+        await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
             data_ingestion_run_name=inputs.data_ingestion_run_name,
             status=DataIngestionRunStatus.DATA_CLEANUP_STARTED,
         )
         try:
-            VECTOR_STORE_CLIENT.delete_data_point_vectors(
+            # Re-ingested data points were overwritten in place,
+            # only the vectors of data points missing from the source are left
+            deleted_data_point_fqns = [
+                data_point_fqn
+                for data_point_fqn in previous_snapshot
+                if data_point_fqn not in ingested_data_point_fqns
+            ]
+            await asyncio.to_thread(
+                VECTOR_STORE_CLIENT.delete_documents,
                 collection_name=inputs.collection_name,
-                data_point_vectors=existing_data_point_vectors,
+                document_ids=deleted_data_point_fqns,
             )
+            bm25_index = get_bm25_index()
+            if bm25_index is not None:
+                await asyncio.to_thread(
+                    bm25_index.delete_data_points, inputs.collection_name, deleted_data_point_fqns
+                )
         except Exception as e:
             logger.exception(e)
-            METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+            await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
                 data_ingestion_run_name=inputs.data_ingestion_run_name,
                 status=DataIngestionRunStatus.DATA_CLEANUP_FAILED,
             )
+            await abump_collection_generation(inputs.collection_name)
             raise e
-    METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+    await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
         data_ingestion_run_name=inputs.data_ingestion_run_name,
         status=DataIngestionRunStatus.COMPLETED,
     )
+    await ASYNC_METADATA_STORE_CLIENT.delete_data_ingestion_run_checkpoint(inputs.data_ingestion_run_name)
+    # Cached answers were built from the previous data
+    await abump_collection_generation(inputs.collection_name)
+
+
+class _StageStats:
+    """
+    Счетчики одной стадии конвейера приема данных
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    def add(self, items: int, seconds: float):
+        self.batches += 1
+        self.items += items
+        self.busy_seconds += seconds
+
+    @property
+    def throughput(self) -> float:
+        return round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0
 
 
 async def _sync_data_source_to_collection(
-    inputs: DataIngestionConfig, previous_snapshot: Dict[str, str] = None
-):
+    inputs: DataIngestionConfig,
+    previous_snapshot: Dict[str, str] = None,
+    checkpoint: Optional[DataIngestionRunCheckpoint] = None,
+) -> Set[str]:
     """
     Синхронизирует данные из источника данных с коллекцией.
+    Прием данных выполняется конвейером из четырех стадий, которые работают одновременно:
+    загрузка -> парсинг -> вычисление embeddings -> запись в векторную БД.
+    Стадии связаны ограниченными очередями, поэтому быстрая стадия ждет медленную (backpressure).
     Args:
         inputs (DataIngestionConfig): Конфигурация для приема данных
         previous_snapshot (Dict[str, str], optional): Словарь сопоставляющий полные имена точек данных с их хэшами.
+        checkpoint (DataIngestionRunCheckpoint, optional): Checkpoint прерванной задачи,
+            ее точки данных пропускаются и считаются принятыми
     Raises:
         Exception: Если не удалось принять какие-либо точки данных
     Returns:
-        None
+        Set[str]: Полные имена принятых точек данных
     """
 
     failed_data_point_fqns = []
-    documents_ingested_count = 0
+    checkpoint = checkpoint or DataIngestionRunCheckpoint(data_ingestion_run_name=inputs.data_ingestion_run_name)
+    ingested_data_point_fqns: Set[str] = set(checkpoint.data_point_hashes)
+    documents_ingested_count = checkpoint.counters.get("documents_ingested_count", 0)
+    embeddings = get_cached_embedder(
+        embedder_config=inputs.embedder_config,
+    )
+    # Other data sources may be ingested at the same time, the budget bounds the share of this one
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=inputs.budget.queue_size)
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=inputs.budget.queue_size)
+    upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=inputs.budget.queue_size)
+    parse_semaphore = asyncio.Semaphore(inputs.budget.max_parse_tasks)
+    stats = {name: _StageStats(name) for name in ("load", "parse", "embed", "upsert")}
+
+    def handle_failure(loaded_data_points_batch: List[LoadedDataPoint], e: Exception):
+        logger.exception(e)
+        if inputs.raise_error_on_failure:
+            raise e
+        failed_data_point_fqns.extend(
+            [doc.data_point_fqn for doc in loaded_data_points_batch]
+        )
+
+    async def log_pipeline_metrics():
+        metric_dict = {
+            "documents_ingested_count": documents_ingested_count,
+            "parse_queue_depth": parse_queue.qsize(),
+            "embed_queue_depth": embed_queue.qsize(),
+            "upsert_queue_depth": upsert_queue.qsize(),
+        }
+        for stage in stats.values():
+            metric_dict[f"{stage.name}_items_per_sec"] = stage.throughput
+        # Counters of this run only, other runs share the embedding store
+        if isinstance(embeddings, CachedEmbeddings):
+            metric_dict.update(embeddings.stats())
+        await ASYNC_METADATA_STORE_CLIENT.log_metrics_for_data_ingestion_run(
+            data_ingestion_run_name=inputs.data_ingestion_run_name,
+            metric_dict=metric_dict,
+            step=stats["upsert"].batches,
+        )
+
+    async def save_checkpoint(loaded_data_points_batch: List[LoadedDataPoint], documents: List[Document]):
+        # Only data points with chunks, the cleanup of FULL mode deletes the vectors of the others
+        upserted_data_point_fqns = {document.metadata[DATA_POINT_FQN_METADATA_KEY] for document in documents}
+        checkpoint.last_batch += 1
+        await ASYNC_METADATA_STORE_CLIENT.save_data_ingestion_run_checkpoint(
+            data_ingestion_run_name=inputs.data_ingestion_run_name,
+            last_batch=checkpoint.last_batch,
+            data_point_hashes={
+                loaded_data_point.data_point_fqn: loaded_data_point.data_point_hash
+                for loaded_data_point in loaded_data_points_batch
+                if loaded_data_point.data_point_fqn in upserted_data_point_fqns
+            },
+            counters={"documents_ingested_count": documents_ingested_count},
+        )
+
     # Create a temp dir to store the data
     with tempfile.TemporaryDirectory() as tmpdirname:
         # Load the data from the source to the dest dir
@@ -146,83 +284,166 @@ async def _sync_data_source_to_collection(
             data_ingestion_mode=inputs.data_ingestion_mode,
         )
 
-        for loaded_data_points_batch in loaded_data_points_batch_iterator:
-            try:
-                await ingest_data_points(
-                    inputs=inputs,
-                    loaded_data_points=loaded_data_points_batch,
-                    documents_ingested_count=documents_ingested_count,
+        async def load_stage():
+            while True:
+                start = time.perf_counter()
+                # Loaders are blocking generators, so they are advanced in a thread
+                loaded_data_points_batch = await asyncio.to_thread(
+                    next, loaded_data_points_batch_iterator, None
+                )
+                if loaded_data_points_batch is None:
+                    break
+                # Data points ingested before the run was interrupted
+                loaded_data_points_batch = [
+                    loaded_data_point for loaded_data_point in loaded_data_points_batch
+                    if checkpoint.data_point_hashes.get(loaded_data_point.data_point_fqn)
+                    != loaded_data_point.data_point_hash
+                ]
+                if not loaded_data_points_batch:
+                    continue
+                stats["load"].add(len(loaded_data_points_batch), time.perf_counter() - start)
+                # Loaders reuse the yielded list, so a copy is passed downstream
+                await parse_queue.put(list(loaded_data_points_batch))
+            await parse_queue.put(None)
+
+        async def parse_stage():
+            nonlocal documents_ingested_count
+            while (loaded_data_points_batch := await parse_queue.get()) is not None:
+                start = time.perf_counter()
+                try:
+                    documents = await parse_data_points(
+                        inputs=inputs,
+                        loaded_data_points=loaded_data_points_batch,
+                        documents_ingested_count=documents_ingested_count,
+                        parse_semaphore=parse_semaphore,
+                    )
+                except Exception as e:
+                    handle_failure(loaded_data_points_batch, e)
+                    continue
+                stats["parse"].add(len(loaded_data_points_batch), time.perf_counter() - start)
+                await embed_queue.put((loaded_data_points_batch, documents))
+            await embed_queue.put(None)
+
+        async def embed_stage():
+            while (item := await embed_queue.get()) is not None:
+                loaded_data_points_batch, documents = item
+                start = time.perf_counter()
+                try:
+                    async with get_embedding_semaphore():
+                        vectors = np.asarray(await asyncio.to_thread(
+                            embeddings.embed_documents,
+                            [document.page_content for document in documents],
+                        ), dtype=np.float32) if documents else None
+                except Exception as e:
+                    handle_failure(loaded_data_points_batch, e)
+                    continue
+                stats["embed"].add(len(documents), time.perf_counter() - start)
+                await upsert_queue.put((loaded_data_points_batch, documents, vectors))
+            await upsert_queue.put(None)
+
+        async def upsert_stage():
+            nonlocal documents_ingested_count
+            while (item := await upsert_queue.get()) is not None:
+                loaded_data_points_batch, documents, vectors = item
+                start = time.perf_counter()
+                try:
+                    await ingest_data_points(
+                        inputs=inputs,
+                        documents=documents,
+                        vectors=vectors,
+                        documents_ingested_count=documents_ingested_count,
+                    )
+                except Exception as e:
+                    handle_failure(loaded_data_points_batch, e)
+                    continue
+                stats["upsert"].add(len(documents), time.perf_counter() - start)
+                ingested_data_point_fqns.update(
+                    document.metadata[DATA_POINT_FQN_METADATA_KEY] for document in documents
                 )
                 documents_ingested_count = documents_ingested_count + len(
                     loaded_data_points_batch
                 )
-            except Exception as e:
-                logger.exception(e)
-                if inputs.raise_error_on_failure:
-                    raise e
-                failed_data_point_fqns.extend(
-                    [doc.data_point_fqn for doc in loaded_data_points_batch]
-                )
+                await save_checkpoint(loaded_data_points_batch, documents)
+                await log_pipeline_metrics()
+
+        tasks = [
+            asyncio.create_task(load_stage()),
+            asyncio.create_task(parse_stage()),
+            asyncio.create_task(embed_stage()),
+            asyncio.create_task(upsert_stage()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        # Batches are upserted without waiting, confirm the collection once per run
+        if stats["upsert"].batches:
+            await VECTOR_STORE_CLIENT.await_for_pending_updates(
+                collection_name=inputs.collection_name,
+            )
 
         if len(failed_data_point_fqns) > 0:
             logger.error(
                 f"Failed to ingest {len(failed_data_point_fqns)} data points. data point fqns:"
             )
             logger.error(failed_data_point_fqns)
-            METADATA_STORE_CLIENT.log_errors_for_data_ingestion_run(
+            await ASYNC_METADATA_STORE_CLIENT.log_errors_for_data_ingestion_run(
                 data_ingestion_run_name=inputs.data_ingestion_run_name,
                 errors={"failed_data_point_fqns": failed_data_point_fqns},
             )
             raise Exception(
                 f"Failed to ingest {len(failed_data_point_fqns)} data points"
             )
+        return ingested_data_point_fqns
 
 
-async def ingest_data_points(inputs: DataIngestionConfig,
-                             loaded_data_points: List[LoadedDataPoint],
-                             documents_ingested_count: int):
+async def parse_data_points(inputs: DataIngestionConfig,
+                            loaded_data_points: List[LoadedDataPoint],
+                            documents_ingested_count: int,
+                            parse_semaphore: Optional[asyncio.Semaphore] = None) -> List[Document]:
     """
-    Принимает точки данных в векторное хранилище для данного батча.
+    Разбивает загруженные точки данных на chunk'и и добавляет в них метаданные точки данных.
     Args:
         inputs (DataIngestionConfig): Конфигурация приема данных
-        loaded_data_points (List[LoadedDataPoint]): Список загруженных точек данных для приема
+        loaded_data_points (List[LoadedDataPoint]): Список загруженных точек данных
         documents_ingested_count (int): Количество уже принятых документов
+        parse_semaphore (asyncio.Semaphore, optional): Ограничивает число файлов источника,
+            одновременно отправленных в пул парсеров
     Returns:
-        None: Если в данном пакете не найдены документы для индексации.
-    Raises:
-        None
+        List[Document]: chunk'и всех точек данных батча
     """
-
-    embeddings = get_embedder(
-        embedder_config=inputs.embedder_config,
-    )
     documents_to_be_upserted = []
     logger.info(
         f"Processing {len(loaded_data_points)} new documents and completed: {documents_ingested_count}"
     )
-    for index, loaded_data_point in enumerate(loaded_data_points):
-        logger.info(
-            f"[{index+1}/{len(loaded_data_points)}/{documents_ingested_count}] Parsing [{index+1}/{len(loaded_data_points)}] new document"
-        )
-        # Get parser for required file extension
-        parser = get_parser_for_extension(
-            file_extension=loaded_data_point.file_extension,
-            parsers_map=inputs.parser_config.parse_map,
-            max_chunk_size=inputs.parser_config.chunk_size,
-            chunk_overlap=inputs.parser_config.chunk_overlap,
-        )
-        if parser is None:
+    parse_semaphore = parse_semaphore or asyncio.Semaphore(len(loaded_data_points) or 1)
+
+    async def get_chunks(loaded_data_point: LoadedDataPoint):
+        async with parse_semaphore:
+            return await get_chunks_in_executor(
+                file_extension=loaded_data_point.file_extension,
+                parsers_map=inputs.parser_config.parse_map,
+                filepath=loaded_data_point.local_filepath,
+                metadata=loaded_data_point.metadata,
+                max_chunk_size=inputs.parser_config.chunk_size,
+                chunk_overlap=inputs.parser_config.chunk_overlap,
+            )
+
+    # Parse the data points of the batch concurrently in the parser pool
+    chunks_per_data_point = await asyncio.gather(*[
+        get_chunks(loaded_data_point) for loaded_data_point in loaded_data_points
+    ])
+    for loaded_data_point, chunks in zip(loaded_data_points, chunks_per_data_point):
+        if chunks is None:
             logger.warning(
                 f"Could not parse data point {loaded_data_point.data_point_fqn} as no parser found for file extension: {loaded_data_point.file_extension}"
             )
             continue
-        # chunk the given document
-        chunks = await parser.get_chunks(
-            filepath=loaded_data_point.local_filepath,
-            metadata=loaded_data_point.metadata,
-        )
         # Update data source metadata
-        for chunk in chunks:
+        for chunk_index, chunk in enumerate(chunks):
             if loaded_data_point.metadata:
                 chunk.metadata.update(loaded_data_point.metadata)
             # Most importantly, update the metadata with data point fqn and hash
@@ -230,51 +451,225 @@ async def ingest_data_points(inputs: DataIngestionConfig,
                 {
                     f"{DATA_POINT_FQN_METADATA_KEY}": loaded_data_point.data_point_fqn,
                     f"{DATA_POINT_HASH_METADATA_KEY}": loaded_data_point.data_point_hash,
+                    # Used to list the vectors of a data source by a keyword index
+                    f"{DATA_SOURCE_FQN_METADATA_KEY}": loaded_data_point.data_source_fqn,
+                    # Used for deterministic vector IDs
+                    f"{DATA_POINT_CHUNK_INDEX_METADATA_KEY}": chunk_index,
                 }
             )
             documents_to_be_upserted.append(chunk)
         logger.info("%s -> %s chunks", loaded_data_point.local_filepath, len(chunks))
 
-        # delete the file from temp dir after processing
+        # delete the file from temp dir after processing, original files are kept
         try:
-            if loaded_data_point.local_filepath:
+            if loaded_data_point.local_filepath and loaded_data_point.delete_after_processing:
                 os.remove(loaded_data_point.local_filepath)
-                print(
-                    f"Processing done! Deleting file {loaded_data_point.local_filepath}"
-                )
                 logger.debug(
                     f"Processing done! Deleting file {loaded_data_point.local_filepath}"
                 )
         except Exception as e:
-            print(
-                f"Failed to delete file {loaded_data_point.local_filepath} after processing. Error: {e}"
-            )
-            logger.error(
+            logger.exception(
                 f"Failed to delete file {loaded_data_point.local_filepath} after processing. Error: {e}"
             )
+    return documents_to_be_upserted
+
 
-    docs_to_index_count = len(documents_to_be_upserted)
+async def ingest_data_points(inputs: DataIngestionConfig,
+                             documents: List[Document],
+                             vectors: np.ndarray,
+                             documents_ingested_count: int):
+    """
+    Принимает chunk'и с уже вычисленными векторами в векторное хранилище для данного батча
+    и добавляет их в индекс BM25.
+    Args:
+        inputs (DataIngestionConfig): Конфигурация приема данных
+        documents (List[Document]): chunk'и точек данных батча
+        vectors (np.ndarray): Векторы chunk'ов, shape (len(documents), dim)
+        documents_ingested_count (int): Количество уже принятых документов
+    Returns:
+        None: Если в данном пакете не найдены документы для индексации.
+    Raises:
+        None
+    """
+    docs_to_index_count = len(documents)
     if docs_to_index_count == 0:
         logger.warning(
             "No documents found to index in given batch. Moving to next batch..."
         )
         return
     logger.info(
-        f"Upserting {docs_to_index_count} documents to vector store for given batch"
+        f"Upserting {docs_to_index_count} documents to vector store for given batch, completed: {documents_ingested_count}"
     )
     # Upserted all the documents_to_be_ingested
-    VECTOR_STORE_CLIENT.upsert_documents(
+    await VECTOR_STORE_CLIENT.aupsert_documents(
         collection_name=inputs.collection_name,
-        documents=documents_to_be_upserted,
-        embeddings=embeddings,
+        documents=documents,
+        embeddings=get_cached_embedder(inputs.embedder_config),
         incremental=inputs.data_ingestion_mode == DataIngestionMode.INCREMENTAL,
+        vectors=vectors,
+        # Consistency is checked once at the end of the run
+        wait=False,
+    )
+    # The BM25 index of the hybrid retriever, chunks of re-ingested data points are replaced
+    bm25_index = get_bm25_index()
+    if bm25_index is not None:
+        await asyncio.to_thread(bm25_index.add_documents, inputs.collection_name, documents)
+
+
+FAILED_DATA_INGESTION_RUN_STATUSES = {
+    DataIngestionRunStatus.FETCHING_EXISTING_VECTORS_FAILED,
+    DataIngestionRunStatus.DATA_INGESTION_FAILED,
+    DataIngestionRunStatus.DATA_CLEANUP_FAILED,
+    DataIngestionRunStatus.ERROR,
+}
+
+
+def is_stale_data_ingestion_run(data_ingestion_run: DataIngestionRun) -> bool:
+    """
+    Незавершенная задача, статус и прогресс которой не обновлялись дольше INGESTION_RUN_STALE_SEC:
+    ее воркер остановлен, а задача не будет продолжена сама
+    """
+    if data_ingestion_run.status in FAILED_DATA_INGESTION_RUN_STATUSES or \
+            data_ingestion_run.status == DataIngestionRunStatus.COMPLETED:
+        return False
+    updated_at = data_ingestion_run.updated_at or data_ingestion_run.created_at or 0
+    return time.time() - updated_at > settings.INGESTION_RUN_STALE_SEC
+
+
+async def get_collection_ingestion_progress(collection_name: str) -> dict:
+    """
+    Сводный прогресс приема данных коллекции по последним задачам каждого источника данных
+    Args:
+        collection_name (str): Имя коллекции
+    Returns:
+        dict: Общий статус, число активных задач, сумма принятых точек данных и прогресс по источникам
+    """
+    data_ingestion_runs = await ASYNC_METADATA_STORE_CLIENT.get_data_ingestion_runs(collection_name)
+    latest_runs: Dict[str, DataIngestionRun] = {}
+    for data_ingestion_run in data_ingestion_runs:
+        latest_run = latest_runs.get(data_ingestion_run.data_source_fqn)
+        if latest_run is None or (data_ingestion_run.created_at or 0) >= (latest_run.created_at or 0):
+            latest_runs[data_ingestion_run.data_source_fqn] = data_ingestion_run
+
+    statuses = [data_ingestion_run.status for data_ingestion_run in latest_runs.values()]
+    active_runs = sum(
+        status not in FAILED_DATA_INGESTION_RUN_STATUSES and status != DataIngestionRunStatus.COMPLETED
+        for status in statuses
+    )
+    if not statuses:
+        status = "NOT_STARTED"
+    elif active_runs:
+        status = "IN_PROGRESS"
+    elif any(status in FAILED_DATA_INGESTION_RUN_STATUSES for status in statuses):
+        status = "FAILED"
+    else:
+        status = "COMPLETED"
+    return {
+        "collection_name": collection_name,
+        "status": status,
+        "active_runs": active_runs,
+        "documents_ingested_count": sum(
+            (data_ingestion_run.metrics or {}).get("documents_ingested_count", 0)
+            for data_ingestion_run in latest_runs.values()
+        ),
+        "data_sources": [
+            {
+                "data_source_fqn": data_source_fqn,
+                "data_ingestion_run_name": data_ingestion_run.name,
+                "status": data_ingestion_run.status.value if data_ingestion_run.status else None,
+                "progress": data_ingestion_run.metrics or {},
+            }
+            for data_source_fqn, data_ingestion_run in latest_runs.items()
+        ],
+    }
+
+
+def get_ingestion_budget(data_source: DataSource) -> IngestionBudget:
+    """
+    Возвращает бюджет источника данных из `ingestion_budget` в его метаданных
+    """
+    try:
+        return IngestionBudget(**((data_source.metadata or {}).get("ingestion_budget") or {}))
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid ingestion_budget of data source {data_source.fqn}: {e}",
+        )
+
+
+async def resume_data_ingestion_run(data_ingestion_run_name: str) -> JSONResponse:
+    """
+    Ставит прерванную задачу приема данных в очередь повторно. Задача продолжается с checkpoint:
+    точки данных, уже записанные в векторную БД, не парсятся и не векторизуются заново.
+    Кроме упавших задач продолжаются незавершенные задачи без обновлений дольше INGESTION_RUN_STALE_SEC,
+    например, оставшиеся после перезапуска процесса с очередью в памяти.
+    Args:
+        data_ingestion_run_name (str): Имя задачи в статусе *_FAILED или ERROR, либо зависшей задачи
+    Returns:
+        JSONResponse: 202, если задача поставлена в очередь
+    """
+    data_ingestion_run = await ASYNC_METADATA_STORE_CLIENT.get_data_ingestion_run(
+        data_ingestion_run_name, no_cache=True
+    )
+    if data_ingestion_run is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Data ingestion run {data_ingestion_run_name} not found",
+        )
+    if data_ingestion_run.status not in FAILED_DATA_INGESTION_RUN_STATUSES and not is_stale_data_ingestion_run(
+            data_ingestion_run
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Data ingestion run {data_ingestion_run_name} in {data_ingestion_run.status.value}, "
+                   f"only failed runs and runs without updates for {settings.INGESTION_RUN_STALE_SEC} s "
+                   f"can be resumed",
+        )
+    collection = await ASYNC_METADATA_STORE_CLIENT.get_collection_by_name(
+        data_ingestion_run.collection_name, no_cache=True
+    )
+    associated_data_source = (
+        collection.associated_data_sources.get(data_ingestion_run.data_source_fqn) if collection else None
+    )
+    if associated_data_source is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Data source {data_ingestion_run.data_source_fqn} is not associated "
+                   f"with collection {data_ingestion_run.collection_name}.",
+        )
+    budget = get_ingestion_budget(associated_data_source.data_source)
+    await ASYNC_METADATA_STORE_CLIENT.update_data_ingestion_run_status(
+        data_ingestion_run_name=data_ingestion_run_name,
+        status=DataIngestionRunStatus.INITIALIZED,
+    )
+    inputs = DataIngestionConfig(
+        collection_name=data_ingestion_run.collection_name,
+        data_ingestion_run_name=data_ingestion_run_name,
+        data_source=associated_data_source.data_source,
+        embedder_config=collection.embedder_config,
+        parser_config=data_ingestion_run.parser_config,
+        data_ingestion_mode=data_ingestion_run.data_ingestion_mode,
+        raise_error_on_failure=data_ingestion_run.raise_error_on_failure,
+        budget=budget,
+    )
+    if budget.batch_size:
+        inputs.batch_size = budget.batch_size
+    await JOB_QUEUE.enqueue(inputs)
+    return JSONResponse(
+        status_code=202,
+        content={"message": "queued", "data_ingestion_run_names": [data_ingestion_run_name]},
     )
 
 
 async def ingest_data(request: IngestDataToCollectionDto):
-    """Прием данных в коллекцию"""
+    """
+    Создает задачи приема данных для источников коллекции и ставит их в очередь,
+    источники принимаются параллельно (до INGESTION_WORKERS одновременно), каждый в пределах своего IngestionBudget.
+    Статус и прогресс задач: /collections/data_ingestion_runs/{name}/status,
+    сводный по коллекции: /collections/{collection_name}/ingestion_progress
+    """
     try:
-        collection = METADATA_STORE_CLIENT.get_collection_by_name(
+        collection = await ASYNC_METADATA_STORE_CLIENT.get_collection_by_name(
             collection_name=request.collection_name, no_cache=True
         )
         if not collection:
@@ -295,6 +690,12 @@ async def ingest_data(request: IngestDataToCollectionDto):
                 detail=f"Collection {request.collection_name} does not have any associated data sources.",
             )
         if request.data_source_fqn:
+            if request.data_source_fqn not in collection.associated_data_sources:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Data source {request.data_source_fqn} is not associated "
+                           f"with collection {request.collection_name}.",
+                )
             associated_data_sources_to_be_ingested = [
                 collection.associated_data_sources.get(request.data_source_fqn)
             ]
@@ -303,9 +704,10 @@ async def ingest_data(request: IngestDataToCollectionDto):
                 collection.associated_data_sources.values()
             )
 
+        data_ingestion_run_names = []
         for associated_data_source in associated_data_sources_to_be_ingested:
             logger.debug(
-                f"Starting ingestion for data source fqn: {associated_data_source.data_source_fqn}"
+                f"Queueing ingestion for data source fqn: {associated_data_source.data_source_fqn}"
             )
             data_ingestion_run = CreateDataIngestionRun(
                 collection_name=collection.name,
@@ -315,13 +717,14 @@ async def ingest_data(request: IngestDataToCollectionDto):
                 data_ingestion_mode=request.data_ingestion_mode,
                 raise_error_on_failure=request.raise_error_on_failure,
             )
+            budget = get_ingestion_budget(associated_data_source.data_source)
             created_data_ingestion_run = (
-                METADATA_STORE_CLIENT.create_data_ingestion_run(
+                await ASYNC_METADATA_STORE_CLIENT.create_data_ingestion_run(
                     data_ingestion_run=data_ingestion_run
                 )
             )
-            await sync_data_source_to_collection(
-                inputs=DataIngestionConfig(
+            await JOB_QUEUE.enqueue(
+                DataIngestionConfig(
                     collection_name=created_data_ingestion_run.collection_name,
                     data_ingestion_run_name=created_data_ingestion_run.name,
                     data_source=associated_data_source.data_source,
@@ -329,12 +732,14 @@ async def ingest_data(request: IngestDataToCollectionDto):
                     parser_config=created_data_ingestion_run.parser_config,
                     data_ingestion_mode=created_data_ingestion_run.data_ingestion_mode,
                     raise_error_on_failure=created_data_ingestion_run.raise_error_on_failure,
+                    batch_size=budget.batch_size or request.batch_size,
+                    budget=budget,
                 )
             )
-            created_data_ingestion_run.status = DataIngestionRunStatus.COMPLETED
+            data_ingestion_run_names.append(created_data_ingestion_run.name)
         return JSONResponse(
-            status_code=201,
-            content={"message": "triggered"},
+            status_code=202,
+            content={"message": "queued", "data_ingestion_run_names": data_ingestion_run_names},
         )
     except HTTPException as exp:
         raise exp
@@ -1,5 +1,27 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 from backend.rag.schemas import DataIngestionMode, DataSource, EmbedderConfig, ParserConfig
+from backend.settings import settings
+
+
+class IngestionBudget(BaseModel):
+    """
+    Ресурсы, которые может занять прием данных одного источника,
+    чтобы одновременно принимаемые источники не вытесняли друг друга
+    """
+    max_parse_tasks: int = Field(
+        title="Files of the data source parsed at once in the shared parser pool",
+        ge=1, default_factory=lambda: settings.INGESTION_SOURCE_MAX_PARSE_TASKS,
+    )
+    queue_size: int = Field(
+        title="Batches buffered between the pipeline stages",
+        ge=1, default_factory=lambda: settings.INGESTION_QUEUE_SIZE,
+    )
+    batch_size: Optional[int] = Field(
+        title="Batch size for indexing, overrides the batch size of the request",
+        ge=1, default=None,
+    )
 
 
 class DataIngestionConfig(BaseModel):
@@ -32,3 +54,7 @@ class DataIngestionConfig(BaseModel):
         title="Batch size for indexing",
         ge=1, default=100,
     )
+    budget: IngestionBudget = Field(
+        title="Resource budget of the data source",
+        default_factory=IngestionBudget,
+    )
@@ -0,0 +1,24 @@
+"""
+Очередь задач приема данных. POST /collections/ingest создает DataIngestionRun и ставит его в очередь,
+задачу выполняет воркер, статус и прогресс доступны по /collections/data_ingestion_runs/{name}/status.
+
+JOB_QUEUE_PROVIDER:
+* "memory" - asyncio воркеры в процессе API (INGESTION_WORKERS штук)
+* "celery" - Redis (REDIS_URL) и отдельные процессы:
+  `celery -A backend.rag.jobs.modules.celery_queue worker --concurrency 2`
+
+API:
+```python
+from backend.rag.jobs.client import JOB_QUEUE
+
+await JOB_QUEUE.start()  # в lifespan
+await JOB_QUEUE.enqueue(data_ingestion_config)
+await JOB_QUEUE.stop()
+```
+"""
+from backend.rag.jobs.queue import BaseJobQueue, register_job_queue, get_job_queue
+from backend.rag.jobs.modules.celery_queue import CeleryJobQueue
+from backend.rag.jobs.modules.memory import InMemoryJobQueue
+
+register_job_queue("memory", InMemoryJobQueue)
+register_job_queue("celery", CeleryJobQueue)
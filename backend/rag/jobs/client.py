@@ -0,0 +1,4 @@
+from backend.rag.jobs import get_job_queue
+from backend.settings import settings
+
+JOB_QUEUE = get_job_queue(provider=settings.JOB_QUEUE_PROVIDER)
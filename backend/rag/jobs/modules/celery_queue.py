@@ -0,0 +1,53 @@
+import asyncio
+
+from celery import Celery
+
+from backend.logger import logger
+from backend.rag.indexer.schemas import DataIngestionConfig
+from backend.rag.jobs.queue import BaseJobQueue
+from backend.settings import settings
+
+# Workers: celery -A backend.rag.jobs.modules.celery_queue worker --concurrency 2
+celery_app = Celery("backend", broker=settings.REDIS_URL)
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    # A job is redelivered if the worker dies while running it
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
+
+
+# One event loop per worker process: the async vector DB and metadata store clients
+# are bound to the loop they were first used in
+_WORKER_LOOP = None
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _WORKER_LOOP
+    if _WORKER_LOOP is None or _WORKER_LOOP.is_closed():
+        _WORKER_LOOP = asyncio.new_event_loop()
+        asyncio.set_event_loop(_WORKER_LOOP)
+    return _WORKER_LOOP
+
+
+@celery_app.task(name="ingest_data_ingestion_run")
+def ingest_data_ingestion_run(inputs: dict) -> None:
+    from backend.rag.indexer.indexer import sync_data_source_to_collection
+
+    inputs = DataIngestionConfig.model_validate(inputs)
+    logger.info(f"[JobQueue] Started data ingestion run {inputs.data_ingestion_run_name}")
+    _get_worker_loop().run_until_complete(sync_data_source_to_collection(inputs))
+
+
+class CeleryJobQueue(BaseJobQueue):
+    """
+    Очередь в Redis (REDIS_URL), задачи выполняют отдельные процессы celery worker.
+    Статусы задач видны API, только если metadata store общий (mongo).
+    """
+
+    async def enqueue(self, inputs: DataIngestionConfig) -> None:
+        # Publishing to the broker is blocking
+        await asyncio.to_thread(
+            ingest_data_ingestion_run.apply_async, args=[inputs.model_dump(mode="json")]
+        )
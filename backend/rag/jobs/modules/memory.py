@@ -0,0 +1,58 @@
+import asyncio
+from typing import List, Optional
+
+from backend.logger import logger
+from backend.rag.indexer.schemas import DataIngestionConfig
+from backend.rag.jobs.queue import BaseJobQueue
+from backend.settings import settings
+
+
+class InMemoryJobQueue(BaseJobQueue):
+    """
+    Очередь в памяти процесса API: задачи выполняют INGESTION_WORKERS asyncio воркеров.
+    Задачи, не выполненные до остановки процесса, теряются. Для разработки, тестов и file metadata store.
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+
+    async def _worker(self, worker_id: int):
+        # Imported here, the indexer enqueues jobs through this module
+        from backend.rag.indexer.indexer import sync_data_source_to_collection
+
+        while True:
+            inputs: DataIngestionConfig = await self.queue.get()
+            logger.info(f"[JobQueue] Worker {worker_id} started data ingestion run {inputs.data_ingestion_run_name}")
+            try:
+                await sync_data_source_to_collection(inputs)
+            except Exception as e:
+                logger.error(f"[JobQueue] Data ingestion run {inputs.data_ingestion_run_name} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self) -> None:
+        if self.workers:
+            return
+        self.queue = self.queue or asyncio.Queue()
+        self.workers = [
+            asyncio.create_task(self._worker(worker_id)) for worker_id in range(settings.INGESTION_WORKERS)
+        ]
+        logger.debug(f"[JobQueue] Started {len(self.workers)} in-memory workers")
+
+    async def enqueue(self, inputs: DataIngestionConfig) -> None:
+        await self.start()
+        await self.queue.put(inputs)
+
+    async def join(self) -> None:
+        """
+        Дожидается выполнения всех поставленных задач
+        """
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
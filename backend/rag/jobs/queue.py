@@ -0,0 +1,64 @@
+from abc import ABC, abstractmethod
+
+from backend.rag.indexer.schemas import DataIngestionConfig
+
+# A global registry to store all available job queues.
+JOB_QUEUE_REGISTRY = {}
+
+
+class BaseJobQueue(ABC):
+    """
+    Очередь задач приема данных. Задача - DataIngestionConfig уже созданного DataIngestionRun,
+    ее статус и прогресс воркер пишет в metadata store.
+    """
+
+    @abstractmethod
+    async def enqueue(self, inputs: DataIngestionConfig) -> None:
+        """
+        Ставит задачу приема данных в очередь
+        """
+        raise NotImplementedError()
+
+    async def start(self) -> None:
+        """
+        Запускает воркеры в текущем процессе (при старте приложения), если они есть
+        """
+        pass
+
+    async def join(self) -> None:
+        """
+        Дожидается выполнения задач воркерами текущего процесса.
+        Задачи внешних воркеров (celery) не ожидаются
+        """
+        pass
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеры текущего процесса
+        """
+        pass
+
+
+def register_job_queue(provider: str, cls) -> None:
+    """
+    Регистрирует очередь задач
+    Args:
+        provider: Ключ в JOB_QUEUE_REGISTRY
+        cls: Класс очереди задач
+    Returns:
+        None
+    """
+    global JOB_QUEUE_REGISTRY
+    if provider in JOB_QUEUE_REGISTRY:
+        raise ValueError(
+            f"Error while registering class {cls.__name__}, already taken by {JOB_QUEUE_REGISTRY[provider].__name__}"
+        )
+    JOB_QUEUE_REGISTRY[provider] = cls
+
+
+def get_job_queue(provider: str) -> BaseJobQueue:
+    global JOB_QUEUE_REGISTRY
+    if provider in JOB_QUEUE_REGISTRY:
+        return JOB_QUEUE_REGISTRY[provider]()
+    else:
+        raise ValueError(f"Unknown job queue provider: {provider}")
@@ -0,0 +1,23 @@
+"""
+Клиенты LLM (`BaseChatModel` из LangChain).
+Клиенты кэшируются на уровне процесса по конфигурации (`LLMConfig` + stream), поэтому HTTP соединения
+и OAuth токен GigaChat переиспользуются между запросами. Число одновременных генераций
+каждого провайдера ограничено `LLM_MAX_CONCURRENT_GENERATIONS`.
+
+API:
+```python
+from backend.rag.llms import get_llm
+from backend.rag.schemas import LLMConfig
+
+llm_config = LLMConfig(name="bambucha/saiga-llama3", provider="ollama", parameters={"temperature": 0.1})
+llm = get_llm(llm_config, stream=False)
+llm.invoke("Привет!")
+# Повторный вызов вернет тот же клиент
+```
+"""
+from backend.rag.llms.llm import register_llm, get_llm, list_llms
+from backend.rag.llms.modules.gigachat import PooledGigaChat
+from backend.rag.llms.modules.ollama import PooledChatOllama, close_ollama_sessions
+
+register_llm("gigachat", PooledGigaChat)
+register_llm("ollama", PooledChatOllama)
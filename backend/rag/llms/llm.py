@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import orjson
+from langchain_core.language_models import BaseChatModel
+
+from backend.logger import logger
+from backend.rag.schemas import LLMConfig, ComponentDto
+from backend.settings import settings
+
+# A global registry to store all available LLM clients.
+LLM_REGISTRY = {}
+
+# A process-wide LRU cache of the LLM clients, so HTTP connection pools
+# and auth tokens live across requests. Key is `provider:sha256(config)`.
+LLM_CACHE: "OrderedDict[str, BaseChatModel]" = OrderedDict()
+_LLM_CACHE_LOCK = threading.Lock()
+
+# Limit of concurrent generations per provider, for async and for sync (thread) calls
+_BACKEND_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+_BACKEND_THREAD_SEMAPHORES: Dict[str, threading.BoundedSemaphore] = {}
+_BACKEND_THREAD_SEMAPHORES_LOCK = threading.Lock()
+
+
+def register_llm(provider: str, cls) -> None:
+    """
+    Регистрирует клиент LLM. Класс должен реализовывать `from_config(llm_config)`;
+    клиенты, у которых потоковая генерация задается при создании, принимают также `stream`
+    Args:
+        provider: Ключ в LLM_REGISTRY
+        cls: Класс клиента LLM
+    Returns:
+        None
+    """
+    global LLM_REGISTRY
+    if provider in LLM_REGISTRY:
+        raise ValueError(
+            f"Error while registering class {cls.__name__}, already taken by {LLM_REGISTRY[provider].__name__}"
+        )
+    LLM_REGISTRY[provider] = cls
+
+
+def get_llm_cache_key(llm_config: LLMConfig, stream: bool = False) -> str:
+    """
+    Возвращает ключ клиента LLM в кэше: provider + hash конфигурации
+    """
+    config_hash = hashlib.sha256(
+        orjson.dumps(
+            {"name": llm_config.name, "parameters": llm_config.parameters or {}, "stream": stream},
+            option=orjson.OPT_SORT_KEYS,
+            default=str,
+        )
+    ).hexdigest()
+    return f"{llm_config.provider}:{config_hash}"
+
+
+def get_backend_semaphore(provider: str) -> asyncio.Semaphore:
+    """
+    Возвращает семафор, ограничивающий число одновременных генераций провайдера
+    """
+    semaphore = _BACKEND_SEMAPHORES.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_GENERATIONS)
+        _BACKEND_SEMAPHORES[provider] = semaphore
+    return semaphore
+
+
+def get_backend_thread_semaphore(provider: str) -> threading.BoundedSemaphore:
+    """
+    Возвращает семафор, ограничивающий число одновременных синхронных генераций провайдера
+    """
+    with _BACKEND_THREAD_SEMAPHORES_LOCK:
+        semaphore = _BACKEND_THREAD_SEMAPHORES.get(provider)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENT_GENERATIONS)
+            _BACKEND_THREAD_SEMAPHORES[provider] = semaphore
+    return semaphore
+
+
+def get_llm(llm_config: LLMConfig, stream: bool = False) -> BaseChatModel:
+    """
+    Возвращает клиент LLM на основании конфигурации.
+    Клиенты кэшируются на уровне процесса и переиспользуются между запросами.
+    Args:
+        llm_config (LLMConfig): Конфигурация
+        stream (bool): Потоковая генерация
+    Returns:
+        BaseChatModel: Клиент LLM
+    """
+    global LLM_REGISTRY
+    if llm_config.provider not in LLM_REGISTRY:
+        raise ValueError(f"No LLM registered with provider {llm_config.provider}")
+    key = get_llm_cache_key(llm_config, stream)
+    with _LLM_CACHE_LOCK:
+        llm = LLM_CACHE.get(key)
+        if llm is not None:
+            LLM_CACHE.move_to_end(key)
+            return llm
+        logger.debug(f"Creating {llm_config.provider} client for model {llm_config.name}")
+        cls = LLM_REGISTRY[llm_config.provider]
+        # Clients like ChatOllama choose streaming per call and take no stream option
+        if "stream" in inspect.signature(cls.from_config).parameters:
+            llm = cls.from_config(llm_config, stream)
+        else:
+            llm = cls.from_config(llm_config)
+        LLM_CACHE[key] = llm
+        while len(LLM_CACHE) > settings.LLM_CACHE_MAX_CLIENTS:
+            evicted_key, _ = LLM_CACHE.popitem(last=False)
+            logger.debug(f"Evicted LLM client {evicted_key} from cache")
+    return llm
+
+
+def list_llms() -> List[ComponentDto]:
+    """
+    Возвращает список всех зарегистрированных клиентов LLM
+    """
+    global LLM_REGISTRY
+    return [
+        ComponentDto(type=provider, class_=cls.__name__, description=(cls.__doc__ or "").strip())
+        for provider, cls in LLM_REGISTRY.items()
+    ]
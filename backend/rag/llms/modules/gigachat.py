@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_community.chat_models import GigaChat
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from backend.logger import logger
+from backend.rag.llms.llm import get_backend_semaphore, get_backend_thread_semaphore
+from backend.rag.schemas import LLMConfig
+from backend.settings import settings
+
+_TOKEN_LOCK = threading.Lock()
+_ATOKEN_LOCK = asyncio.Lock()
+
+
+class PooledGigaChat(GigaChat):
+    """
+    GigaChat, который переиспользует HTTP клиент и OAuth токен между запросами.
+    Токен обновляется заранее, за GIGACHAT_TOKEN_REFRESH_MARGIN_SEC до истечения.
+    """
+
+    @classmethod
+    def from_config(cls, llm_config: LLMConfig, stream: bool = False) -> "PooledGigaChat":
+        parameters = llm_config.parameters or {}
+        return cls(
+            credentials=settings.GIGACHAT_API_KEY,
+            temperature=parameters.get("temperature", 0.1),
+            streaming=stream,
+            verify_ssl_certs=False,
+        )
+
+    def _token_expires_soon(self) -> bool:
+        token = self._client._access_token
+        if token is None:
+            # The first call gets the token itself
+            return False
+        # expires_at is in milliseconds
+        return token.expires_at / 1000 - time.time() < settings.GIGACHAT_TOKEN_REFRESH_MARGIN_SEC
+
+    def _refresh_token(self) -> None:
+        if not self._token_expires_soon():
+            return
+        with _TOKEN_LOCK:
+            if self._token_expires_soon():
+                logger.debug("Refreshing GigaChat token ahead of expiry")
+                self._client._update_token()
+
+    async def _arefresh_token(self) -> None:
+        if not self._token_expires_soon():
+            return
+        async with _ATOKEN_LOCK:
+            if self._token_expires_soon():
+                logger.debug("Refreshing GigaChat token ahead of expiry")
+                await self._client._aupdate_token()
+
+    def _generate(self,
+                  messages: List[BaseMessage],
+                  stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None,
+                  stream: Optional[bool] = None,
+                  **kwargs: Any) -> ChatResult:
+        should_stream = stream if stream is not None else self.streaming
+        if should_stream:
+            # Generated through _stream, which takes the semaphore itself
+            return super()._generate(messages, stop, run_manager, stream, **kwargs)
+        with get_backend_thread_semaphore("gigachat"):
+            self._refresh_token()
+            return super()._generate(messages, stop, run_manager, stream, **kwargs)
+
+    def _stream(self, *args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with get_backend_thread_semaphore("gigachat"):
+            self._refresh_token()
+            yield from super()._stream(*args, **kwargs)
+
+    async def _agenerate(self,
+                         messages: List[BaseMessage],
+                         stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         stream: Optional[bool] = None,
+                         **kwargs: Any) -> ChatResult:
+        should_stream = stream if stream is not None else self.streaming
+        if should_stream:
+            # Generated through _astream, which takes the semaphore itself
+            return await super()._agenerate(messages, stop, run_manager, stream, **kwargs)
+        async with get_backend_semaphore("gigachat"):
+            await self._arefresh_token()
+            return await super()._agenerate(messages, stop, run_manager, stream, **kwargs)
+
+    async def _astream(self, *args: Any, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async with get_backend_semaphore("gigachat"):
+            await self._arefresh_token()
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
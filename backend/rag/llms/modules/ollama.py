@@ -0,0 +1,145 @@
+import asyncio
+import weakref
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import aiohttp
+import requests
+from langchain_community.chat_models.ollama import ChatOllama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+
+from backend.rag.llms.llm import get_backend_semaphore, get_backend_thread_semaphore
+from backend.rag.schemas import LLMConfig
+from backend.settings import settings
+
+DEFAULT_SYSTEM_PROMPT = "Ты — русскоязычный автоматический ассистент. Ты разговариваешь с людьми и помогаешь им."
+
+# HTTP sessions shared by all Ollama clients, so connections are kept alive between requests
+_HTTP_SESSION = requests.Session()
+_AIOHTTP_SESSIONS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _get_aiohttp_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _AIOHTTP_SESSIONS.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.LLM_MAX_CONNECTIONS)
+        )
+        _AIOHTTP_SESSIONS[loop] = session
+    return session
+
+
+async def close_ollama_sessions() -> None:
+    """
+    Закрывает HTTP сессии Ollama (при остановке приложения)
+    """
+    session = _AIOHTTP_SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+    _HTTP_SESSION.close()
+
+
+class PooledChatOllama(ChatOllama):
+    """
+    ChatOllama с общим пулом HTTP соединений и ограничением числа одновременных генераций.
+    langchain-community 0.2.5 не позволяет передать свою HTTP сессию: `_OllamaCommon` создает ее
+    на каждый запрос. Поэтому `_create_stream` / `_acreate_stream` переопределены по коду 0.2.5,
+    и версия закреплена в requirements.txt - при обновлении их нужно сверить с новым `_OllamaCommon`.
+    """
+
+    @classmethod
+    def from_config(cls, llm_config: LLMConfig) -> "PooledChatOllama":
+        parameters = llm_config.parameters or {}
+        return cls(
+            base_url=settings.OLLAMA_URL,
+            model=llm_config.name,
+            temperature=parameters.get("temperature", 0.1),
+            system=DEFAULT_SYSTEM_PROMPT,
+        )
+
+    def _get_request_payload(self, payload: Any, stop: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        # Same request body as `_OllamaCommon._create_stream`
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {
+            "prompt": payload.get("prompt"),
+            "images": payload.get("images", []),
+            **params,
+        }
+
+    def _get_headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            **(self.headers if isinstance(self.headers, dict) else {}),
+        }
+
+    def _create_stream(self,
+                       api_url: str,
+                       payload: Any,
+                       stop: Optional[List[str]] = None,
+                       **kwargs: Any) -> Iterator[str]:
+        request_payload = self._get_request_payload(payload, stop, **kwargs)
+        # A generator, so the semaphore is held until the whole response is read
+        with get_backend_thread_semaphore("ollama"):
+            with _HTTP_SESSION.post(
+                url=api_url,
+                headers=self._get_headers(),
+                json=request_payload,
+                stream=True,
+                timeout=self.timeout,
+            ) as response:
+                response.encoding = "utf-8"
+                if response.status_code != 200:
+                    if response.status_code == 404:
+                        raise OllamaEndpointNotFoundError(
+                            f"Ollama call failed with status code 404. Maybe your model is not found "
+                            f"and you should pull the model with `ollama pull {self.model}`."
+                        )
+                    raise ValueError(
+                        f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+                    )
+                yield from response.iter_lines(decode_unicode=True)
+
+    async def _acreate_stream(self,
+                              api_url: str,
+                              payload: Any,
+                              stop: Optional[List[str]] = None,
+                              **kwargs: Any) -> AsyncIterator[str]:
+        request_payload = self._get_request_payload(payload, stop, **kwargs)
+        async with get_backend_semaphore("ollama"):
+            async with _get_aiohttp_session().post(
+                url=api_url,
+                headers=self._get_headers(),
+                json=request_payload,
+                timeout=aiohttp.ClientTimeout(total=self.timeout) if self.timeout else None,
+            ) as response:
+                if response.status != 200:
+                    if response.status == 404:
+                        raise OllamaEndpointNotFoundError(
+                            "Ollama call failed with status code 404."
+                        )
+                    raise ValueError(
+                        f"Ollama call failed with status code {response.status}. Details: {await response.text()}"
+                    )
+                async for line in response.content:
+                    yield line.decode("utf-8")
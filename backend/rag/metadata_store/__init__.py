@@ -67,8 +67,21 @@ inputs = DataIngestionConfig(
 
 asyncio.run(sync_data_source_to_collection(inputs=inputs))
 ```
+
+Из async кода используется ASYNC_METADATA_STORE_CLIENT с теми же методами (для "mongo" - motor,
+для остальных - синхронный клиент в отдельном потоке):
+```python
+from backend.rag.metadata_store.client import ASYNC_METADATA_STORE_CLIENT
+
+collection = await ASYNC_METADATA_STORE_CLIENT.get_collection_by_name("example")
+```
+
+Оба клиента обернуты в общий кэш (METADATA_CACHE_MAX_ENTRIES, METADATA_CACHE_TTL_SEC):
+`get_collection_by_name` и `get_data_ingestion_run` с `no_cache=False` читают из него,
+изменения коллекций и статусов сбрасывают записи.
 """
-from backend.rag.metadata_store.base import register_metadata_store
+from backend.rag.metadata_store.base import register_metadata_store, register_async_metadata_store
+from backend.rag.metadata_store.modules.async_mongo import AsyncMongoMetadataStore
 from backend.rag.metadata_store.modules.local import LocalMetadataStore
 from backend.rag.metadata_store.modules.mongo import MongoMetadataStore
 from backend.settings import settings
@@ -76,3 +89,4 @@ from backend.settings import settings
 # if settings.LOCAL:
 register_metadata_store("file", LocalMetadataStore)
 register_metadata_store("mongo", MongoMetadataStore)
+register_async_metadata_store("mongo", AsyncMongoMetadataStore)
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List
 
@@ -9,6 +10,7 @@ from backend.rag.schemas import (
     CreateDataIngestionRun,
     CreateDataSource,
     DataIngestionRun,
+    DataIngestionRunCheckpoint,
     DataIngestionRunStatus,
     DataSource,
     MetadataStoreConfig,
@@ -144,6 +146,283 @@ class BaseMetadataStore(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def save_data_ingestion_run_checkpoint(self,
+                                           data_ingestion_run_name: str,
+                                           last_batch: int,
+                                           data_point_hashes: Dict[str, str],
+                                           counters: Dict[str, Any]):
+        """
+        Дописывает в checkpoint задачи приема данных точки данных очередного записанного батча
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_data_ingestion_run_checkpoint(self,
+                                          data_ingestion_run_name: str
+                                          ) -> DataIngestionRunCheckpoint | None:
+        """
+        Возвращает checkpoint задачи приема данных
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        """
+        Удаляет checkpoint задачи приема данных
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_collection_generation(self, collection_name: str) -> int:
+        """
+        Возвращает поколение коллекции, общее для всех процессов. Не кэшируется
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def bump_collection_generation(self, collection_name: str) -> int:
+        """
+        Атомарно увеличивает поколение коллекции и возвращает новое значение.
+        Поколение переживает удаление коллекции, иначе пересозданная коллекция совпала бы со старыми кэшами
+        """
+        raise NotImplementedError()
+
+
+class BaseAsyncMetadataStore(ABC):
+    """
+    Асинхронный metadata store для вызова из event loop: те же методы, что у BaseMetadataStore
+    """
+
+    @abstractmethod
+    async def create_collection(self, collection: CreateCollection) -> Collection:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_collection_by_name(self,
+                                     collection_name: str,
+                                     no_cache: bool = True) -> Collection | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_collections(self) -> List[Collection]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def create_data_source(self, data_source: CreateDataSource) -> DataSource:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_data_source_from_fqn(self, fqn: str) -> DataSource | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_data_sources(self) -> List[DataSource]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def create_data_ingestion_run(self,
+                                        data_ingestion_run: CreateDataIngestionRun
+                                        ) -> DataIngestionRun:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_data_ingestion_run(self,
+                                     data_ingestion_run_name: str,
+                                     no_cache: bool = False
+                                     ) -> DataIngestionRun | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_data_ingestion_runs(self,
+                                      collection_name: str,
+                                      data_source_fqn: str = None
+                                      ) -> List[DataIngestionRun]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete_collection(self, collection_name: str, include_runs=False):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def associate_data_source_with_collection(self,
+                                                    collection_name: str,
+                                                    data_source_association: AssociateDataSourceWithCollection
+                                                    ) -> Collection:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def unassociate_data_source_with_collection(self,
+                                                      collection_name: str,
+                                                      data_source_fqn: str
+                                                      ) -> Collection:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def update_data_ingestion_run_status(self,
+                                               data_ingestion_run_name: str,
+                                               status: DataIngestionRunStatus):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def log_metrics_for_data_ingestion_run(self,
+                                                 data_ingestion_run_name: str,
+                                                 metric_dict: dict[str, int | float],
+                                                 step: int = 0):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def log_errors_for_data_ingestion_run(self,
+                                                data_ingestion_run_name: str,
+                                                errors: Dict[str, Any]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def save_data_ingestion_run_checkpoint(self,
+                                                 data_ingestion_run_name: str,
+                                                 last_batch: int,
+                                                 data_point_hashes: Dict[str, str],
+                                                 counters: Dict[str, Any]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_data_ingestion_run_checkpoint(self,
+                                                data_ingestion_run_name: str
+                                                ) -> DataIngestionRunCheckpoint | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_collection_generation(self, collection_name: str) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def bump_collection_generation(self, collection_name: str) -> int:
+        raise NotImplementedError()
+
+
+class AsyncMetadataStoreAdapter(BaseAsyncMetadataStore):
+    """
+    Асинхронный интерфейс к синхронному metadata store: вызовы выполняются в отдельном потоке.
+    Используется для provider'ов без собственного асинхронного клиента.
+    """
+
+    def __init__(self, metadata_store: BaseMetadataStore):
+        self.metadata_store = metadata_store
+
+    async def create_collection(self, collection: CreateCollection) -> Collection:
+        return await asyncio.to_thread(self.metadata_store.create_collection, collection)
+
+    async def get_collection_by_name(self,
+                                     collection_name: str,
+                                     no_cache: bool = True) -> Collection | None:
+        return await asyncio.to_thread(self.metadata_store.get_collection_by_name, collection_name, no_cache)
+
+    async def get_collections(self) -> List[Collection]:
+        return await asyncio.to_thread(self.metadata_store.get_collections)
+
+    async def create_data_source(self, data_source: CreateDataSource) -> DataSource:
+        return await asyncio.to_thread(self.metadata_store.create_data_source, data_source)
+
+    async def get_data_source_from_fqn(self, fqn: str) -> DataSource | None:
+        return await asyncio.to_thread(self.metadata_store.get_data_source_from_fqn, fqn)
+
+    async def get_data_sources(self) -> List[DataSource]:
+        return await asyncio.to_thread(self.metadata_store.get_data_sources)
+
+    async def create_data_ingestion_run(self,
+                                        data_ingestion_run: CreateDataIngestionRun
+                                        ) -> DataIngestionRun:
+        return await asyncio.to_thread(self.metadata_store.create_data_ingestion_run, data_ingestion_run)
+
+    async def get_data_ingestion_run(self,
+                                     data_ingestion_run_name: str,
+                                     no_cache: bool = False
+                                     ) -> DataIngestionRun | None:
+        return await asyncio.to_thread(
+            self.metadata_store.get_data_ingestion_run, data_ingestion_run_name, no_cache
+        )
+
+    async def get_data_ingestion_runs(self,
+                                      collection_name: str,
+                                      data_source_fqn: str = None
+                                      ) -> List[DataIngestionRun]:
+        return await asyncio.to_thread(
+            self.metadata_store.get_data_ingestion_runs, collection_name, data_source_fqn
+        )
+
+    async def delete_collection(self, collection_name: str, include_runs=False):
+        return await asyncio.to_thread(self.metadata_store.delete_collection, collection_name, include_runs)
+
+    async def associate_data_source_with_collection(self,
+                                                    collection_name: str,
+                                                    data_source_association: AssociateDataSourceWithCollection
+                                                    ) -> Collection:
+        return await asyncio.to_thread(
+            self.metadata_store.associate_data_source_with_collection, collection_name, data_source_association
+        )
+
+    async def unassociate_data_source_with_collection(self,
+                                                      collection_name: str,
+                                                      data_source_fqn: str
+                                                      ) -> Collection:
+        return await asyncio.to_thread(
+            self.metadata_store.unassociate_data_source_with_collection, collection_name, data_source_fqn
+        )
+
+    async def update_data_ingestion_run_status(self,
+                                               data_ingestion_run_name: str,
+                                               status: DataIngestionRunStatus):
+        return await asyncio.to_thread(
+            self.metadata_store.update_data_ingestion_run_status, data_ingestion_run_name, status
+        )
+
+    async def log_metrics_for_data_ingestion_run(self,
+                                                 data_ingestion_run_name: str,
+                                                 metric_dict: dict[str, int | float],
+                                                 step: int = 0):
+        return await asyncio.to_thread(
+            self.metadata_store.log_metrics_for_data_ingestion_run, data_ingestion_run_name, metric_dict, step
+        )
+
+    async def log_errors_for_data_ingestion_run(self,
+                                                data_ingestion_run_name: str,
+                                                errors: Dict[str, Any]):
+        return await asyncio.to_thread(
+            self.metadata_store.log_errors_for_data_ingestion_run, data_ingestion_run_name, errors
+        )
+
+    async def save_data_ingestion_run_checkpoint(self,
+                                                 data_ingestion_run_name: str,
+                                                 last_batch: int,
+                                                 data_point_hashes: Dict[str, str],
+                                                 counters: Dict[str, Any]):
+        return await asyncio.to_thread(
+            self.metadata_store.save_data_ingestion_run_checkpoint,
+            data_ingestion_run_name, last_batch, data_point_hashes, counters,
+        )
+
+    async def get_data_ingestion_run_checkpoint(self,
+                                                data_ingestion_run_name: str
+                                                ) -> DataIngestionRunCheckpoint | None:
+        return await asyncio.to_thread(
+            self.metadata_store.get_data_ingestion_run_checkpoint, data_ingestion_run_name
+        )
+
+    async def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        return await asyncio.to_thread(
+            self.metadata_store.delete_data_ingestion_run_checkpoint, data_ingestion_run_name
+        )
+
+    async def get_collection_generation(self, collection_name: str) -> int:
+        return await asyncio.to_thread(self.metadata_store.get_collection_generation, collection_name)
+
+    async def bump_collection_generation(self, collection_name: str) -> int:
+        return await asyncio.to_thread(self.metadata_store.bump_collection_generation, collection_name)
+
 
 def get_data_source_fqn(data_source: CreateDataSource) -> str:
     return f"{FQN_SEPARATOR}".join([data_source.type, data_source.uri])
@@ -182,3 +461,35 @@ def get_metadata_store_client(config: MetadataStoreConfig) -> BaseMetadataStore:
         return METADATA_STORE_REGISTRY[config.provider](config=config.config)
     else:
         raise ValueError(f"Unknown metadata store type: {config.provider}")
+
+
+# A global registry of metadata stores with a native async client.
+ASYNC_METADATA_STORE_REGISTRY = {}
+
+
+def register_async_metadata_store(provider: str, cls) -> None:
+    """
+    Регистрирует асинхронный metadata store.
+    Args:
+        provider: Тип регистрируемой metadata store
+        cls: Класс асинхронной metadata store
+    Returns:
+        None
+    """
+    global ASYNC_METADATA_STORE_REGISTRY
+    if provider in ASYNC_METADATA_STORE_REGISTRY:
+        raise ValueError(
+            f"Error while registering class {cls.__name__} already taken by {ASYNC_METADATA_STORE_REGISTRY[provider].__name__}"
+        )
+    ASYNC_METADATA_STORE_REGISTRY[provider] = cls
+
+
+def get_async_metadata_store_client(config: MetadataStoreConfig,
+                                    metadata_store: BaseMetadataStore | None = None) -> BaseAsyncMetadataStore:
+    """
+    Возвращает асинхронный metadata store. Если у provider'а нет асинхронного клиента,
+    методы metadata_store (или нового синхронного клиента) выполняются в отдельном потоке.
+    """
+    if config.provider in ASYNC_METADATA_STORE_REGISTRY:
+        return ASYNC_METADATA_STORE_REGISTRY[config.provider](config=config.config)
+    return AsyncMetadataStoreAdapter(metadata_store or get_metadata_store_client(config))
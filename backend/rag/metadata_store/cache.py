@@ -0,0 +1,353 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from backend.logger import logger
+from backend.rag.metadata_store.base import BaseAsyncMetadataStore, BaseMetadataStore
+from backend.rag.schemas import (
+    AssociateDataSourceWithCollection,
+    Collection,
+    CreateCollection,
+    CreateDataIngestionRun,
+    CreateDataSource,
+    DataIngestionRun,
+    DataIngestionRunCheckpoint,
+    DataIngestionRunStatus,
+    DataSource,
+)
+
+# ("collection" | "run", name)
+MetadataCacheKey = Tuple[str, str]
+
+
+class MetadataCache:
+    """
+    LRU/TTL кэш коллекций и задач приема данных.
+    Общий для синхронного и асинхронного клиентов, запись через любой из них сбрасывает запись кэша.
+    В других процессах изменения видны не позже, чем через ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[MetadataCacheKey, Tuple[float, BaseModel]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: MetadataCacheKey) -> Optional[BaseModel]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time() - self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Copies, so callers can not change the cached object
+        return entry[1].model_copy(deep=True)
+
+    def put(self, key: MetadataCacheKey, value: Optional[BaseModel]) -> None:
+        # Missing objects are not cached, they may be created by another process
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: MetadataCacheKey) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_collection(self, collection_name: str, include_runs: bool = False) -> None:
+        with self._lock:
+            self._entries.pop(("collection", collection_name), None)
+            if include_runs:
+                for key in [
+                    key for key, (_, value) in self._entries.items()
+                    if key[0] == "run" and value.collection_name == collection_name
+                ]:
+                    del self._entries[key]
+        logger.debug(f"[Metadata Store] Invalidated cache of collection {collection_name}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"metadata_cache_hits": self.hits, "metadata_cache_misses": self.misses,
+                "metadata_cache_size": len(self._entries)}
+
+
+class CachedMetadataStore(BaseMetadataStore):
+    """
+    Read-through кэш над любым metadata store: get_collection_by_name и get_data_ingestion_run
+    читают из кэша, если no_cache=False. Изменения сбрасывают соответствующие записи.
+    """
+
+    def __init__(self, metadata_store: BaseMetadataStore, cache: MetadataCache):
+        self.metadata_store = metadata_store
+        self.cache = cache
+
+    def create_collection(self, collection: CreateCollection) -> Collection:
+        created_collection = self.metadata_store.create_collection(collection)
+        self.cache.invalidate_collection(collection.name)
+        return created_collection
+
+    def get_collection_by_name(self,
+                               collection_name: str,
+                               no_cache: bool = True) -> Collection | None:
+        key = ("collection", collection_name)
+        if not no_cache:
+            collection = self.cache.get(key)
+            if collection is not None:
+                return collection
+        collection = self.metadata_store.get_collection_by_name(collection_name, no_cache)
+        self.cache.put(key, collection)
+        return collection
+
+    def get_collections(self) -> List[Collection]:
+        return self.metadata_store.get_collections()
+
+    def create_data_source(self, data_source: CreateDataSource) -> DataSource:
+        return self.metadata_store.create_data_source(data_source)
+
+    def get_data_source_from_fqn(self, fqn: str) -> DataSource | None:
+        return self.metadata_store.get_data_source_from_fqn(fqn)
+
+    def get_data_sources(self) -> List[DataSource]:
+        return self.metadata_store.get_data_sources()
+
+    def create_data_ingestion_run(self,
+                                  data_ingestion_run: CreateDataIngestionRun
+                                  ) -> DataIngestionRun:
+        return self.metadata_store.create_data_ingestion_run(data_ingestion_run)
+
+    def get_data_ingestion_run(self,
+                               data_ingestion_run_name: str,
+                               no_cache: bool = False
+                               ) -> DataIngestionRun | None:
+        key = ("run", data_ingestion_run_name)
+        if not no_cache:
+            data_ingestion_run = self.cache.get(key)
+            if data_ingestion_run is not None:
+                return data_ingestion_run
+        data_ingestion_run = self.metadata_store.get_data_ingestion_run(data_ingestion_run_name, no_cache)
+        self.cache.put(key, data_ingestion_run)
+        return data_ingestion_run
+
+    def get_data_ingestion_runs(self,
+                                collection_name: str,
+                                data_source_fqn: str = None
+                                ) -> List[DataIngestionRun]:
+        return self.metadata_store.get_data_ingestion_runs(collection_name, data_source_fqn)
+
+    def delete_collection(self, collection_name: str, include_runs=False):
+        try:
+            return self.metadata_store.delete_collection(collection_name, include_runs)
+        finally:
+            self.cache.invalidate_collection(collection_name, include_runs)
+
+    def associate_data_source_with_collection(self,
+                                              collection_name: str,
+                                              data_source_association: AssociateDataSourceWithCollection
+                                              ) -> Collection:
+        try:
+            return self.metadata_store.associate_data_source_with_collection(
+                collection_name, data_source_association
+            )
+        finally:
+            self.cache.invalidate_collection(collection_name)
+
+    def unassociate_data_source_with_collection(self,
+                                                collection_name: str,
+                                                data_source_fqn: str
+                                                ) -> Collection:
+        try:
+            return self.metadata_store.unassociate_data_source_with_collection(collection_name, data_source_fqn)
+        finally:
+            self.cache.invalidate_collection(collection_name)
+
+    def update_data_ingestion_run_status(self,
+                                         data_ingestion_run_name: str,
+                                         status: DataIngestionRunStatus):
+        try:
+            return self.metadata_store.update_data_ingestion_run_status(data_ingestion_run_name, status)
+        finally:
+            self.cache.invalidate(("run", data_ingestion_run_name))
+
+    def log_metrics_for_data_ingestion_run(self,
+                                           data_ingestion_run_name: str,
+                                           metric_dict: dict[str, int | float],
+                                           step: int = 0):
+        try:
+            return self.metadata_store.log_metrics_for_data_ingestion_run(data_ingestion_run_name, metric_dict, step)
+        finally:
+            self.cache.invalidate(("run", data_ingestion_run_name))
+
+    def log_errors_for_data_ingestion_run(self,
+                                          data_ingestion_run_name: str,
+                                          errors: Dict[str, Any]):
+        return self.metadata_store.log_errors_for_data_ingestion_run(data_ingestion_run_name, errors)
+
+    def save_data_ingestion_run_checkpoint(self,
+                                           data_ingestion_run_name: str,
+                                           last_batch: int,
+                                           data_point_hashes: Dict[str, str],
+                                           counters: Dict[str, Any]):
+        return self.metadata_store.save_data_ingestion_run_checkpoint(
+            data_ingestion_run_name, last_batch, data_point_hashes, counters
+        )
+
+    def get_data_ingestion_run_checkpoint(self,
+                                          data_ingestion_run_name: str
+                                          ) -> DataIngestionRunCheckpoint | None:
+        return self.metadata_store.get_data_ingestion_run_checkpoint(data_ingestion_run_name)
+
+    def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        return self.metadata_store.delete_data_ingestion_run_checkpoint(data_ingestion_run_name)
+
+    # Generations are read on every cache lookup and must never come from this cache
+    def get_collection_generation(self, collection_name: str) -> int:
+        return self.metadata_store.get_collection_generation(collection_name)
+
+    def bump_collection_generation(self, collection_name: str) -> int:
+        return self.metadata_store.bump_collection_generation(collection_name)
+
+
+class AsyncCachedMetadataStore(BaseAsyncMetadataStore):
+    """
+    Асинхронная версия CachedMetadataStore
+    """
+
+    def __init__(self, metadata_store: BaseAsyncMetadataStore, cache: MetadataCache):
+        self.metadata_store = metadata_store
+        self.cache = cache
+
+    async def create_collection(self, collection: CreateCollection) -> Collection:
+        created_collection = await self.metadata_store.create_collection(collection)
+        self.cache.invalidate_collection(collection.name)
+        return created_collection
+
+    async def get_collection_by_name(self,
+                                     collection_name: str,
+                                     no_cache: bool = True) -> Collection | None:
+        key = ("collection", collection_name)
+        if not no_cache:
+            collection = self.cache.get(key)
+            if collection is not None:
+                return collection
+        collection = await self.metadata_store.get_collection_by_name(collection_name, no_cache)
+        self.cache.put(key, collection)
+        return collection
+
+    async def get_collections(self) -> List[Collection]:
+        return await self.metadata_store.get_collections()
+
+    async def create_data_source(self, data_source: CreateDataSource) -> DataSource:
+        return await self.metadata_store.create_data_source(data_source)
+
+    async def get_data_source_from_fqn(self, fqn: str) -> DataSource | None:
+        return await self.metadata_store.get_data_source_from_fqn(fqn)
+
+    async def get_data_sources(self) -> List[DataSource]:
+        return await self.metadata_store.get_data_sources()
+
+    async def create_data_ingestion_run(self,
+                                        data_ingestion_run: CreateDataIngestionRun
+                                        ) -> DataIngestionRun:
+        return await self.metadata_store.create_data_ingestion_run(data_ingestion_run)
+
+    async def get_data_ingestion_run(self,
+                                     data_ingestion_run_name: str,
+                                     no_cache: bool = False
+                                     ) -> DataIngestionRun | None:
+        key = ("run", data_ingestion_run_name)
+        if not no_cache:
+            data_ingestion_run = self.cache.get(key)
+            if data_ingestion_run is not None:
+                return data_ingestion_run
+        data_ingestion_run = await self.metadata_store.get_data_ingestion_run(data_ingestion_run_name, no_cache)
+        self.cache.put(key, data_ingestion_run)
+        return data_ingestion_run
+
+    async def get_data_ingestion_runs(self,
+                                      collection_name: str,
+                                      data_source_fqn: str = None
+                                      ) -> List[DataIngestionRun]:
+        return await self.metadata_store.get_data_ingestion_runs(collection_name, data_source_fqn)
+
+    async def delete_collection(self, collection_name: str, include_runs=False):
+        try:
+            return await self.metadata_store.delete_collection(collection_name, include_runs)
+        finally:
+            self.cache.invalidate_collection(collection_name, include_runs)
+
+    async def associate_data_source_with_collection(self,
+                                                    collection_name: str,
+                                                    data_source_association: AssociateDataSourceWithCollection
+                                                    ) -> Collection:
+        try:
+            return await self.metadata_store.associate_data_source_with_collection(
+                collection_name, data_source_association
+            )
+        finally:
+            self.cache.invalidate_collection(collection_name)
+
+    async def unassociate_data_source_with_collection(self,
+                                                      collection_name: str,
+                                                      data_source_fqn: str
+                                                      ) -> Collection:
+        try:
+            return await self.metadata_store.unassociate_data_source_with_collection(
+                collection_name, data_source_fqn
+            )
+        finally:
+            self.cache.invalidate_collection(collection_name)
+
+    async def update_data_ingestion_run_status(self,
+                                               data_ingestion_run_name: str,
+                                               status: DataIngestionRunStatus):
+        try:
+            return await self.metadata_store.update_data_ingestion_run_status(data_ingestion_run_name, status)
+        finally:
+            self.cache.invalidate(("run", data_ingestion_run_name))
+
+    async def log_metrics_for_data_ingestion_run(self,
+                                                 data_ingestion_run_name: str,
+                                                 metric_dict: dict[str, int | float],
+                                                 step: int = 0):
+        try:
+            return await self.metadata_store.log_metrics_for_data_ingestion_run(
+                data_ingestion_run_name, metric_dict, step
+            )
+        finally:
+            self.cache.invalidate(("run", data_ingestion_run_name))
+
+    async def log_errors_for_data_ingestion_run(self,
+                                                data_ingestion_run_name: str,
+                                                errors: Dict[str, Any]):
+        return await self.metadata_store.log_errors_for_data_ingestion_run(data_ingestion_run_name, errors)
+
+    async def save_data_ingestion_run_checkpoint(self,
+                                                 data_ingestion_run_name: str,
+                                                 last_batch: int,
+                                                 data_point_hashes: Dict[str, str],
+                                                 counters: Dict[str, Any]):
+        return await self.metadata_store.save_data_ingestion_run_checkpoint(
+            data_ingestion_run_name, last_batch, data_point_hashes, counters
+        )
+
+    async def get_data_ingestion_run_checkpoint(self,
+                                                data_ingestion_run_name: str
+                                                ) -> DataIngestionRunCheckpoint | None:
+        return await self.metadata_store.get_data_ingestion_run_checkpoint(data_ingestion_run_name)
+
+    async def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        return await self.metadata_store.delete_data_ingestion_run_checkpoint(data_ingestion_run_name)
+
+    async def get_collection_generation(self, collection_name: str) -> int:
+        return await self.metadata_store.get_collection_generation(collection_name)
+
+    async def bump_collection_generation(self, collection_name: str) -> int:
+        return await self.metadata_store.bump_collection_generation(collection_name)
@@ -1,4 +1,19 @@
-from backend.rag.metadata_store.base import get_metadata_store_client
+from backend.rag.metadata_store.base import get_metadata_store_client, get_async_metadata_store_client
+from backend.rag.metadata_store.cache import MetadataCache, CachedMetadataStore, AsyncCachedMetadataStore
 from backend.settings import settings
 
 METADATA_STORE_CLIENT = get_metadata_store_client(config=settings.METADATA_STORE_CONFIG)
+# For async code paths; the file store is shared with METADATA_STORE_CLIENT, its state lives in memory
+ASYNC_METADATA_STORE_CLIENT = get_async_metadata_store_client(
+    config=settings.METADATA_STORE_CONFIG, metadata_store=METADATA_STORE_CLIENT
+)
+
+# One cache for both clients, so a write through either of them invalidates it
+METADATA_CACHE = None
+if settings.METADATA_CACHE_MAX_ENTRIES > 0:
+    METADATA_CACHE = MetadataCache(
+        max_entries=settings.METADATA_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.METADATA_CACHE_TTL_SEC,
+    )
+    METADATA_STORE_CLIENT = CachedMetadataStore(METADATA_STORE_CLIENT, METADATA_CACHE)
+    ASYNC_METADATA_STORE_CLIENT = AsyncCachedMetadataStore(ASYNC_METADATA_STORE_CLIENT, METADATA_CACHE)
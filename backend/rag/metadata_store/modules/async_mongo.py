@@ -0,0 +1,170 @@
+from typing import List, Union, Dict, Any
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from backend.logger import logger
+from backend.rag.metadata_store.base import BaseAsyncMetadataStore
+from backend.rag.metadata_store.modules import mongo_documents as documents
+from backend.settings import settings
+from backend.rag.schemas import CreateCollection, Collection, CreateDataSource, DataSource, CreateDataIngestionRun, \
+    DataIngestionRun, AssociateDataSourceWithCollection, DataIngestionRunStatus, DataIngestionRunCheckpoint
+
+
+class AsyncMongoMetadataStore(BaseAsyncMetadataStore):
+    """
+    Metadata store в MongoDB на motor. Один клиент (и пул соединений) на процесс.
+    """
+
+    def __init__(self, config: dict):
+        # Connects lazily, on the first query in the running event loop
+        self.client = AsyncIOMotorClient(
+            config["url"],
+            maxPoolSize=settings.METADATA_STORE_MAX_POOL_SIZE,
+            minPoolSize=settings.METADATA_STORE_MIN_POOL_SIZE,
+        )
+        db = self.client[config["db"]]
+        self.collections = db["collections"]
+        self.data_sources = db["data_sources"]
+        self.runs = db["runs"]
+        self.checkpoints = db["checkpoints"]
+        # Not removed with the collection, see bump_collection_generation
+        self.generations = db["collection_generations"]
+
+    async def create_collection(self, collection: CreateCollection) -> Collection:
+        logger.debug(f"[Metadata Store] Creating collection {collection.name}")
+        existing_collection = await self.collections.find_one({"_id": collection.name})
+        if existing_collection is not None:
+            raise documents.collection_exists_error(collection.name)
+        await self.collections.insert_one(documents.build_collection_document(collection))
+        return Collection(associated_data_sources={}, **collection.dict())
+
+    async def get_collection_by_name(
+        self, collection_name: str, no_cache: bool = True
+    ) -> Collection | None:
+        return documents.parse_collection(await self.collections.find_one({"_id": collection_name}))
+
+    async def get_collections(
+        self,
+    ) -> List[Collection]:
+        return [Collection(**data) async for data in self.collections.find()]
+
+    async def create_data_source(self, data_source: CreateDataSource) -> DataSource:
+        existing_data_source = await self.data_sources.find_one({"_id": data_source.fqn()})
+        if existing_data_source is not None:
+            raise documents.data_source_exists_error(data_source.fqn())
+        await self.data_sources.insert_one(documents.build_data_source_document(data_source))
+        return DataSource(**data_source.dict())
+
+    async def get_data_source_from_fqn(self, fqn: str) -> Union[DataSource, None]:
+        return documents.parse_data_source(await self.data_sources.find_one({"_id": fqn}))
+
+    async def get_data_sources(self) -> List[DataSource]:
+        return [DataSource(**data) async for data in self.data_sources.find()]
+
+    async def create_data_ingestion_run(
+        self, data_ingestion_run: CreateDataIngestionRun
+    ) -> DataIngestionRun:
+        d = documents.build_data_ingestion_run_document(data_ingestion_run)
+        await self.runs.insert_one(d)
+        return DataIngestionRun(**d)
+
+    async def get_data_ingestion_run(
+        self, data_ingestion_run_name: str, no_cache: bool = False
+    ) -> Union[DataIngestionRun, None]:
+        return documents.parse_data_ingestion_run(await self.runs.find_one({"_id": data_ingestion_run_name}))
+
+    async def get_data_ingestion_runs(
+        self, collection_name: str, data_source_fqn: str = None
+    ) -> List[DataIngestionRun]:
+        query = documents.build_data_ingestion_runs_query(collection_name, data_source_fqn)
+        return [DataIngestionRun(**data) async for data in self.runs.find(query)]
+
+    async def delete_collection(self, collection_name: str, include_runs=False):
+        await self.collections.delete_one({"_id": collection_name})
+        if include_runs:
+            run_names = await self.runs.distinct("_id", {"collection_name": collection_name})
+            await self.checkpoints.delete_many({"_id": {"$in": run_names}})
+            await self.runs.delete_many({"collection_name": collection_name})
+
+    async def associate_data_source_with_collection(
+        self,
+        collection_name: str,
+        data_source_association: AssociateDataSourceWithCollection,
+    ) -> Collection:
+        collection_dict = await self.collections.find_one({"_id": collection_name})
+        associated_data_sources = documents.associate_data_source(collection_dict, data_source_association)
+        await self.collections.update_one(
+            {"_id": collection_name},
+            {"$set": {"associated_data_sources": associated_data_sources}}
+        )
+        return Collection(**collection_dict)
+
+    async def unassociate_data_source_with_collection(
+        self,
+        collection_name: str,
+        data_source_fqn: str,
+    ) -> Collection:
+        collection_dict = await self.collections.find_one({"_id": collection_name})
+        collection_dict["associated_data_sources"].pop(data_source_fqn, None)
+        await self.collections.update_one(
+            {"_id": collection_name},
+            {"$set": {"associated_data_sources": collection_dict["associated_data_sources"]}}
+        )
+        return Collection(**collection_dict)
+
+    async def update_data_ingestion_run_status(
+        self,
+        data_ingestion_run_name: str,
+        status: DataIngestionRunStatus,
+    ):
+        await self.runs.update_one({"_id": data_ingestion_run_name}, documents.build_status_update(status))
+
+    async def log_metrics_for_data_ingestion_run(
+        self,
+        data_ingestion_run_name: str,
+        metric_dict: dict[str, int | float],
+        step: int = 0,
+    ):
+        await self.runs.update_one(
+            {"_id": data_ingestion_run_name}, documents.log_metrics(data_ingestion_run_name, metric_dict, step)
+        )
+
+    async def log_errors_for_data_ingestion_run(
+        self, data_ingestion_run_name: str, errors: Dict[str, Any]
+    ):
+        documents.log_errors(data_ingestion_run_name, errors)
+
+    async def save_data_ingestion_run_checkpoint(
+        self,
+        data_ingestion_run_name: str,
+        last_batch: int,
+        data_point_hashes: Dict[str, str],
+        counters: Dict[str, Any],
+    ):
+        await self.checkpoints.update_one(
+            {"_id": data_ingestion_run_name},
+            documents.build_checkpoint_update(last_batch, data_point_hashes, counters),
+            upsert=True,
+        )
+
+    async def get_data_ingestion_run_checkpoint(
+        self, data_ingestion_run_name: str
+    ) -> Union[DataIngestionRunCheckpoint, None]:
+        data = await self.checkpoints.find_one({"_id": data_ingestion_run_name})
+        return documents.parse_checkpoint(data_ingestion_run_name, data)
+
+    async def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        await self.checkpoints.delete_one({"_id": data_ingestion_run_name})
+
+    async def get_collection_generation(self, collection_name: str) -> int:
+        return documents.parse_generation(await self.generations.find_one({"_id": collection_name}))
+
+    async def bump_collection_generation(self, collection_name: str) -> int:
+        data = await self.generations.find_one_and_update(
+            {"_id": collection_name},
+            {"$inc": {"generation": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return data["generation"]
@@ -1,7 +1,8 @@
 import yaml
 import random
 import string
-from typing import List
+import time
+from typing import Any, Dict, List
 
 from pydantic import BaseModel
 
@@ -17,16 +18,19 @@ from backend.rag.schemas import (
     CreateDataIngestionRun,
     CreateDataSource,
     DataIngestionRun,
+    DataIngestionRunCheckpoint,
     DataIngestionRunStatus,
     DataSource,
     EmbedderConfig,
     ParserConfig,
+    VectorStorageConfig,
 )
 
 
 class LocalMetadata(BaseModel):
     collection_name: str
     embedder_config: EmbedderConfig
+    storage_config: VectorStorageConfig = VectorStorageConfig()
     data_source: CreateDataSource
     parser_config: ParserConfig
 
@@ -62,6 +66,7 @@ class LocalMetadataStore(BaseMetadataStore):
         self.collection = Collection(
             name=self.local_metadata.collection_name,
             embedder_config=self.local_metadata.embedder_config,
+            storage_config=self.local_metadata.storage_config,
             associated_data_sources=associated_data_sources,
         )
 
@@ -70,6 +75,7 @@ class LocalMetadataStore(BaseMetadataStore):
             VECTOR_STORE_CLIENT.create_collection(
                 collection_name=self.local_metadata.collection_name,
                 embeddings=get_embedder(self.local_metadata.embedder_config),
+                storage_config=self.local_metadata.storage_config,
             )
             self.data_ingestion_runs = []
             logger.debug(f"Local metadata store initialized with {self.local_metadata}")
@@ -79,6 +85,9 @@ class LocalMetadataStore(BaseMetadataStore):
             )
 
         self.data_ingestion_runs = []
+        self.checkpoints: Dict[str, DataIngestionRunCheckpoint] = {}
+        # Kept when the collection is deleted
+        self.generations: Dict[str, int] = {}
 
     def create_collection(self, collection) -> Collection:
         return self.collection
@@ -124,6 +133,8 @@ class LocalMetadataStore(BaseMetadataStore):
             data_ingestion_mode=data_ingestion_run.data_ingestion_mode,
             status=DataIngestionRunStatus.INITIALIZED,
             raise_error_on_failure=data_ingestion_run.raise_error_on_failure,
+            created_at=time.time(),
+            updated_at=time.time(),
         )
         self.data_ingestion_runs.append(created_data_ingestion_run)
         return created_data_ingestion_run
@@ -148,6 +159,7 @@ class LocalMetadataStore(BaseMetadataStore):
     def delete_collection(self, collection_name: str, include_runs=False):
         self.collection = None
         self.data_ingestion_runs = []
+        self.checkpoints = {}
 
     def update_data_ingestion_run_status(self,
                                          data_ingestion_run_name: str,
@@ -157,6 +169,9 @@ class LocalMetadataStore(BaseMetadataStore):
         logger.info(
             f"Updating status of data ingestion run {data_ingestion_run_name} to {status}"
         )
+        if data_ingestion_run is not None:
+            data_ingestion_run.status = status
+            data_ingestion_run.updated_at = time.time()
 
     def log_metrics_for_data_ingestion_run(self,
                                            data_ingestion_run_name: str,
@@ -165,7 +180,39 @@ class LocalMetadataStore(BaseMetadataStore):
 
         logger.info(f"Logging metrics for data ingestion run {data_ingestion_run_name}")
         logger.info(f"step: {step}, metric_dict: {metric_dict}")
+        data_ingestion_run = self.get_data_ingestion_run(data_ingestion_run_name)
+        if data_ingestion_run is not None:
+            data_ingestion_run.metrics = {**metric_dict, "step": step}
+            data_ingestion_run.updated_at = time.time()
 
     def log_errors_for_data_ingestion_run(self, data_ingestion_run_name: str, errors):
         logger.info(f"Logging errors for data ingestion run {data_ingestion_run_name}")
         logger.info(f"errors: {errors}")
+
+    def save_data_ingestion_run_checkpoint(self,
+                                           data_ingestion_run_name: str,
+                                           last_batch: int,
+                                           data_point_hashes: Dict[str, str],
+                                           counters: Dict[str, Any]):
+        checkpoint = self.checkpoints.setdefault(
+            data_ingestion_run_name,
+            DataIngestionRunCheckpoint(data_ingestion_run_name=data_ingestion_run_name),
+        )
+        checkpoint.last_batch = last_batch
+        checkpoint.data_point_hashes.update(data_point_hashes)
+        checkpoint.counters = dict(counters)
+
+    def get_data_ingestion_run_checkpoint(self,
+                                          data_ingestion_run_name: str) -> DataIngestionRunCheckpoint | None:
+        checkpoint = self.checkpoints.get(data_ingestion_run_name)
+        return checkpoint.model_copy(deep=True) if checkpoint is not None else None
+
+    def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        self.checkpoints.pop(data_ingestion_run_name, None)
+
+    def get_collection_generation(self, collection_name: str) -> int:
+        return self.generations.get(collection_name, 0)
+
+    def bump_collection_generation(self, collection_name: str) -> int:
+        self.generations[collection_name] = self.generations.get(collection_name, 0) + 1
+        return self.generations[collection_name]
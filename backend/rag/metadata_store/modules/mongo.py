@@ -1,19 +1,23 @@
-import uuid
 from typing import List, Union, Dict, Any
 
-from pymongo import MongoClient
-from fastapi import HTTPException
+from pymongo import MongoClient, ReturnDocument
 from pymongo.errors import ServerSelectionTimeoutError
 
 from backend.logger import logger
 from backend.rag.metadata_store.base import BaseMetadataStore
+from backend.rag.metadata_store.modules import mongo_documents as documents
+from backend.settings import settings
 from backend.rag.schemas import CreateCollection, Collection, CreateDataSource, DataSource, CreateDataIngestionRun, \
-    DataIngestionRun, AssociateDataSourceWithCollection, DataIngestionRunStatus
+    DataIngestionRun, AssociateDataSourceWithCollection, DataIngestionRunStatus, DataIngestionRunCheckpoint
 
 
 class MongoMetadataStore(BaseMetadataStore):
     def __init__(self, config: dict):
-        db = MongoClient(config["url"])[config["db"]]
+        db = MongoClient(
+            config["url"],
+            maxPoolSize=settings.METADATA_STORE_MAX_POOL_SIZE,
+            minPoolSize=settings.METADATA_STORE_MIN_POOL_SIZE,
+        )[config["db"]]
         try:
             _ = db.list_collection_names()
         except ServerSelectionTimeoutError as e:
@@ -21,35 +25,22 @@ class MongoMetadataStore(BaseMetadataStore):
         self.collections = db["collections"]
         self.data_sources = db["data_sources"]
         self.runs = db["runs"]
+        self.checkpoints = db["checkpoints"]
+        # Not removed with the collection, see bump_collection_generation
+        self.generations = db["collection_generations"]
 
     def create_collection(self, collection: CreateCollection) -> Collection:
         logger.debug(f"[Metadata Store] Creating collection {collection.name}")
         existing_collection = self.collections.find_one({"_id": collection.name})
         if existing_collection is not None:
-            logger.error(
-                f"[Metadata Store] Existing collection found with name {collection.name}"
-            )
-            raise HTTPException(
-                status_code=400,
-                detail=f"Collection with name {collection.name} already exists.",
-            )
-        self.collections.insert_one({
-            "_id": collection.name,
-            "name": collection.name,
-            "description": collection.description,
-            "embedder_config": collection.embedder_config.dict(),
-            "associated_data_sources": {}
-        })
+            raise documents.collection_exists_error(collection.name)
+        self.collections.insert_one(documents.build_collection_document(collection))
         return Collection(associated_data_sources={}, **collection.dict())
 
     def get_collection_by_name(
         self, collection_name: str, no_cache: bool = True
     ) -> Collection | None:
-        data = self.collections.find_one({"_id": collection_name})
-        if data is not None:
-            return Collection(**data)
-        else:
-            return None
+        return documents.parse_collection(self.collections.find_one({"_id": collection_name}))
 
     def get_collections(
         self,
@@ -59,24 +50,12 @@ class MongoMetadataStore(BaseMetadataStore):
     def create_data_source(self, data_source: CreateDataSource) -> DataSource:
         existing_data_source = self.data_sources.find_one({"_id": data_source.fqn()})
         if existing_data_source is not None:
-            logger.error(
-                f"[Metadata Store] Existing data_source found with FQN {data_source.fqn()}"
-            )
-            raise HTTPException(
-                status_code=400,
-                detail=f"Data_source with FQN {data_source.fqn()} already exists.",
-            )
-        d = {"_id": data_source.fqn()}
-        d.update(data_source.dict())
-        self.data_sources.insert_one(d)
+            raise documents.data_source_exists_error(data_source.fqn())
+        self.data_sources.insert_one(documents.build_data_source_document(data_source))
         return DataSource(**data_source.dict())
 
     def get_data_source_from_fqn(self, fqn: str) -> Union[DataSource, None]:
-        data = self.data_sources.find_one({"_id": fqn})
-        if data is not None:
-            return DataSource(**data)
-        else:
-            return None
+        return documents.parse_data_source(self.data_sources.find_one({"_id": fqn}))
 
     def get_data_sources(self) -> List[DataSource]:
         return [DataSource(**data) for data in self.data_sources.find()]
@@ -84,33 +63,26 @@ class MongoMetadataStore(BaseMetadataStore):
     def create_data_ingestion_run(
         self, data_ingestion_run: CreateDataIngestionRun
     ) -> DataIngestionRun:
-        name = str(uuid.uuid1())
-        d = {
-            "_id": name,
-            "name": name,
-            "status": DataIngestionRunStatus.INITIALIZED
-        }
-        d.update(data_ingestion_run.dict())
+        d = documents.build_data_ingestion_run_document(data_ingestion_run)
         self.runs.insert_one(d)
         return DataIngestionRun(**d)
 
     def get_data_ingestion_run(
         self, data_ingestion_run_name: str, no_cache: bool = False
     ) -> Union[DataIngestionRun, None]:
-        data = self.runs.find_one({"_id": data_ingestion_run_name})
-        if data is not None:
-            return DataIngestionRun(**data)
-        else:
-            return None
+        return documents.parse_data_ingestion_run(self.runs.find_one({"_id": data_ingestion_run_name}))
 
     def get_data_ingestion_runs(
         self, collection_name: str, data_source_fqn: str = None
     ) -> List[DataIngestionRun]:
-        return [DataIngestionRun(**data) for data in self.runs.find()]
+        query = documents.build_data_ingestion_runs_query(collection_name, data_source_fqn)
+        return [DataIngestionRun(**data) for data in self.runs.find(query)]
 
     def delete_collection(self, collection_name: str, include_runs=False):
         self.collections.delete_one({"_id": collection_name})
         if include_runs:
+            run_names = self.runs.distinct("_id", {"collection_name": collection_name})
+            self.checkpoints.delete_many({"_id": {"$in": run_names}})
             self.runs.delete_many({"collection_name": collection_name})
 
     def associate_data_source_with_collection(
@@ -118,23 +90,11 @@ class MongoMetadataStore(BaseMetadataStore):
         collection_name: str,
         data_source_association: AssociateDataSourceWithCollection,
     ) -> Collection:
-
         collection_dict = self.collections.find_one({"_id": collection_name})
-        data_source_association_dict = data_source_association.dict()
-        fqn_l = data_source_association.data_source_fqn.split("::")
-        data_source_association_dict.update({
-            "data_source": {
-                "type": fqn_l[0],
-                "uri": fqn_l[1],
-                "metadata": None
-            }
-        })
-        collection_dict["associated_data_sources"].update(
-            {data_source_association.data_source_fqn: data_source_association_dict}
-        )
+        associated_data_sources = documents.associate_data_source(collection_dict, data_source_association)
         self.collections.update_one(
             {"_id": collection_name},
-            {"$set": {"associated_data_sources": collection_dict["associated_data_sources"]}}
+            {"$set": {"associated_data_sources": associated_data_sources}}
         )
         return Collection(**collection_dict)
 
@@ -156,7 +116,7 @@ class MongoMetadataStore(BaseMetadataStore):
         data_ingestion_run_name: str,
         status: DataIngestionRunStatus,
     ):
-        self.runs.update_one({"_id": data_ingestion_run_name}, {"$set": {"status": status}})
+        self.runs.update_one({"_id": data_ingestion_run_name}, documents.build_status_update(status))
 
     def log_metrics_for_data_ingestion_run(
         self,
@@ -164,11 +124,45 @@ class MongoMetadataStore(BaseMetadataStore):
         metric_dict: dict[str, int | float],
         step: int = 0,
     ):
-        logger.info(f"Logging metrics for data ingestion run {data_ingestion_run_name}")
-        logger.info(f"step: {step}, metric_dict: {metric_dict}")
+        self.runs.update_one(
+            {"_id": data_ingestion_run_name}, documents.log_metrics(data_ingestion_run_name, metric_dict, step)
+        )
 
     def log_errors_for_data_ingestion_run(
         self, data_ingestion_run_name: str, errors: Dict[str, Any]
     ):
-        logger.info(f"Logging errors for data ingestion run {data_ingestion_run_name}")
-        logger.info(f"errors: {errors}")
+        documents.log_errors(data_ingestion_run_name, errors)
+
+    def save_data_ingestion_run_checkpoint(
+        self,
+        data_ingestion_run_name: str,
+        last_batch: int,
+        data_point_hashes: Dict[str, str],
+        counters: Dict[str, Any],
+    ):
+        self.checkpoints.update_one(
+            {"_id": data_ingestion_run_name},
+            documents.build_checkpoint_update(last_batch, data_point_hashes, counters),
+            upsert=True,
+        )
+
+    def get_data_ingestion_run_checkpoint(
+        self, data_ingestion_run_name: str
+    ) -> Union[DataIngestionRunCheckpoint, None]:
+        data = self.checkpoints.find_one({"_id": data_ingestion_run_name})
+        return documents.parse_checkpoint(data_ingestion_run_name, data)
+
+    def delete_data_ingestion_run_checkpoint(self, data_ingestion_run_name: str):
+        self.checkpoints.delete_one({"_id": data_ingestion_run_name})
+
+    def get_collection_generation(self, collection_name: str) -> int:
+        return documents.parse_generation(self.generations.find_one({"_id": collection_name}))
+
+    def bump_collection_generation(self, collection_name: str) -> int:
+        data = self.generations.find_one_and_update(
+            {"_id": collection_name},
+            {"$inc": {"generation": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return data["generation"]
@@ -0,0 +1,143 @@
+"""
+Документы MongoDB для MongoMetadataStore и AsyncMongoMetadataStore:
+оба store строят и разбирают документы здесь и отличаются только драйвером (pymongo / motor)
+"""
+import time
+import uuid
+from typing import Any, Dict
+
+from fastapi import HTTPException
+
+from backend.logger import logger
+from backend.rag.schemas import CreateCollection, Collection, CreateDataSource, DataSource, CreateDataIngestionRun, \
+    DataIngestionRun, AssociateDataSourceWithCollection, DataIngestionRunStatus, DataIngestionRunCheckpoint
+
+
+def collection_exists_error(collection_name: str) -> HTTPException:
+    logger.error(f"[Metadata Store] Existing collection found with name {collection_name}")
+    return HTTPException(
+        status_code=400,
+        detail=f"Collection with name {collection_name} already exists.",
+    )
+
+
+def data_source_exists_error(fqn: str) -> HTTPException:
+    logger.error(f"[Metadata Store] Existing data_source found with FQN {fqn}")
+    return HTTPException(
+        status_code=400,
+        detail=f"Data_source with FQN {fqn} already exists.",
+    )
+
+
+def build_collection_document(collection: CreateCollection) -> Dict[str, Any]:
+    return {
+        "_id": collection.name,
+        "name": collection.name,
+        "description": collection.description,
+        "embedder_config": collection.embedder_config.dict(),
+        "storage_config": collection.storage_config.dict(),
+        "associated_data_sources": {}
+    }
+
+
+def build_data_source_document(data_source: CreateDataSource) -> Dict[str, Any]:
+    d = {"_id": data_source.fqn()}
+    d.update(data_source.dict())
+    return d
+
+
+def build_data_ingestion_run_document(data_ingestion_run: CreateDataIngestionRun) -> Dict[str, Any]:
+    name = str(uuid.uuid1())
+    d = {
+        "_id": name,
+        "name": name,
+        "status": DataIngestionRunStatus.INITIALIZED,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    d.update(data_ingestion_run.dict())
+    return d
+
+
+def build_data_ingestion_runs_query(collection_name: str, data_source_fqn: str = None) -> Dict[str, Any]:
+    query = {"collection_name": collection_name}
+    if data_source_fqn:
+        query["data_source_fqn"] = data_source_fqn
+    return query
+
+
+def associate_data_source(collection_dict: Dict[str, Any],
+                          data_source_association: AssociateDataSourceWithCollection) -> Dict[str, Any]:
+    """
+    Добавляет источник данных в документ коллекции и возвращает новые associated_data_sources
+    """
+    data_source_association_dict = data_source_association.dict()
+    fqn_l = data_source_association.data_source_fqn.split("::")
+    data_source_association_dict.update({
+        "data_source": {
+            "type": fqn_l[0],
+            "uri": fqn_l[1],
+            "metadata": None
+        }
+    })
+    collection_dict["associated_data_sources"].update(
+        {data_source_association.data_source_fqn: data_source_association_dict}
+    )
+    return collection_dict["associated_data_sources"]
+
+
+def build_checkpoint_update(last_batch: int,
+                            data_point_hashes: Dict[str, str],
+                            counters: Dict[str, Any]) -> Dict[str, Any]:
+    # Data points are appended, the document is not rewritten for every batch.
+    # Pairs instead of a dict, since fqns contain dots
+    return {
+        "$set": {"last_batch": last_batch, "counters": counters},
+        "$push": {"data_points": {"$each": [[fqn, h] for fqn, h in data_point_hashes.items()]}},
+    }
+
+
+def parse_collection(data: Dict[str, Any] | None) -> Collection | None:
+    return Collection(**data) if data is not None else None
+
+
+def parse_data_source(data: Dict[str, Any] | None) -> DataSource | None:
+    return DataSource(**data) if data is not None else None
+
+
+def parse_data_ingestion_run(data: Dict[str, Any] | None) -> DataIngestionRun | None:
+    return DataIngestionRun(**data) if data is not None else None
+
+
+def parse_checkpoint(data_ingestion_run_name: str,
+                     data: Dict[str, Any] | None) -> DataIngestionRunCheckpoint | None:
+    if data is None:
+        return None
+    return DataIngestionRunCheckpoint(
+        data_ingestion_run_name=data_ingestion_run_name,
+        last_batch=data.get("last_batch", 0),
+        data_point_hashes=dict(data.get("data_points", [])),
+        counters=data.get("counters", {}),
+    )
+
+
+def parse_generation(data: Dict[str, Any] | None) -> int:
+    return data["generation"] if data is not None else 0
+
+
+def log_metrics(data_ingestion_run_name: str, metric_dict: Dict[str, int | float], step: int) -> Dict[str, Any]:
+    """
+    Логирует метрики задачи приема данных и возвращает обновление ее документа
+    """
+    logger.info(f"Logging metrics for data ingestion run {data_ingestion_run_name}")
+    logger.info(f"step: {step}, metric_dict: {metric_dict}")
+    return {"$set": {"metrics": {**metric_dict, "step": step}, "updated_at": time.time()}}
+
+
+def build_status_update(status: DataIngestionRunStatus) -> Dict[str, Any]:
+    return {"$set": {"status": status, "updated_at": time.time()}}
+
+
+def log_errors(data_ingestion_run_name: str, errors: Dict[str, Any]) -> None:
+    logger.info(f"Logging errors for data ingestion run {data_ingestion_run_name}")
+    logger.info(f"errors: {errors}")
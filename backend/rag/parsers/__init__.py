@@ -11,6 +11,12 @@ parser = get_parser_for_extension(".pdf", parsers_map=dict())
 # Или parser = get_parser_for_extension(".pdf", parsers_map={".pdf": "PdfParserFast"})
 res = parser.get_chunks("data/Постановление Правительства РФ от 16.03.2009 N 228.pdf", metadata=dict())
 doc = asyncio.run(res)
+
+# При приеме данных парсинг выполняется в пуле процессов (PARSER_WORKERS),
+# чтобы не блокировать event loop. Большие PDF разбиваются на диапазоны страниц.
+from backend.rag.parsers.parser import get_chunks_in_executor
+res = get_chunks_in_executor(".pdf", parsers_map={}, filepath="data/file.pdf", metadata=None, max_chunk_size=1000)
+doc = asyncio.run(res)
 ```
 """
 from backend.rag.parsers.parser import register_parser
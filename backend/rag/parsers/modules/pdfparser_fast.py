@@ -1,5 +1,5 @@
 import re
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 import fitz
 from langchain.docstore.document import Document
@@ -17,24 +17,33 @@ class PdfParserUsingPyMuPDF(BaseParser):
     """
 
     supported_file_extensions = [".pdf"]
+    supports_page_ranges = True
 
     def __init__(self, max_chunk_size: int = 1000, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.max_chunk_size = max_chunk_size
 
+    @staticmethod
+    def get_page_count(filepath: str) -> int:
+        with fitz.open(filepath) as doc:
+            return doc.page_count
+
     async def get_chunks(self,
                          filepath: str,
                          metadata: Optional[dict],
+                         page_range: Optional[Tuple[int, int]] = None,
                          *args, **kwargs) -> List[Document]:
         """
         Асинхронное извлечение текста из PDF файла и возвращение его в chunk'ах.
+        page_range (start, stop) ограничивает обрабатываемые страницы.
         """
         final_texts = []
         final_tables = []
         try:
             # Open the PDF file using pdfplumber
             doc = fitz.open(filepath)
-            for page in doc:
+            pages = doc.pages(*page_range) if page_range else doc
+            for page in pages:
                 table = page.find_tables()
                 table = list(table)
                 for ix, tab in enumerate(table):
@@ -1,15 +1,26 @@
+import asyncio
+import multiprocessing
+import threading
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from typing import Optional, List
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Optional, List, Tuple
 
 from langchain.docstore.document import Document
 
 from backend.logger import logger
 from backend.rag.schemas import ComponentDto
+from backend.settings import settings
 
 PARSER_REGISTRY = {}
 PARSER_REGISTRY_EXTENSIONS = defaultdict(list)
 
+# Pool of processes for CPU-bound parsing, see `get_chunks_in_executor`
+PARSER_EXECUTOR: Optional[Executor] = None
+_PARSER_EXECUTOR_LOCK = threading.Lock()
+# Parser instances reused inside each worker process
+_WORKER_PARSERS: Dict[Tuple, "BaseParser"] = {}
+
 
 def register_parser(name: str, cls) -> None:
     """
@@ -29,11 +40,22 @@ class BaseParser(ABC):
     """
     Абстрактный класс парсера.
     Содержит общие аттрибуты и методы, которые должен реализовать каждый парсер.
+    Парсеры, которые умеют обрабатывать часть файла (page_range в get_chunks),
+    устанавливают supports_page_ranges = True и реализуют get_page_count.
     """
 
+    supports_page_ranges: bool = False
+
     def __init__(self, *args, **kwargs):
         pass
 
+    @staticmethod
+    def get_page_count(filepath: str) -> int:
+        """
+        Возвращает количество страниц в файле
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def get_chunks(self,
                          filepath: str,
@@ -51,9 +73,9 @@ class BaseParser(ABC):
         pass
 
 
-def get_parser_for_extension(file_extension, parsers_map, *args, **kwargs) -> BaseParser | None:
+def get_parser_name_for_extension(file_extension, parsers_map) -> str | None:
     """
-    При индексировании для данного file_extension возвращает нужный парсер.
+    При индексировании для данного file_extension возвращает имя нужного парсера.
     Если отображение не было найдено в parsers_map, то используется регистр по умолчанию.
     """
     global PARSER_REGISTRY_EXTENSIONS
@@ -85,9 +107,121 @@ def get_parser_for_extension(file_extension, parsers_map, *args, **kwargs) -> Ba
     if name not in PARSER_REGISTRY:
         raise ValueError(f"No parser registered with name {name}")
 
+    return name
+
+
+def get_parser_for_extension(file_extension, parsers_map, *args, **kwargs) -> BaseParser | None:
+    """
+    При индексировании для данного file_extension возвращает нужный парсер.
+    Если отображение не было найдено в parsers_map, то используется регистр по умолчанию.
+    """
+    name = get_parser_name_for_extension(file_extension, parsers_map)
+    if name is None:
+        return None
     return PARSER_REGISTRY[name](*args, **kwargs)
 
 
+def _init_parser_worker():
+    # Register the parsers in the worker process
+    import backend.rag.parsers  # noqa: F401
+
+
+def get_parser_executor() -> Optional[Executor]:
+    """
+    Возвращает общий пул процессов для парсинга или None, если PARSER_WORKERS = 0
+    """
+    global PARSER_EXECUTOR
+    if settings.PARSER_WORKERS <= 0:
+        return None
+    with _PARSER_EXECUTOR_LOCK:
+        if PARSER_EXECUTOR is None:
+            # spawn: forking a process with running threads (uvicorn, torch) is unsafe
+            PARSER_EXECUTOR = ProcessPoolExecutor(
+                max_workers=settings.PARSER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_parser_worker,
+            )
+    return PARSER_EXECUTOR
+
+
+def shutdown_parser_executor():
+    global PARSER_EXECUTOR
+    with _PARSER_EXECUTOR_LOCK:
+        if PARSER_EXECUTOR is not None:
+            PARSER_EXECUTOR.shutdown(cancel_futures=True)
+            PARSER_EXECUTOR = None
+
+
+def _get_worker_parser(name: str, parser_kwargs: Tuple) -> BaseParser:
+    key = (name, parser_kwargs)
+    parser = _WORKER_PARSERS.get(key)
+    if parser is None:
+        parser = PARSER_REGISTRY[name](**dict(parser_kwargs))
+        _WORKER_PARSERS[key] = parser
+    return parser
+
+
+def _get_page_count_in_worker(name: str, filepath: str) -> int:
+    return PARSER_REGISTRY[name].get_page_count(filepath)
+
+
+def _parse_file_in_worker(name: str,
+                          parser_kwargs: Tuple,
+                          filepath: str,
+                          metadata: Optional[dict],
+                          page_range: Optional[Tuple[int, int]] = None) -> List[Tuple[str, dict]]:
+    """
+    Выполняется в процессе пула. Возвращает chunk'и в компактном виде (page_content, metadata).
+    """
+    parser = _get_worker_parser(name, parser_kwargs)
+    kwargs = {"page_range": page_range} if page_range is not None else {}
+    chunks = asyncio.run(parser.get_chunks(filepath=filepath, metadata=metadata, **kwargs))
+    return [(chunk.page_content, chunk.metadata) for chunk in chunks]
+
+
+async def get_chunks_in_executor(file_extension,
+                                 parsers_map,
+                                 filepath: str,
+                                 metadata: Optional[dict],
+                                 **parser_kwargs) -> List[Document] | None:
+    """
+    Разбивает файл на chunk'и в пуле процессов (или в потоке, если PARSER_WORKERS = 0),
+    не блокируя event loop. Большие файлы парсеров с supports_page_ranges
+    разбиваются на диапазоны по PARSER_PAGES_PER_TASK страниц и обрабатываются параллельно.
+    Returns:
+        List[Document] | None: chunk'и файла или None, если парсер для расширения не найден
+    """
+    name = get_parser_name_for_extension(file_extension, parsers_map)
+    if name is None:
+        return None
+    parser_kwargs = tuple(sorted(parser_kwargs.items()))
+    loop = asyncio.get_running_loop()
+    executor = get_parser_executor()
+
+    page_ranges = [None]
+    pages_per_task = settings.PARSER_PAGES_PER_TASK
+    if PARSER_REGISTRY[name].supports_page_ranges and pages_per_task > 0:
+        page_count = await loop.run_in_executor(executor, _get_page_count_in_worker, name, filepath)
+        if page_count > pages_per_task:
+            page_ranges = [
+                (start, min(start + pages_per_task, page_count))
+                for start in range(0, page_count, pages_per_task)
+            ]
+            logger.debug(f"Parsing {filepath} in {len(page_ranges)} page ranges")
+
+    results = await asyncio.gather(*[
+        loop.run_in_executor(
+            executor, _parse_file_in_worker, name, parser_kwargs, filepath, metadata, page_range
+        )
+        for page_range in page_ranges
+    ])
+    return [
+        Document(page_content=page_content, metadata=chunk_metadata)
+        for chunks in results
+        for page_content, chunk_metadata in chunks
+    ]
+
+
 def list_parsers() -> List[ComponentDto]:
     """
     Возвращает список всех зарегистрированных парсеров
@@ -1,25 +1,34 @@
 import asyncio
 import json
+import time
+from typing import Optional
 
 import async_timeout
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 from langchain.prompts import PromptTemplate
-from langchain.retrievers import ContextualCompressionRetriever, MultiQueryRetriever
+from langchain.retrievers import ContextualCompressionRetriever
 from langchain.schema.vectorstore import VectorStoreRetriever
-from langchain_community.chat_models.ollama import ChatOllama
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough
-from langchain_community.chat_models import GigaChat
 
 from backend.logger import logger
+from backend.rag.bm25 import HybridRetriever, get_bm25_index
+from backend.rag.cache import ANSWER_CACHE, RETRIEVAL_CACHE, CachedRetriever, get_answer_cache_key, \
+    aget_collection_generation
+from backend.rag.embedders.cache import QueryVectorEmbeddings
 from backend.rag.embedders.embedder import get_embedder
-from backend.rag.metadata_store.client import METADATA_STORE_CLIENT
+from backend.rag.llms import get_llm
+from backend.rag.metadata_store.client import ASYNC_METADATA_STORE_CLIENT
 from backend.rag.query_controllers.example.schemas import GENERATION_TIMEOUT_SEC, ExampleQueryInput, AnswerResultDto
+from backend.rag.query_controllers.multi_query import MultiQuerySearchRetriever
 from backend.rag.reranker import MxBaiReranker
 from backend.rag.vector_db.client import VECTOR_STORE_CLIENT
 from backend.settings import settings
 
+# Disable caching and proxy buffering (nginx), so every event is delivered immediately
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 class ExampleQueryController:
     """
@@ -32,7 +41,39 @@ class ExampleQueryController:
         Метод для ответа на вопросы, используя контекст из коллекции
         """
         # Get the vector store
-        vector_store = await cls._get_vector_store(request.collection_name)
+        collection = await cls._get_collection(request.collection_name)
+        vector_store = cls._get_vector_store(collection)
+
+        # Return the answer to a similar question if there is one
+        cache_key = query_vector = generation = None
+        if request.use_cache and ANSWER_CACHE is not None:
+            cache_key = get_answer_cache_key(
+                collection_name=request.collection_name,
+                prompt_template=request.prompt_template,
+                llm_configuration=request.llm_configuration,
+                retriever_name=request.retriever_name,
+                retriever_config=request.retriever_config,
+            )
+            # Read on every request, the collection may be re-ingested by another process
+            generation = await aget_collection_generation(request.collection_name)
+            query_vector = await asyncio.to_thread(vector_store.embeddings.embed_query, request.query)
+            cached_answer = ANSWER_CACHE.get(cache_key, generation, query_vector)
+            if cached_answer is not None:
+                if request.stream:
+                    return StreamingResponse(
+                        cls._stream_cached_answer(cached_answer),
+                        media_type="text/event-stream",
+                        headers=SSE_HEADERS,
+                    )
+                return AnswerResultDto(**cached_answer)
+            # The search reuses the query vector instead of embedding the query again
+            vector_store = cls._get_vector_store(
+                collection, QueryVectorEmbeddings(vector_store.embeddings, request.query, query_vector)
+            )
+
+        def save_answer(answer: dict):
+            if cache_key is not None:
+                ANSWER_CACHE.put(cache_key, generation, query_vector, answer)
 
         # Create the QA prompt templates
         QA_PROMPT = cls._get_prompt_template(
@@ -43,6 +84,9 @@ class ExampleQueryController:
         # Get the LLM
         llm = cls._get_llm(request.llm_configuration, request.stream)
 
+        # Search params of the collection's storage profile, e.g. hnsw_ef and quantization oversampling
+        cls._set_search_params(collection, request.retriever_config)
+
         # get retriever
         retriever = await cls._get_retriever(
             vector_store=vector_store,
@@ -66,8 +110,9 @@ class ExampleQueryController:
 
         if request.stream:
             return StreamingResponse(
-                cls._stream_answer(rag_chain_with_source, request.query),
+                cls._stream_answer(rag_chain_with_source, request.query, on_complete=save_answer),
                 media_type="text/event-stream",
+                headers=SSE_HEADERS,
             )
 
         else:
@@ -90,55 +135,98 @@ class ExampleQueryController:
                 res = AnswerResultDto(answer=outputs["answer"], docs=[out.dict() for out in outputs["context"]])
             else:
                 res = AnswerResultDto(answer=outputs["answer"], docs=[])
+            save_answer(res.model_dump())
             return res
 
+    @staticmethod
+    def _format_sse(event: dict) -> str:
+        """
+        Событие Server-Sent Events: строка `data:` с JSON и пустая строка
+        """
+        return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    @staticmethod
+    def _get_stream_metrics(start: float, first_token_at: Optional[float], chunks: int) -> dict:
+        end = time.perf_counter()
+        generation_sec = end - first_token_at if first_token_at is not None else 0.0
+        # Chunks, not tokens: the chain yields answer text without the LLM usage metadata
+        return {
+            "ttft_sec": round(first_token_at - start, 3) if first_token_at is not None else None,
+            "chunks": chunks,
+            "chunks_per_sec": round(chunks / generation_sec, 2) if generation_sec > 0 else None,
+            "total_sec": round(end - start, 3),
+        }
+
     @classmethod
-    async def _stream_answer(cls, rag_chain, query):
-        async with async_timeout.timeout(GENERATION_TIMEOUT_SEC):
+    async def _stream_answer(cls, rag_chain, query, on_complete=None):
+        # Collected to cache the full answer when the stream ends
+        docs = []
+        answer_parts = []
+        start = time.perf_counter()
+        first_token_at = None
+        # The chain is read by a separate task, so heartbeats can be sent while waiting for it
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
             try:
-                async for chunk in rag_chain.astream(query):
-                    if "question " in chunk:
-                        # print("Question: ", chunk['question'])
-                        yield json.dumps({"question": chunk["question"]})
-                        await asyncio.sleep(0.1)
-                    elif "context" in chunk:
-                        # print("Context: ", cls._format_docs_for_stream(chunk['context']))
-                        yield json.dumps(
-                            {"docs": cls._format_docs_for_stream(chunk["context"])}
-                        )
-                        await asyncio.sleep(0.1)
-                    elif "answer" in chunk:
-                        # print("Answer: ", chunk['answer'])
-                        yield json.dumps({"answer": chunk["answer"]})
-                        await asyncio.sleep(0.1)
-
-                yield json.dumps({"end": "<END>"})
-            except asyncio.TimeoutError:
-                raise HTTPException(status_code=504, detail="Stream timed out")
+                async with async_timeout.timeout(GENERATION_TIMEOUT_SEC):
+                    async for chunk in rag_chain.astream(query):
+                        await queue.put(chunk)
+                await queue.put(None)
+            except Exception as exp:
+                # Passed to the consumer and reported as an error event
+                await queue.put(exp)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    # SSE comment, keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    if isinstance(chunk, asyncio.TimeoutError):
+                        yield cls._format_sse({"error": "Stream timed out"})
+                    else:
+                        logger.error(f"Failed to stream answer: {chunk}", exc_info=chunk)
+                        yield cls._format_sse({"error": str(chunk)})
+                    return
+                if "question" in chunk:
+                    yield cls._format_sse({"question": chunk["question"]})
+                elif "context" in chunk:
+                    docs = cls._format_docs_for_stream(chunk["context"])
+                    yield cls._format_sse({"docs": docs})
+                elif "answer" in chunk:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    answer_parts.append(chunk["answer"])
+                    yield cls._format_sse({"answer": chunk["answer"]})
+
+            yield cls._format_sse(
+                {"end": "<END>", **cls._get_stream_metrics(start, first_token_at, len(answer_parts))}
+            )
+        finally:
+            producer.cancel()
+        if on_complete is not None:
+            on_complete({"answer": "".join(answer_parts), "docs": docs})
+
+    @classmethod
+    async def _stream_cached_answer(cls, cached_answer: dict):
+        yield cls._format_sse({"docs": cached_answer["docs"]})
+        yield cls._format_sse({"answer": cached_answer["answer"]})
+        yield cls._format_sse({"end": "<END>", "cached": True})
 
     @staticmethod
     def _get_llm(llm_configuration, stream=False):
         """
-        Возвращает объект LLM
+        Возвращает объект LLM, клиенты переиспользуются между запросами
         """
-        system = "Ты — русскоязычный автоматический ассистент. Ты разговариваешь с людьми и помогаешь им."
-        if llm_configuration.provider == "gigachat":
-            logger.debug(f"Using GigaChat model {llm_configuration.name}")
-            llm = GigaChat(
-                credentials=settings.GIGACHAT_API_KEY,
-                temperature=llm_configuration.parameters.get("temperature", 0.1),
-                streaming=stream,
-                verify_ssl_certs=False
-            )
-        else:  # llm_configuration.provider == "ollama":
-            logger.debug(f"Using Ollama model {llm_configuration.name}")
-            llm = ChatOllama(
-                base_url=settings.OLLAMA_URL,
-                model=llm_configuration.name,
-                temperature=llm_configuration.parameters.get("temperature", 0.1),
-                system=system,
-            )
-        return llm
+        logger.debug(f"Using {llm_configuration.provider} model {llm_configuration.name}")
+        return get_llm(llm_configuration, stream)
 
     @staticmethod
     def _get_prompt_template(input_variables, template):
@@ -158,30 +246,57 @@ class ExampleQueryController:
         ]
 
     @staticmethod
-    async def _get_vector_store(collection_name: str):
+    async def _get_collection(collection_name: str):
         """
-        Возвращает vector store для коллекции
+        Возвращает коллекцию из хранилища метаданных
         """
-        collection = METADATA_STORE_CLIENT.get_collection_by_name(collection_name)
+        collection = await ASYNC_METADATA_STORE_CLIENT.get_collection_by_name(collection_name, no_cache=False)
 
         if collection is None:
             raise HTTPException(status_code=404, detail="Collection not found")
+        return collection
 
+    @staticmethod
+    def _get_vector_store(collection, embeddings=None):
+        """
+        Возвращает vector store для коллекции, по умолчанию с embedder'ом коллекции
+        """
         return VECTOR_STORE_CLIENT.get_vector_store(
             collection_name=collection.name,
-            embeddings=get_embedder(collection.embedder_config),
+            embeddings=embeddings or get_embedder(collection.embedder_config),
         )
 
+    @staticmethod
+    def _set_search_params(collection, retriever_config):
+        """
+        Добавляет в search_kwargs параметры поиска по профилю хранения коллекции,
+        hnsw_ef и oversampling запроса переопределяют значения профиля
+        """
+        search_params = VECTOR_STORE_CLIENT.get_search_params(
+            collection.storage_config,
+            hnsw_ef=retriever_config.hnsw_ef,
+            oversampling=retriever_config.oversampling,
+        )
+        if search_params is not None:
+            retriever_config.search_kwargs["search_params"] = search_params
+
     @staticmethod
     def _get_vector_store_retriever(vector_store, retriever_config):
         """
-        Возвращает vector store retriever
+        Возвращает vector store retriever, результаты которого кэшируются
         """
-        return VectorStoreRetriever(
+        retriever = VectorStoreRetriever(
             vectorstore=vector_store,
             search_type=retriever_config.search_type,
             search_kwargs=retriever_config.search_kwargs,
         )
+        if RETRIEVAL_CACHE is None:
+            return retriever
+        return CachedRetriever(
+            retriever=retriever,
+            collection_name=vector_store.collection_name,
+            cache=RETRIEVAL_CACHE,
+        )
 
     @classmethod
     def _get_contextual_compression_retriever(cls, vector_store, retriever_config):
@@ -208,25 +323,56 @@ class ExampleQueryController:
                 status_code=404, detail="Compressor model provider not found"
             )
 
+    @classmethod
+    def _get_hybrid_retriever(cls, vector_store, retriever_config):
+        """
+        Возвращает гибридный retriever: векторный поиск и BM25, объединенные reciprocal rank fusion
+        """
+        index = get_bm25_index()
+        if index is None:
+            raise HTTPException(status_code=400, detail="BM25 index is disabled, set BM25_INDEX_PATH")
+        return HybridRetriever(
+            retriever=cls._get_vector_store_retriever(vector_store, retriever_config),
+            index=index,
+            collection_name=vector_store.collection_name,
+            k=retriever_config.search_kwargs.get("k", 4),
+            lexical_k=retriever_config.lexical_k,
+            rrf_k=retriever_config.rrf_k,
+            filter=retriever_config.search_kwargs.get("filter"),
+        )
+
     @classmethod
     def _get_multi_query_retriever(
             cls, vector_store, retriever_config, retriever_type="vectorstore"
     ):
         """
-        Возвращает multi query retriever
+        Возвращает multi query retriever: варианты вопроса ищутся одним batch-запросом,
+        для contextual compression объединенные результаты переранжируются один раз
         """
+        retriever = MultiQuerySearchRetriever(
+            vector_db=VECTOR_STORE_CLIENT,
+            collection_name=vector_store.collection_name,
+            embeddings=vector_store.embeddings,
+            llm=cls._get_llm(retriever_config.retriever_llm_configuration, stream=retriever_config.stream_queries),
+            search_type=retriever_config.search_type,
+            search_kwargs=retriever_config.search_kwargs,
+            stream_queries=retriever_config.stream_queries,
+            deadline_sec=retriever_config.deadline_sec,
+        )
         if retriever_type == "vectorstore":
-            base_retriever = cls._get_vector_store_retriever(
-                vector_store, retriever_config
-            )
-        else:  # elif retriever_type == "contextual-compression":
-            base_retriever = cls._get_contextual_compression_retriever(
-                vector_store, retriever_config
-            )
+            return retriever
 
-        return MultiQueryRetriever.from_llm(
-            retriever=base_retriever,
-            llm=cls._get_llm(retriever_config.retriever_llm_configuration),
+        # elif retriever_type == "contextual-compression":
+        if retriever_config.compressor_model_provider != "mixbread-ai":
+            raise HTTPException(
+                status_code=404, detail="Compressor model provider not found"
+            )
+        return ContextualCompressionRetriever(
+            base_compressor=MxBaiReranker(
+                model=retriever_config.compressor_model_name,
+                top_k=retriever_config.top_k,
+            ),
+            base_retriever=retriever,
         )
 
     @classmethod
@@ -250,18 +396,24 @@ class ExampleQueryController:
 
         elif retriever_name == "multi-query":
             logger.debug(
-                f"Using MultiQueryRetriever with {retriever_config.search_type} search"
+                f"Using MultiQuerySearchRetriever with {retriever_config.search_type} search"
             )
             retriever = cls._get_multi_query_retriever(vector_store, retriever_config)
 
         elif retriever_name == "contextual-compression-multi-query":
             logger.debug(
-                f"Using MultiQueryRetriever with {retriever_config.search_type} search and retriever type as contextual-compression"
+                f"Using MultiQuerySearchRetriever with {retriever_config.search_type} search and retriever type as contextual-compression"
             )
             retriever = cls._get_multi_query_retriever(
                 vector_store, retriever_config, retriever_type="contextual-compression"
             )
 
+        elif retriever_name == "hybrid":
+            logger.debug(
+                f"Using HybridRetriever with {retriever_config.search_type} search and BM25"
+            )
+            retriever = cls._get_hybrid_retriever(vector_store, retriever_config)
+
         else:
             raise HTTPException(status_code=404, detail="Retriever not found")
 
@@ -90,6 +90,35 @@ QUERY_WITH_VECTOR_STORE_RETRIEVER_SIMILARITY_SCORE_PAYLOAD = {
 }
 #######
 
+QUERY_WITH_HYBRID_RETRIEVER_SIMILARITY = {
+    "collection_name": "example",
+    "query": "Что сказано в статье 12.1 о праве на защиту персональных данных?",
+    "llm_configuration": {
+        "name": "bambucha/saiga-llama3",
+        "provider": "ollama",
+        "parameters": {"temperature": 0.1},
+    },
+    "prompt_template": "Ответ на вопрос дайте, опираясь только на следующий контекст:\nКонтекст: {context} \nВопрос: {question}",
+    "retriever_name": "hybrid",
+    "retriever_config": {
+        "search_type": "similarity",
+        "search_kwargs": {"k": 5},
+        "lexical_k": 20,
+        "rrf_k": 60,
+    },
+    "stream": False,
+}
+
+QUERY_WITH_HYBRID_RETRIEVER_SIMILARITY_PAYLOAD = {
+    "summary": "поиск по близости + BM25 -> ответ",
+    "description": """
+        Результаты векторного поиска объединяются с lexical_k результатами BM25 (reciprocal rank fusion).
+        Находит номера статей и точные термины, которые векторный поиск пропускает.
+        Требует k в search_kwargs.""",
+    "value": QUERY_WITH_HYBRID_RETRIEVER_SIMILARITY,
+}
+#######
+
 QUERY_WITH_CONTEXTUAL_COMPRESSION_RETRIEVER = {
     "collection_name": "example",
     "query": "Расскажи в деталях все виды ответственности, связанные с утечками персональных данных",
@@ -219,6 +248,24 @@ QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY_PAYLOAD = {
 #######
 
 
+QUERY_WITH_MULTI_QUERY_RETRIEVER_STREAMING = {
+    **QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY,
+    "retriever_config": {
+        **QUERY_WITH_MULTI_QUERY_RETRIEVER_SIMILARITY["retriever_config"],
+        "stream_queries": True,
+        "deadline_sec": 5,
+    },
+}
+
+QUERY_WITH_MULTI_QUERY_RETRIEVER_STREAMING_PAYLOAD = {
+    "summary": "multi-query с поиском по мере генерации -> поиск по близости -> ответ",
+    "description": """
+        Поиск по исходному вопросу начинается сразу, каждый вариант вопроса ищется, как только LLM допишет его строку.
+        Через deadline_sec секунд возвращается то, что уже найдено.""",
+    "value": QUERY_WITH_MULTI_QUERY_RETRIEVER_STREAMING,
+}
+#######
+
 QUERY_WITH_MULTI_QUERY_RETRIEVER_MMR = {
     "collection_name": "example",
     "query": "Расскажи в деталях все виды ответственности, связанные с утечками персональных данных",
@@ -30,6 +30,18 @@ class VectorStoreRetrieverConfig(BaseModel):
         title="""Фильтрация по метаданным документа""",
     )
 
+    hnsw_ef: Optional[int] = Field(
+        default=None,
+        ge=1,
+        title="Число кандидатов при поиске по графу HNSW, по умолчанию - из профиля хранения коллекции",
+    )
+
+    oversampling: Optional[float] = Field(
+        default=None,
+        ge=1,
+        title="Oversampling поиска по квантованным векторам, по умолчанию - из профиля хранения коллекции",
+    )
+
     allowed_search_types: ClassVar[Collection[str]] = (
         "similarity",
         "similarity_score_threshold",
@@ -72,6 +84,16 @@ class MultiQueryRetrieverConfig(VectorStoreRetrieverConfig):
         title="LLM конфигурация для retriever",
     )
 
+    stream_queries: bool = Field(
+        default=False,
+        title="Искать каждый вариант вопроса, как только LLM допишет его строку, а исходный вопрос - сразу",
+    )
+
+    deadline_sec: Optional[float] = Field(
+        default=None,
+        title="Через сколько секунд вернуть уже найденное, не дожидаясь остальных вариантов (только для stream_queries)",
+    )
+
 
 class ContextualCompressionRetrieverConfig(VectorStoreRetrieverConfig):
     compressor_model_provider: str = Field(
@@ -96,6 +118,18 @@ class ContextualCompressionRetrieverConfig(VectorStoreRetrieverConfig):
         return value
 
 
+class HybridRetrieverConfig(VectorStoreRetrieverConfig):
+    lexical_k: int = Field(
+        default=20,
+        title="Число документов из индекса BM25, которые объединяются с результатами векторного поиска",
+    )
+
+    rrf_k: int = Field(
+        default=60,
+        title="Константа reciprocal rank fusion, чем больше, тем меньше вес первых мест",
+    )
+
+
 class ContextualCompressionMultiQueryRetrieverConfig(
     ContextualCompressionRetrieverConfig, MultiQueryRetrieverConfig
 ):
@@ -139,10 +173,15 @@ class ExampleQueryInput(BaseModel):
         "contextual-compression",
         "contextual-compression-multi-query",
         "lord-of-the-retrievers",
+        "hybrid",
     )
 
     stream: Optional[bool] = Field(title="Stream the results", default=False)
 
+    use_cache: Optional[bool] = Field(
+        title="Вернуть закэшированный ответ на похожий запрос, если он есть", default=True
+    )
+
     @model_validator(mode="before")
     def validate_retriever_type(cls, values: Dict) -> Dict:
         retriever_name = values.get("retriever_name")
@@ -176,6 +215,11 @@ class ExampleQueryInput(BaseModel):
                 **values.get("retriever_config")
             )
 
+        elif retriever_name == "hybrid":
+            values["retriever_config"] = HybridRetrieverConfig(
+                **values.get("retriever_config")
+            )
+
         return values
 
 
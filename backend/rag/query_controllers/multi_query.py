@@ -0,0 +1,248 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import async_timeout
+import numpy as np
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
+from langchain.retrievers.multi_query import DEFAULT_QUERY_PROMPT, LineListOutputParser
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.retrievers import BaseRetriever
+
+from backend.logger import logger
+from backend.rag.embedders.cache import CachedEmbeddings
+from backend.rag.vector_db.base import BaseVectorDB, SearchHit
+
+SEARCH_TYPES = ("similarity", "similarity_score_threshold", "mmr")
+
+
+def maximal_marginal_relevance(query_similarities: np.ndarray,
+                               similarities: np.ndarray,
+                               k: int,
+                               lambda_mult: float = 0.5) -> List[int]:
+    """
+    Жадный выбор MMR по заранее посчитанным косинусным близостям
+    Args:
+        query_similarities (np.ndarray): Близость запроса к каждому кандидату, (n,)
+        similarities (np.ndarray): Попарная близость кандидатов, (n, n)
+        k (int): Число выбираемых кандидатов
+        lambda_mult (float): 1 - только релевантность, 0 - только разнообразие
+    Returns:
+        List[int]: Индексы выбранных кандидатов в порядке выбора
+    """
+    n = len(query_similarities)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    selected = [int(np.argmax(query_similarities))]
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    # Max similarity of every candidate to the selected ones, updated with one row per step
+    redundancy = similarities[selected[0]].copy()
+    while len(selected) < k:
+        scores = lambda_mult * query_similarities - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarities[best], out=redundancy)
+    return selected
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class MultiQuerySearchRetriever(BaseRetriever):
+    """
+    Multi query поиск за один проход: LLM формулирует варианты вопроса, все варианты
+    векторизуются одним вызовом embedder'а и ищутся одним batch-запросом к векторной БД,
+    результаты объединяются по ID точки, MMR считается в numpy по полученным векторам.
+    С stream_queries исходный вопрос ищется сразу, а каждый вариант - как только LLM допишет его строку;
+    через deadline_sec возвращается то, что уже найдено.
+    """
+    vector_db: BaseVectorDB
+    collection_name: str
+    embeddings: Embeddings
+    # Without LLM only the original query is searched
+    llm: Optional[BaseLanguageModel] = None
+    include_original: bool = True
+    search_type: str = "similarity"
+    # k, fetch_k, lambda_mult, score_threshold, filter, search_params - as in VectorStoreRetriever
+    search_kwargs: Dict[str, Any] = {}
+    # Async only: search every paraphrase while the LLM is still generating
+    stream_queries: bool = False
+    # Seconds until the streamed paraphrases are abandoned, None - wait for all
+    deadline_sec: Optional[float] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_queries(self, query: str, generated: str) -> List[str]:
+        queries = LineListOutputParser().parse(generated) if generated else []
+        if self.include_original or not queries:
+            queries = [query, *queries]
+        # Keep the order, drop repeated paraphrases
+        return list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        embeddings = self.embeddings
+        # Query vectors are not worth caching next to the chunk vectors
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings = embeddings.embeddings
+        return np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+
+    def _get_search_params(self) -> Dict[str, Any]:
+        if self.search_type not in SEARCH_TYPES:
+            raise ValueError(f"search_type of {self.search_type} not allowed, expected one of {SEARCH_TYPES}")
+        k = self.search_kwargs.get("k", 4)
+        return {
+            "k": self.search_kwargs.get("fetch_k", 20) if self.search_type == "mmr" else k,
+            "query_filter": self.search_kwargs.get("filter"),
+            "with_vectors": self.search_type == "mmr",
+            "search_params": self.search_kwargs.get("search_params"),
+        }
+
+    def _merge(self, queries: List[str], query_vectors: np.ndarray, results: List[List[SearchHit]]) -> List[Document]:
+        # Deduplicate the hits of all queries by point ID, keep the best score
+        hits: Dict[str, SearchHit] = {}
+        for query_hits in results:
+            for hit in query_hits:
+                key = str(hit.document.metadata.get("_id") or hit.document.page_content)
+                if key not in hits or hit.score > hits[key].score:
+                    hits[key] = hit
+        logger.debug(
+            f"[MultiQuerySearch] {len(queries)} queries, {sum(map(len, results))} hits, {len(hits)} unique"
+        )
+        if self.search_type == "similarity_score_threshold":
+            threshold = self.search_kwargs.get("score_threshold")
+            if threshold is not None:
+                hits = {key: hit for key, hit in hits.items() if hit.score >= threshold}
+
+        candidates = list(hits.values())
+        if self.search_type != "mmr":
+            return [hit.document for hit in sorted(candidates, key=lambda hit: hit.score, reverse=True)]
+        if not candidates:
+            return []
+
+        # MMR for every query over the shared candidates, the union as with one retriever per query
+        vectors = _normalize(np.asarray([hit.vector for hit in candidates], dtype=np.float32))
+        similarities = vectors @ vectors.T
+        query_similarities = _normalize(query_vectors) @ vectors.T
+        k = self.search_kwargs.get("k", 4)
+        lambda_mult = self.search_kwargs.get("lambda_mult", 0.5)
+        selected: Dict[int, None] = {}
+        for row in query_similarities:
+            selected.update(dict.fromkeys(maximal_marginal_relevance(row, similarities, k, lambda_mult)))
+        return [candidates[i].document for i in selected]
+
+    def _get_relevant_documents(self,
+                                query: str,
+                                *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        generated = ""
+        if self.llm is not None:
+            generated = (DEFAULT_QUERY_PROMPT | self.llm).invoke(
+                {"question": query}, config={"callbacks": run_manager.get_child()}
+            )
+            generated = getattr(generated, "content", generated)
+        queries = self._get_queries(query, generated)
+        query_vectors = self._embed_queries(queries)
+        results = self.vector_db.search_batch(self.collection_name, query_vectors, **self._get_search_params())
+        return self._merge(queries, query_vectors, results)
+
+    async def _astream_queries(self,
+                               query: str,
+                               run_manager: AsyncCallbackManagerForRetrieverRun) -> AsyncIterator[str]:
+        # Yield every paraphrase as soon as its line is complete
+        buffer = ""
+        async for chunk in (DEFAULT_QUERY_PROMPT | self.llm).astream(
+                {"question": query}, config={"callbacks": run_manager.get_child()}
+        ):
+            buffer += getattr(chunk, "content", chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line
+        yield buffer
+
+    async def _asearch_query(self, query: str, search_params: Dict[str, Any]) -> Tuple[str, np.ndarray, List[SearchHit]]:
+        query_vectors = await asyncio.to_thread(self._embed_queries, [query])
+        results = await self.vector_db.asearch_batch(self.collection_name, query_vectors, **search_params)
+        return query, query_vectors[0], results[0]
+
+    async def _aget_streaming_documents(self,
+                                        query: str,
+                                        run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        search_params = self._get_search_params()
+        searches: Dict[str, asyncio.Task] = {}
+
+        def start_search(text: str):
+            text = text.strip()
+            if text and text not in searches:
+                searches[text] = asyncio.create_task(self._asearch_query(text, search_params))
+
+        async def generate():
+            async for line in self._astream_queries(query, run_manager):
+                start_search(line)
+
+        # A blank query is still searched as is, paraphrases never take its key
+        original = asyncio.create_task(self._asearch_query(query.strip() or query, search_params))
+        searches[query.strip()] = original
+        generation = asyncio.create_task(generate()) if self.llm is not None else None
+        try:
+            async with async_timeout.timeout(self.deadline_sec):
+                if generation is not None:
+                    try:
+                        await generation
+                    except Exception as e:
+                        # The searches already started are still awaited
+                        logger.warning(f"[MultiQuerySearch] Query generation failed: {e}")
+                # Unlike gather, wait does not cancel the original search on timeout
+                await asyncio.wait(searches.values())
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[MultiQuerySearch] Deadline of {self.deadline_sec} s exceeded, "
+                f"{sum(search.done() for search in searches.values())} of {len(searches)} searches done"
+            )
+        except BaseException:
+            # E.g. the request is cancelled: nothing awaits the original search any more
+            original.cancel()
+            raise
+        finally:
+            for task in [generation, *searches.values()]:
+                if task is not None and task is not original and not task.done():
+                    task.cancel()
+        # The original query is always answered
+        await original
+
+        done = []
+        for text, search in searches.items():
+            if not search.done() or search.cancelled():
+                continue
+            if search.exception() is not None:
+                logger.warning(f"[MultiQuerySearch] Search for '{text}' failed: {search.exception()}")
+                continue
+            done.append(search.result())
+        queries, query_vectors, results = zip(*done)
+        return self._merge(list(queries), np.stack(query_vectors), list(results))
+
+    async def _aget_relevant_documents(self,
+                                       query: str,
+                                       *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        if self.stream_queries:
+            return await self._aget_streaming_documents(query, run_manager)
+        generated = ""
+        if self.llm is not None:
+            generated = await (DEFAULT_QUERY_PROMPT | self.llm).ainvoke(
+                {"question": query}, config={"callbacks": run_manager.get_child()}
+            )
+            generated = getattr(generated, "content", generated)
+        queries = self._get_queries(query, generated)
+        query_vectors = await asyncio.to_thread(self._embed_queries, queries)
+        results = await self.vector_db.asearch_batch(
+            self.collection_name, query_vectors, **self._get_search_params()
+        )
+        return self._merge(queries, query_vectors, results)
@@ -9,6 +9,10 @@ reranker = MxBaiReranker(model="mixedbread-ai/mxbai-rerank-base-v1", top_k=3)  #
 res = parser.get_chunks("data/Постановление Правительства РФ от 16.03.2009 N 228.pdf", metadata=dict())
 doc = asyncio.run(res)
 reranker.compress_documents(doc, query="Финансовое обеспечение расходов на содержание")
+# В async коде модель выполняется в пуле потоков и не блокирует event loop
+await reranker.acompress_documents(doc, query="Финансовое обеспечение расходов на содержание")
 ```
+Загруженные модели кэшируются на процесс (`get_cross_encoder`), размер батча, максимальная длина
+и int8 квантизация задаются параметрами `RERANKER_*` в настройках.
 """
-from backend.rag.reranker.mxbai_reranker import MxBaiReranker
+from backend.rag.reranker.mxbai_reranker import MxBaiReranker, get_cross_encoder
@@ -1,10 +1,81 @@
-from typing import Optional, Sequence
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
 
 from langchain.callbacks.manager import Callbacks
 from langchain.docstore.document import Document
 from langchain.retrievers.document_compressors.base import BaseDocumentCompressor
 from sentence_transformers import CrossEncoder
 
+from backend.logger import logger
+from backend.settings import settings
+
+# A process-wide LRU cache of the loaded cross-encoders.
+# Key is (model name, max sequence length, quantized).
+RERANKER_CACHE: "OrderedDict[Tuple[str, Optional[int], bool], CrossEncoder]" = OrderedDict()
+_RERANKER_CACHE_LOCK = threading.Lock()
+# One lock per model being loaded: loads of other models and cache hits do not wait for it
+_RERANKER_LOAD_LOCKS: Dict[Tuple[str, Optional[int], bool], threading.Lock] = {}
+# Reranking is CPU/GPU bound, so the number of concurrent calls is limited
+RERANKER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.RERANKER_WORKERS, thread_name_prefix="reranker"
+)
+
+
+def _quantize(model: CrossEncoder) -> CrossEncoder:
+    """
+    Динамическая int8 квантизация Linear слоев для инференса на CPU
+    """
+    import torch
+
+    model.model = torch.quantization.quantize_dynamic(
+        model.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return model
+
+
+def get_cross_encoder(model_name: str, max_length: Optional[int] = None, quantize: bool = False) -> CrossEncoder:
+    """
+    Возвращает CrossEncoder из кэша процесса, загружая его при первом обращении
+    Args:
+        model_name (str): Имя или путь к модели
+        max_length (Optional[int]): Максимальная длина последовательности (запрос + документ)
+        quantize (bool): Квантизовать модель в int8 (только CPU)
+    Returns:
+        CrossEncoder: Модель reranker'а
+    """
+    key = (model_name, max_length, quantize)
+    with _RERANKER_CACHE_LOCK:
+        if key in RERANKER_CACHE:
+            RERANKER_CACHE.move_to_end(key)
+            return RERANKER_CACHE[key]
+        load_lock = _RERANKER_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    # The model is loaded once, concurrent callers of the same key wait for it
+    with load_lock:
+        with _RERANKER_CACHE_LOCK:
+            if key in RERANKER_CACHE:
+                RERANKER_CACHE.move_to_end(key)
+                return RERANKER_CACHE[key]
+
+        logger.info(f"Loading reranker {model_name} (max_length={max_length}, quantize={quantize})")
+        try:
+            model = CrossEncoder(model_name, max_length=max_length, device="cpu" if quantize else None)
+            if quantize:
+                model = _quantize(model)
+            with _RERANKER_CACHE_LOCK:
+                RERANKER_CACHE[key] = model
+                while len(RERANKER_CACHE) > settings.RERANKER_CACHE_MAX_MODELS:
+                    evicted_key, _ = RERANKER_CACHE.popitem(last=False)
+                    logger.info(f"Evicted reranker {evicted_key[0]} from cache")
+        finally:
+            with _RERANKER_CACHE_LOCK:
+                if _RERANKER_LOAD_LOCKS.get(key) is load_lock:
+                    _RERANKER_LOAD_LOCKS.pop(key)
+    return model
+
 
 # More about why re-ranking is essential: https://www.mixedbread.ai/blog/mxbai-rerank-v1
 class MxBaiReranker(BaseDocumentCompressor):
@@ -13,6 +84,9 @@ class MxBaiReranker(BaseDocumentCompressor):
     """
     model: str
     top_k: int = 3
+    batch_size: int = settings.RERANKER_BATCH_SIZE
+    max_length: Optional[int] = settings.RERANKER_MAX_LENGTH or None
+    quantize: bool = settings.RERANKER_QUANTIZE
 
     def compress_documents(self,
                            documents: Sequence[Document],
@@ -20,9 +94,13 @@ class MxBaiReranker(BaseDocumentCompressor):
                            callbacks: Optional[Callbacks] = None,
                            ) -> Sequence[Document]:
         """Сжатие полученного документа с учетом контекста запроса."""
-        model = CrossEncoder(self.model)
+        if not documents:
+            return []
+        model = get_cross_encoder(self.model, max_length=self.max_length, quantize=self.quantize)
         docs = [doc.page_content for doc in documents]
-        reranked_docs = model.rank(query, docs, return_documents=True, top_k=self.top_k)
+        reranked_docs = model.rank(
+            query, docs, return_documents=True, top_k=self.top_k, batch_size=self.batch_size
+        )
 
         documents = [
             Document(
@@ -31,3 +109,14 @@ class MxBaiReranker(BaseDocumentCompressor):
             for doc in reranked_docs
         ]
         return documents
+
+    async def acompress_documents(self,
+                                  documents: Sequence[Document],
+                                  query: str,
+                                  callbacks: Optional[Callbacks] = None,
+                                  ) -> Sequence[Document]:
+        """Асинхронное сжатие, модель выполняется в пуле потоков reranker'а."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            RERANKER_EXECUTOR, self.compress_documents, documents, query, callbacks
+        )
@@ -72,6 +72,7 @@ class LoadedDataPoint(DataPoint):
     Дополнительные аттрибуты:
     - local_filepath (str): путь к файлу с точкой данных
     - file_extension (str): расширение файла с точкой данных
+    - delete_after_processing (bool): удалить ли файл после парсинга (False, если это оригинал из источника)
     """
     local_filepath: str = Field(
         title="Local file path of the loaded data point",
@@ -79,6 +80,10 @@ class LoadedDataPoint(DataPoint):
     file_extension: Optional[str] = Field(
         title="File extension of the loaded data point",
     )
+    delete_after_processing: bool = Field(
+        title="Whether the local file is a temporary copy to be deleted after parsing",
+        default=True,
+    )
 
 
 class EmbedderConfig(BaseModel):
@@ -229,6 +234,39 @@ class DataIngestionRun(BaseDataIngestionRun):
     status: Optional[DataIngestionRunStatus] = Field(
         title="Status of the data ingestion run",
     )
+    metrics: Optional[Dict[str, Any]] = Field(
+        title="Last logged metrics (progress) of the data ingestion run",
+        default=None,
+    )
+    created_at: Optional[float] = Field(
+        title="Unix time of the data ingestion run creation",
+        default=None,
+    )
+    updated_at: Optional[float] = Field(
+        title="Unix time of the last status or progress update of the data ingestion run",
+        default=None,
+    )
+
+
+class DataIngestionRunCheckpoint(BaseModel):
+    """
+    Checkpoint задачи приема данных: точки данных, уже записанные в векторную БД
+    """
+    data_ingestion_run_name: str = Field(
+        title="Name of the data ingestion run",
+    )
+    last_batch: int = Field(
+        title="Number of the last batch upserted to the vector store",
+        default=0,
+    )
+    data_point_hashes: Dict[str, str] = Field(
+        title="Hashes of the upserted data points by their fqn",
+        default_factory=dict,
+    )
+    counters: Dict[str, Any] = Field(
+        title="Counters of the data ingestion run at the last batch",
+        default_factory=dict,
+    )
 
 
 class BaseDataSource(BaseModel):
@@ -343,6 +381,40 @@ class UnassociateDataSourceWithCollectionDto(BaseModel):
     )
 
 
+class VectorStorageConfig(BaseModel):
+    """
+    Профиль хранения векторов коллекции: квантование, хранение на диске и параметры HNSW.
+    hnsw_ef и oversampling - значения по умолчанию для поиска, запрос может их переопределить.
+    """
+    quantization: Optional[Literal["scalar", "binary"]] = Field(
+        title="Квантование векторов: scalar (int8) или binary, None - без квантования", default=None,
+    )
+    quantization_always_ram: bool = Field(
+        title="Держать квантованные векторы в RAM", default=True,
+    )
+    rescore: bool = Field(
+        title="Пересчитывать score найденных по квантованным векторам точек по исходным векторам", default=True,
+    )
+    on_disk: Optional[bool] = Field(
+        title="Хранить исходные векторы на диске, None - по умолчанию векторной БД", default=None,
+    )
+    on_disk_payload: Optional[bool] = Field(
+        title="Хранить payload на диске, None - по умолчанию векторной БД", default=None,
+    )
+    hnsw_m: Optional[int] = Field(
+        title="Число связей узла графа HNSW", ge=0, default=None,
+    )
+    hnsw_ef_construct: Optional[int] = Field(
+        title="Число кандидатов при построении графа HNSW", ge=4, default=None,
+    )
+    hnsw_ef: Optional[int] = Field(
+        title="Число кандидатов при поиске по графу HNSW", ge=1, default=None,
+    )
+    oversampling: Optional[float] = Field(
+        title="Во сколько раз больше точек искать по квантованным векторам перед rescoring", ge=1, default=None,
+    )
+
+
 class BaseCollection(BaseModel):
     """
     Базовая конфигурация коллекции
@@ -358,6 +430,9 @@ class BaseCollection(BaseModel):
     embedder_config: EmbedderConfig = Field(
         title="Embedder configuration", default_factory=dict
     )
+    storage_config: VectorStorageConfig = Field(
+        title="Vector storage profile", default_factory=VectorStorageConfig
+    )
 
 
 class CreateCollection(BaseCollection):
@@ -8,13 +8,18 @@ VECTOR_STORE_CLIENT.get_collections()
 # ...
 ```
 ```python
+from backend.rag.vector_db.modules.local import LocalVectorDB
 from backend.rag.vector_db.modules.qdrant import QdrantVectorDB
+from backend.rag.schemas import VectorStorageConfig
 from backend.settings import settings
 
 db = QdrantVectorDB(settings.VECTOR_DB_CONFIG)
 # ...
 embedder = get_embedder(embedder_config)
 db.create_collection("example", embedder)
+# Большая коллекция: int8 векторы в RAM, исходные на диске
+db.create_collection("large", embedder, VectorStorageConfig(quantization="scalar", on_disk=True, oversampling=2.0))
+search_params = db.get_search_params(VectorStorageConfig(quantization="scalar", oversampling=2.0), hnsw_ef=128)
 db.get_collections()
 client = db.get_vector_client()
 # ...
@@ -23,13 +28,32 @@ doc = asyncio.run(res)
 db.upsert_documents("example", doc, embedder)
 # в GUI видно, что вставились
 ```
+Асинхронный API (поиск не блокирует event loop):
+```python
+await db.aupsert_documents("example", doc, embedder)
+docs_and_scores = await db.asearch("example", embedder.embed_query("запрос"), k=4)
+async for batch in db.aiter_data_point_vectors("example", data_source_fqn):
+    ...
+```
+Нагрузочный тест: `python -m backend.rag.vector_db.benchmark --help`
+
+Локальная векторная БД без сервера (тесты, CI, установка на одном узле),
+`VECTORDB_PROVIDER=local`:
+```python
+db = LocalVectorDB({"path": "./local_vector_db"})
+# HNSW вместо плоского индекса, нужен `pip install hnswlib`
+db = LocalVectorDB({"path": "./local_vector_db", "hnsw": {"m": 16, "ef_construction": 200, "ef": 64}})
+```
+Полнота и задержка HNSW против полного перебора: `python -m backend.rag.vector_db.local_benchmark --help`
 """
 from backend.rag.vector_db.base import BaseVectorDB
+from backend.rag.vector_db.modules.local import LocalVectorDB
 from backend.rag.vector_db.modules.qdrant import QdrantVectorDB
 from backend.rag.schemas import VectorDBConfig
 
 SUPPORTED_VECTOR_DBS = {
     "qdrant": QdrantVectorDB,
+    "local": LocalVectorDB,
 }
 
 
@@ -1,19 +1,46 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple, Union
 
+import numpy as np
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
 from langchain.schema.vectorstore import VectorStore
 
 from backend.constants import DEFAULT_BATCH_SIZE_FOR_VECTOR_STORE
-from backend.rag.schemas import DataPointVector
+from backend.rag.schemas import DataPointVector, VectorStorageConfig
+
+
+class DataPointVectorBatch(NamedTuple):
+    """
+    Батч векторов точек данных в колоночном виде
+    """
+    ids: List[str]
+    data_point_fqns: List[str]
+    data_point_hashes: List[str]
+
+
+class SearchHit(NamedTuple):
+    """
+    Результат поиска: документ, score и вектор точки, если он запрошен
+    """
+    document: Document
+    score: float
+    vector: Optional[List[float]] = None
 
 
 class BaseVectorDB(ABC):
     @abstractmethod
-    def create_collection(self, collection_name: str, embeddings: Embeddings):
+    def create_collection(self,
+                          collection_name: str,
+                          embeddings: Embeddings,
+                          storage_config: Optional[VectorStorageConfig] = None):
         """
         Создает коллекцию в векторной БД
+        Args:
+            collection_name (str): Имя коллекции
+            embeddings (Embeddings): Embedder, по нему определяется размерность векторов
+            storage_config (VectorStorageConfig): Профиль хранения векторов, None - по умолчанию
         """
         raise NotImplementedError()
 
@@ -22,12 +49,116 @@ class BaseVectorDB(ABC):
                          collection_name: str,
                          documents: List[Document],
                          embeddings: Embeddings,
-                         incremental: bool = True):
+                         incremental: bool = True,
+                         vectors: Optional[Union[np.ndarray, List[List[float]]]] = None,
+                         wait: bool = True):
+        """
+        Загружает документы в векторную БД.
+        Если переданы vectors (векторы документов в том же порядке), embeddings не вычисляются заново.
+        При wait=False запись не дожидается применения, см. wait_for_pending_updates.
+        """
+        raise NotImplementedError()
+
+    async def aupsert_documents(self,
+                                collection_name: str,
+                                documents: List[Document],
+                                embeddings: Embeddings,
+                                incremental: bool = True,
+                                vectors: Optional[Union[np.ndarray, List[List[float]]]] = None,
+                                wait: bool = True):
         """
-        Загружает документы в векторную БД
+        Асинхронная версия upsert_documents. По умолчанию выполняется в отдельном потоке.
+        """
+        await asyncio.to_thread(
+            self.upsert_documents, collection_name, documents, embeddings, incremental, vectors, wait
+        )
+
+    def wait_for_pending_updates(self, collection_name: str):
+        """
+        Дожидается применения всех обновлений коллекции, отправленных с wait=False
+        """
+        pass
+
+    async def await_for_pending_updates(self, collection_name: str):
+        """
+        Асинхронная версия wait_for_pending_updates
+        """
+        await asyncio.to_thread(self.wait_for_pending_updates, collection_name)
+
+    async def asearch(self,
+                      collection_name: str,
+                      query_vector: List[float],
+                      k: int = 4,
+                      query_filter: Optional[Any] = None) -> List[Tuple[Document, float]]:
+        """
+        Асинхронный поиск k ближайших документов по вектору запроса
+        Args:
+            collection_name (str): Имя коллекции
+            query_vector (List[float]): Embedding запроса
+            k (int): Число документов
+            query_filter: Фильтр в формате векторной БД
+        Returns:
+            List[Tuple[Document, float]]: Документы и их score
         """
         raise NotImplementedError()
 
+    def search_batch(self,
+                     collection_name: str,
+                     query_vectors: Union[np.ndarray, List[List[float]]],
+                     k: int = 4,
+                     query_filter: Optional[Any] = None,
+                     with_vectors: bool = False,
+                     search_params: Optional[Any] = None) -> List[List[SearchHit]]:
+        """
+        Поиск k ближайших документов для нескольких векторов запросов одним обращением к векторной БД
+        Args:
+            collection_name (str): Имя коллекции
+            query_vectors: Embeddings запросов
+            k (int): Число документов на запрос
+            query_filter: Фильтр в формате векторной БД, общий для всех запросов
+            with_vectors (bool): Вернуть векторы найденных точек
+            search_params: Параметры поиска из `get_search_params`
+        Returns:
+            List[List[SearchHit]]: Результаты каждого запроса
+        """
+        raise NotImplementedError()
+
+    async def asearch_batch(self,
+                            collection_name: str,
+                            query_vectors: Union[np.ndarray, List[List[float]]],
+                            k: int = 4,
+                            query_filter: Optional[Any] = None,
+                            with_vectors: bool = False,
+                            search_params: Optional[Any] = None) -> List[List[SearchHit]]:
+        """
+        Асинхронная версия search_batch. По умолчанию выполняется в отдельном потоке.
+        """
+        return await asyncio.to_thread(
+            self.search_batch, collection_name, query_vectors, k, query_filter, with_vectors, search_params
+        )
+
+    def get_search_params(self,
+                          storage_config: VectorStorageConfig,
+                          hnsw_ef: Optional[int] = None,
+                          oversampling: Optional[float] = None) -> Optional[Any]:
+        """
+        Параметры поиска по коллекции с профилем хранения storage_config.
+        Передаются в `search_batch` и vector store как search_kwargs["search_params"].
+        Args:
+            storage_config (VectorStorageConfig): Профиль хранения коллекции
+            hnsw_ef (int): Число кандидатов HNSW, None - из профиля
+            oversampling (float): Oversampling квантованного поиска, None - из профиля
+        Returns:
+            Параметры поиска в формате векторной БД, None - параметры по умолчанию
+        """
+        return None
+
+    def get_async_vector_client(self):
+        """
+        Возвращает асинхронный vector client, если векторная БД его поддерживает
+        """
+        return None
+
     @abstractmethod
     def get_collections(self) -> List[str]:
         """
@@ -69,6 +200,38 @@ class BaseVectorDB(ABC):
         """
         raise NotImplementedError()
 
+    def iter_data_point_vectors(self,
+                                collection_name: str,
+                                data_source_fqn: str,
+                                batch_size: int = DEFAULT_BATCH_SIZE_FOR_VECTOR_STORE,
+                                ) -> Iterator[DataPointVectorBatch]:
+        """
+        Возвращает векторы точек данных источника батчами, не загружая их все в память
+        """
+        data_point_vectors = self.list_data_point_vectors(collection_name, data_source_fqn, batch_size)
+        for i in range(0, len(data_point_vectors), batch_size):
+            batch = data_point_vectors[i: i + batch_size]
+            yield DataPointVectorBatch(
+                ids=[vector.data_point_vector_id for vector in batch],
+                data_point_fqns=[vector.data_point_fqn for vector in batch],
+                data_point_hashes=[vector.data_point_hash for vector in batch],
+            )
+
+    async def aiter_data_point_vectors(self,
+                                       collection_name: str,
+                                       data_source_fqn: str,
+                                       batch_size: int = DEFAULT_BATCH_SIZE_FOR_VECTOR_STORE,
+                                       ) -> AsyncIterator[DataPointVectorBatch]:
+        """
+        Асинхронная версия iter_data_point_vectors. По умолчанию батчи читаются в отдельном потоке.
+        """
+        iterator = self.iter_data_point_vectors(collection_name, data_source_fqn, batch_size)
+        while True:
+            batch = await asyncio.to_thread(next, iterator, None)
+            if batch is None:
+                break
+            yield batch
+
     @abstractmethod
     def delete_data_point_vectors(self,
                                   collection_name: str,
@@ -78,3 +241,10 @@ class BaseVectorDB(ABC):
         Удаляет векторы из коллекции
         """
         raise NotImplementedError()
+
+    @abstractmethod
+    def delete_documents(self, collection_name: str, document_ids: List[str]):
+        """
+        Удаляет все векторы точек данных с заданными fqn
+        """
+        raise NotImplementedError()
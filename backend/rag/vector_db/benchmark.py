@@ -0,0 +1,103 @@
+"""
+Нагрузочный тест поиска в Qdrant: синхронный клиент в async обработчике
+против AsyncQdrantClient при одинаковом числе одновременных запросов.
+
+```bash
+python -m backend.rag.vector_db.benchmark --url http://localhost:6333 --concurrency 32 --requests 2000
+```
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+
+
+def get_latency_stats(latencies: List[float], total_sec: float) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "rps": len(latencies) / total_sec,
+    }
+
+
+async def run_load(search: Callable[[List[float]], Awaitable], queries: np.ndarray,
+                   concurrency: int) -> Dict[str, float]:
+    """
+    Выполняет поиск по всем запросам, не более concurrency одновременно
+    Args:
+        search: Корутина поиска по вектору
+        queries (np.ndarray): Векторы запросов
+        concurrency (int): Число одновременных запросов
+    Returns:
+        Dict[str, float]: p50/p99 задержки в мс и пропускная способность
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def request(query: List[float]):
+        async with semaphore:
+            start = time.perf_counter()
+            await search(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[request(query) for query in queries.tolist()])
+    return get_latency_stats(latencies, time.perf_counter() - start)
+
+
+def create_benchmark_collection(client: QdrantClient, collection_name: str, points: int, dim: int):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+    )
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=np.random.rand(points, dim).astype(np.float32),
+        payload=[{"page_content": f"document {i}", "metadata": {}} for i in range(points)],
+        wait=True,
+    )
+
+
+async def main(args: argparse.Namespace):
+    prefer_grpc = not args.url.startswith("https://")
+    client = QdrantClient(url=args.url, port=args.port, prefer_grpc=prefer_grpc)
+    async_client = AsyncQdrantClient(url=args.url, port=args.port, prefer_grpc=prefer_grpc)
+    collection_name = f"benchmark_{uuid.uuid4().hex[:8]}"
+    create_benchmark_collection(client, collection_name, args.points, args.dim)
+    queries = np.random.rand(args.requests, args.dim).astype(np.float32)
+
+    async def sync_search(query: List[float]):
+        # What a handler does when it calls the sync client directly
+        return client.search(collection_name=collection_name, query_vector=query, limit=args.k)
+
+    async def async_search(query: List[float]):
+        return await async_client.search(collection_name=collection_name, query_vector=query, limit=args.k)
+
+    try:
+        for name, search in (("sync", sync_search), ("async", async_search)):
+            stats = await run_load(search, queries, args.concurrency)
+            print(
+                f"{name:>6}: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+                f"{stats['rps']:.1f} req/s"
+            )
+    finally:
+        client.delete_collection(collection_name)
+        await async_client.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Qdrant sync vs async search latency under load")
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""
+Полнота (recall@k) и задержка поиска LocalVectorDB: HNSW при разных ef
+и плоский индекс против полного перебора в numpy.
+
+```bash
+pip install hnswlib
+python -m backend.rag.vector_db.local_benchmark --points 100000 --dim 768 --ef 16 64 128
+```
+"""
+import argparse
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain.docstore.document import Document
+from qdrant_client import models
+
+from backend.constants import DATA_SOURCE_FQN_METADATA_KEY
+from backend.rag.vector_db.benchmark import get_latency_stats
+from backend.rag.vector_db.modules.local import LocalCollection, hnswlib
+
+DATA_SOURCES = 10
+
+
+def get_exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Полный перебор: индексы k ближайших по косинусной близости для каждого запроса
+    """
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def run_queries(collection: LocalCollection, queries: np.ndarray, k: int, truth: np.ndarray,
+                exact: bool = False, query_filter: Optional[models.Filter] = None) -> Dict[str, float]:
+    """
+    Выполняет запросы по очереди
+    Args:
+        collection (LocalCollection): Коллекция
+        queries (np.ndarray): Векторы запросов
+        k (int): Число ближайших
+        truth (np.ndarray): Точные k ближайших для каждого запроса
+        exact (bool): Полный перебор в коллекции вместо HNSW
+        query_filter (models.Filter): Фильтр по payload
+    Returns:
+        Dict[str, float]: recall@k, p50/p99 задержки в мс и пропускная способность
+    """
+    latencies: List[float] = []
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        query_start = time.perf_counter()
+        rows, _ = collection.search(query, k=k, query_filter=query_filter, exact=exact)
+        latencies.append(time.perf_counter() - query_start)
+        hits += len(set(rows.tolist()) & set(expected.tolist()))
+    return {"recall": hits / truth.size, **get_latency_stats(latencies, time.perf_counter() - start)}
+
+
+def print_stats(name: str, stats: Dict[str, float]):
+    print(
+        f"{name:>16}: recall@k {stats['recall']:.4f}, p50 {stats['p50_ms']:.2f} ms, "
+        f"p99 {stats['p99_ms']:.2f} ms, {stats['rps']:.1f} req/s"
+    )
+
+
+def main(args: argparse.Namespace):
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.points, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    if args.clusters:
+        # Embeddings of real texts are clustered, isotropic noise is the worst case for HNSW
+        centers = 2 * rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+        vectors += centers[rng.integers(args.clusters, size=args.points)]
+        queries += centers[rng.integers(args.clusters, size=args.queries)]
+    data_sources = np.arange(args.points) % DATA_SOURCES
+    documents = [
+        Document(page_content=f"document {i}", metadata={DATA_SOURCE_FQN_METADATA_KEY: f"benchmark::{source}"})
+        for i, source in enumerate(data_sources)
+    ]
+    hnsw_config = {"m": args.m, "ef_construction": args.ef_construction} if hnswlib is not None else None
+    if hnsw_config is None:
+        print("hnswlib is not installed, only the flat index is measured")
+
+    with tempfile.TemporaryDirectory() as path:
+        collection = LocalCollection(path, hnsw_config, dim=args.dim)
+        start = time.perf_counter()
+        for i in range(0, args.points, args.batch_size):
+            collection.upsert(
+                [str(j) for j in range(i, min(i + args.batch_size, args.points))],
+                documents[i: i + args.batch_size],
+                vectors[i: i + args.batch_size],
+                wait=False,
+            )
+        collection.flush()
+        print(f"Indexed {args.points} points of dim {args.dim} in {time.perf_counter() - start:.1f} s")
+
+        # Point rows are their positions in the data set
+        truth = get_exact_neighbours(vectors, queries, args.k)
+        print_stats("flat", run_queries(collection, queries, args.k, truth, exact=True))
+        if collection.hnsw is not None:
+            for ef in args.ef:
+                collection.hnsw_config["ef"] = ef
+                print_stats(f"hnsw ef={ef}", run_queries(collection, queries, args.k, truth))
+
+        # Filtered search goes over the matching rows only
+        source_rows = np.flatnonzero(data_sources == 0)
+        filtered_truth = source_rows[get_exact_neighbours(vectors[source_rows], queries, args.k)]
+        query_filter = models.Filter(must=[
+            models.FieldCondition(
+                key=f"metadata.{DATA_SOURCE_FQN_METADATA_KEY}",
+                match=models.MatchValue(value="benchmark::0"),
+            ),
+        ])
+        print_stats("filtered", run_queries(collection, queries, args.k, filtered_truth, query_filter=query_filter))
+        collection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LocalVectorDB recall and latency against brute force")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--clusters", type=int, default=100, help="0 for isotropic random vectors")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
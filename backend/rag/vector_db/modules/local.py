@@ -0,0 +1,703 @@
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
+from langchain.schema.vectorstore import VectorStore
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from qdrant_client import models
+
+from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_POINT_HASH_METADATA_KEY, \
+    DATA_SOURCE_FQN_METADATA_KEY
+from backend.logger import logger
+from backend.rag.embedders.cache import CachedEmbeddings
+from backend.rag.vector_db.base import BaseVectorDB, DataPointVectorBatch, SearchHit
+from backend.rag.vector_db.utils import get_filter_sql, get_outdated_chunks_selector, get_point_id
+from backend.rag.schemas import DataPointVector, VectorStorageConfig
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+BATCH_SIZE = 1000
+# Row ids per SQL statement, below the SQLite host parameter limit
+SQL_BATCH_SIZE = 500
+MIN_CAPACITY = 1024
+PAYLOAD_FILE = "payload.sqlite"
+VECTORS_FILE = "vectors.f32"
+HNSW_FILE = "hnsw.bin"
+DEFAULT_HNSW_CONFIG = {"m": 16, "ef_construction": 200, "ef": 64}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS points (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    data_point_fqn TEXT,
+    data_source_fqn TEXT,
+    data_point_hash TEXT,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS points_data_point_fqn ON points (data_point_fqn);
+CREATE INDEX IF NOT EXISTS points_data_source_fqn ON points (data_source_fqn);
+"""
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    # Cosine similarity becomes a dot product
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _to_filter(query_filter: Optional[Union[models.Filter, dict]]) -> Optional[models.Filter]:
+    if isinstance(query_filter, dict):
+        return models.Filter.model_validate(query_filter) if query_filter else None
+    return query_filter
+
+
+class LocalCollection:
+    """
+    Коллекция LocalVectorDB в своем каталоге: payload в SQLite, нормированные векторы
+    в memory-mapped файле float32 (строка точки в таблице = строка в файле),
+    опционально граф HNSW (hnswlib) поверх тех же строк.
+    Все операции идут под одной блокировкой, коллекцию открывает один процесс.
+    """
+
+    def __init__(self, path: str, hnsw_config: Optional[dict] = None, dim: Optional[int] = None):
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(path, PAYLOAD_FILE), check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        if dim is not None:
+            self._set_meta("dim", dim)
+            self.connection.commit()
+        self.dim = int(self._get_meta("dim"))
+        # Rows are never reused, deleted points leave holes
+        self.rows = int(self._get_meta("rows", 0))
+        self.version = int(self._get_meta("version", 0))
+
+        self.vectors_path = os.path.join(path, VECTORS_FILE)
+        self.vectors: Optional[np.memmap] = None
+        self.live = np.zeros(0, dtype=bool)
+        capacity = os.path.getsize(self.vectors_path) // (self.dim * 4) if os.path.exists(self.vectors_path) else 0
+        self._map_vectors(max(capacity, self.rows, MIN_CAPACITY))
+        live_rows = np.fromiter((row for row, in self.connection.execute("SELECT row FROM points")), dtype=np.int64)
+        self.live[live_rows] = True
+
+        self.hnsw = None
+        self.hnsw_config = None
+        if hnsw_config is not None:
+            if hnswlib is None:
+                logger.warning(f"[LocalVectorDB] hnswlib is not installed, {path} uses the flat index")
+            else:
+                self.hnsw_config = {**DEFAULT_HNSW_CONFIG, **hnsw_config}
+                self._load_hnsw()
+
+    def _get_meta(self, key: str, default: Any = None) -> Any:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def _set_meta(self, key: str, value: Any):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _map_vectors(self, capacity: int):
+        self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self.live)] = self.live[:capacity]
+        self.live = live
+        self.capacity = capacity
+
+    def _reserve(self, rows: int):
+        if rows <= self.capacity:
+            return
+        if self.vectors is not None:
+            self.vectors.flush()
+        self._map_vectors(max(rows, 2 * self.capacity, MIN_CAPACITY))
+        if self.hnsw is not None:
+            self.hnsw.resize_index(self.capacity)
+
+    def _load_hnsw(self):
+        hnsw_path = os.path.join(self.path, HNSW_FILE)
+        self.hnsw = hnswlib.Index(space="ip", dim=self.dim)
+        if os.path.exists(hnsw_path) and int(self._get_meta("hnsw_version", -1)) == self.version:
+            self.hnsw.load_index(hnsw_path, max_elements=self.capacity)
+        else:
+            # The graph is missing or older than the vectors
+            logger.debug(f"[LocalVectorDB] Building HNSW index for {self.path}")
+            self.hnsw.init_index(
+                max_elements=self.capacity,
+                M=self.hnsw_config["m"],
+                ef_construction=self.hnsw_config["ef_construction"],
+            )
+            live_rows = np.flatnonzero(self.live)
+            for i in range(0, len(live_rows), BATCH_SIZE):
+                rows = live_rows[i: i + BATCH_SIZE]
+                self.hnsw.add_items(self.vectors[rows], rows)
+
+    def flush(self):
+        """
+        Сбрасывает векторы на диск и сохраняет граф HNSW, если он изменился
+        """
+        with self.lock:
+            self.vectors.flush()
+            if self.hnsw is not None and int(self._get_meta("hnsw_version", -1)) != self.version:
+                self.hnsw.save_index(os.path.join(self.path, HNSW_FILE))
+                self._set_meta("hnsw_version", self.version)
+                self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.connection.close()
+            self.vectors = None
+            self.hnsw = None
+
+    def _commit(self):
+        self.version += 1
+        self._set_meta("rows", self.rows)
+        self._set_meta("version", self.version)
+        self.connection.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+
+    def upsert(self, point_ids: List[str], documents: List[Document], vectors: np.ndarray, wait: bool = True):
+        """
+        Записывает точки: существующие ID перезаписываются в своих строках, новые добавляются в конец
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self.lock:
+            existing_rows = {}
+            for i in range(0, len(point_ids), SQL_BATCH_SIZE):
+                ids = point_ids[i: i + SQL_BATCH_SIZE]
+                existing_rows.update(self.connection.execute(
+                    f"SELECT id, row FROM points WHERE id IN ({','.join('?' * len(ids))})", ids
+                ).fetchall())
+            rows = []
+            for point_id in point_ids:
+                if point_id not in existing_rows:
+                    existing_rows[point_id] = self.rows
+                    self.rows += 1
+                rows.append(existing_rows[point_id])
+            rows = np.asarray(rows, dtype=np.int64)
+
+            self._reserve(self.rows)
+            self.vectors[rows] = vectors
+            self.live[rows] = True
+            if self.hnsw is not None:
+                self.hnsw.add_items(vectors, rows)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO points "
+                "(row, id, data_point_fqn, data_source_fqn, data_point_hash, page_content, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        int(row),
+                        point_id,
+                        document.metadata.get(DATA_POINT_FQN_METADATA_KEY),
+                        document.metadata.get(DATA_SOURCE_FQN_METADATA_KEY),
+                        document.metadata.get(DATA_POINT_HASH_METADATA_KEY),
+                        document.page_content,
+                        json.dumps(document.metadata, ensure_ascii=False),
+                    )
+                    for row, point_id, document in zip(rows, point_ids, documents)
+                ],
+            )
+            self._commit()
+            if wait:
+                self.vectors.flush()
+
+    def get_rows(self, query_filter: models.Filter) -> np.ndarray:
+        """
+        Строки точек, подходящих под фильтр
+        """
+        sql, params = get_filter_sql(query_filter)
+        with self.lock:
+            return np.fromiter(
+                (row for row, in self.connection.execute(f"SELECT row FROM points WHERE {sql}", params)),
+                dtype=np.int64,
+            )
+
+    def delete_rows(self, rows: Iterable[int]) -> int:
+        rows = [int(row) for row in rows]
+        with self.lock:
+            for i in range(0, len(rows), SQL_BATCH_SIZE):
+                batch = rows[i: i + SQL_BATCH_SIZE]
+                self.connection.execute(f"DELETE FROM points WHERE row IN ({','.join('?' * len(batch))})", batch)
+            self.live[rows] = False
+            if self.hnsw is not None:
+                for row in rows:
+                    self.hnsw.mark_deleted(row)
+            self._commit()
+        return len(rows)
+
+    def delete(self, query_filter: models.Filter) -> int:
+        with self.lock:
+            return self.delete_rows(self.get_rows(query_filter))
+
+    def search(self,
+               query_vector: Union[np.ndarray, List[float]],
+               k: int = 4,
+               query_filter: Optional[models.Filter] = None,
+               exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Поиск k ближайших точек по косинусной близости.
+        С фильтром поиск всегда точный по подходящим строкам, без фильтра
+        используется HNSW, если он включен и не передан exact=True.
+        Args:
+            query_vector: Embedding запроса
+            k (int): Число точек
+            query_filter (models.Filter): Фильтр Qdrant по payload
+            exact (bool): Полный перебор даже при включенном HNSW
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Строки точек и их score по убыванию
+        """
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        with self.lock:
+            if query_filter is not None:
+                candidates = self.get_rows(query_filter)
+                scores = self.vectors[candidates] @ query
+            elif self.hnsw is not None and not exact:
+                k = min(k, int(self.live.sum()))
+                if k == 0:
+                    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+                self.hnsw.set_ef(max(self.hnsw_config["ef"], k))
+                try:
+                    labels, distances = self.hnsw.knn_query(query, k=k)
+                    # Inner product distance is 1 - similarity
+                    return labels[0].astype(np.int64), 1 - distances[0]
+                except RuntimeError as exp:
+                    logger.warning(f"[LocalVectorDB] HNSW search failed, falling back to flat search: {exp}")
+                    candidates = np.flatnonzero(self.live)
+                    scores = self.vectors[candidates] @ query
+            else:
+                scores = self.vectors[:self.rows] @ query
+                candidates = np.flatnonzero(self.live[:self.rows])
+                scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order], scores[order]
+
+    def get_vectors(self, rows: np.ndarray) -> np.ndarray:
+        with self.lock:
+            return np.array(self.vectors[rows])
+
+    def get_documents(self, rows: np.ndarray, collection_name: str) -> List[Document]:
+        """
+        Документы точек в порядке строк, с теми же служебными полями, что у langchain Qdrant
+        """
+        rows = [int(row) for row in rows]
+        points = {}
+        with self.lock:
+            for i in range(0, len(rows), SQL_BATCH_SIZE):
+                batch = rows[i: i + SQL_BATCH_SIZE]
+                for row, point_id, page_content, metadata in self.connection.execute(
+                        f"SELECT row, id, page_content, metadata FROM points "
+                        f"WHERE row IN ({','.join('?' * len(batch))})",
+                        batch,
+                ):
+                    points[row] = Document(
+                        page_content=page_content,
+                        metadata={**json.loads(metadata), "_id": point_id, "_collection_name": collection_name},
+                    )
+        return [points[row] for row in rows if row in points]
+
+    def iter_data_point_vectors(self, data_source_fqn: str, batch_size: int) -> Iterator[DataPointVectorBatch]:
+        last_row = -1
+        while True:
+            with self.lock:
+                records = self.connection.execute(
+                    "SELECT row, id, data_point_fqn, data_point_hash FROM points "
+                    "WHERE data_source_fqn = ? AND row > ? "
+                    "AND data_point_fqn IS NOT NULL AND data_point_hash IS NOT NULL "
+                    "ORDER BY row LIMIT ?",
+                    (data_source_fqn, last_row, batch_size),
+                ).fetchall()
+            if not records:
+                break
+            last_row = records[-1][0]
+            yield DataPointVectorBatch(
+                ids=[record[1] for record in records],
+                data_point_fqns=[record[2] for record in records],
+                data_point_hashes=[record[3] for record in records],
+            )
+
+
+class LocalVectorDB(BaseVectorDB):
+    """
+    Векторная БД внутри процесса, без сервера: каждая коллекция в своем каталоге в config["path"].
+    Плоский индекс (numpy поверх memmap), при config["hnsw"] и установленном hnswlib
+    поиск без фильтра идет по графу HNSW. Фильтры по payload те же, что у Qdrant
+    (metadata._data_point_fqn, metadata._data_source_fqn, ID точек).
+    Для тестов, CI и установок на одном узле.
+    """
+
+    def __init__(self, config: dict):
+        self.path = config["path"]
+        # None for a flat index, {} for HNSW with DEFAULT_HNSW_CONFIG
+        self.hnsw_config = config.get("hnsw")
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.path, collection_name)
+
+    def get_collection(self, collection_name: str) -> LocalCollection:
+        """
+        Возвращает открытую коллекцию, открывая ее при первом обращении
+        """
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                path = self._get_collection_path(collection_name)
+                if not os.path.exists(os.path.join(path, PAYLOAD_FILE)):
+                    raise ValueError(f"Collection {collection_name} not found")
+                collection = LocalCollection(path, self.hnsw_config)
+                self._collections[collection_name] = collection
+            return collection
+
+    def create_collection(self,
+                          collection_name: str,
+                          embeddings: Embeddings,
+                          storage_config: Optional[VectorStorageConfig] = None):
+        logger.debug(f"[LocalVectorDB] Creating new collection {collection_name}")
+        if collection_name in self.get_collections():
+            raise ValueError(f"Collection {collection_name} already exists")
+        if storage_config is not None and storage_config != VectorStorageConfig():
+            # Vectors are always float32 in a memmap, HNSW params come from the vector DB config
+            logger.warning(f"[LocalVectorDB] Storage profile is not supported, ignored for {collection_name}")
+
+        # Calculate embedding size
+        partial_embeddings = embeddings.embed_documents(["Initial document"])
+        vector_size = len(partial_embeddings[0])
+
+        with self._lock:
+            self._collections[collection_name] = LocalCollection(
+                self._get_collection_path(collection_name), self.hnsw_config, dim=vector_size
+            )
+        logger.debug(f"[LocalVectorDB] Created new collection {collection_name}")
+
+    def upsert_documents(self,
+                         collection_name: str,
+                         documents: List[Document],
+                         embeddings: Embeddings,
+                         incremental: bool = True,
+                         vectors: Optional[Union[np.ndarray, List[List[float]]]] = None,
+                         wait: bool = True):
+        if len(documents) == 0:
+            logger.warning("No documents to index")
+            return
+        logger.debug(
+            f"[LocalVectorDB] Adding {len(documents)} documents to collection {collection_name}"
+        )
+        collection = self.get_collection(collection_name)
+        point_ids = [get_point_id(document) for document in documents]
+        if vectors is None:
+            vectors = embeddings.embed_documents([document.page_content for document in documents])
+        collection.upsert(point_ids, documents, vectors, wait=wait)
+        logger.debug(
+            f"[LocalVectorDB] Added {len(documents)} documents to collection {collection_name}"
+        )
+        if isinstance(embeddings, CachedEmbeddings):
+            logger.debug(f"[LocalVectorDB] Embedding cache stats: {embeddings.store.stats()}")
+
+        # Delete Documents, same selection as in Qdrant
+        points_selector = get_outdated_chunks_selector(documents, point_ids)
+        if points_selector is not None:
+            deleted_count = collection.delete(points_selector.filter)
+            logger.debug(
+                f"[LocalVectorDB] Deleted {deleted_count} outdated chunks from collection {collection_name}"
+            )
+
+    def wait_for_pending_updates(self, collection_name: str):
+        """
+        Записи применяются сразу, на диск сбрасываются векторы и граф HNSW
+        """
+        collection = self.get_collection(collection_name)
+        collection.flush()
+        logger.debug(f"[LocalVectorDB] Collection {collection_name} is flushed, points: {collection.count()}")
+
+    def search(self,
+               collection_name: str,
+               query_vector: List[float],
+               k: int = 4,
+               query_filter: Optional[Union[models.Filter, dict]] = None) -> List[Tuple[Document, float]]:
+        """
+        Поиск k ближайших документов по вектору запроса
+        Args:
+            collection_name (str): Имя коллекции
+            query_vector (List[float]): Embedding запроса
+            k (int): Число документов
+            query_filter: Фильтр Qdrant по payload
+        Returns:
+            List[Tuple[Document, float]]: Документы и их косинусная близость
+        """
+        collection = self.get_collection(collection_name)
+        rows, scores = collection.search(query_vector, k=k, query_filter=_to_filter(query_filter))
+        documents = collection.get_documents(rows, collection_name)
+        return list(zip(documents, scores.tolist()))
+
+    async def asearch(self,
+                      collection_name: str,
+                      query_vector: List[float],
+                      k: int = 4,
+                      query_filter: Optional[Union[models.Filter, dict]] = None) -> List[Tuple[Document, float]]:
+        # numpy and hnswlib release the GIL, the event loop is not blocked
+        return await asyncio.to_thread(self.search, collection_name, query_vector, k, query_filter)
+
+    def search_batch(self,
+                     collection_name: str,
+                     query_vectors: Union[np.ndarray, List[List[float]]],
+                     k: int = 4,
+                     query_filter: Optional[Union[models.Filter, dict]] = None,
+                     with_vectors: bool = False,
+                     search_params: Optional[Any] = None) -> List[List[SearchHit]]:
+        collection = self.get_collection(collection_name)
+        query_filter = _to_filter(query_filter)
+        results = []
+        for query_vector in np.asarray(query_vectors, dtype=np.float32):
+            rows, scores = collection.search(query_vector, k=k, query_filter=query_filter)
+            documents = collection.get_documents(rows, collection_name)
+            vectors = collection.get_vectors(rows).tolist() if with_vectors else [None] * len(rows)
+            results.append([
+                SearchHit(document, score, vector)
+                for document, score, vector in zip(documents, scores.tolist(), vectors)
+            ])
+        return results
+
+    def get_collections(self) -> List[str]:
+        logger.debug(f"[LocalVectorDB] Fetching collections")
+        collections = [
+            name for name in sorted(os.listdir(self.path))
+            if os.path.exists(os.path.join(self._get_collection_path(name), PAYLOAD_FILE))
+        ]
+        logger.debug(f"[LocalVectorDB] Fetched {len(collections)} collections")
+        return collections
+
+    def delete_collection(self, collection_name: str):
+        logger.debug(f"[LocalVectorDB] Deleting {collection_name} collection")
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+        if collection is not None:
+            collection.close()
+        shutil.rmtree(self._get_collection_path(collection_name), ignore_errors=True)
+        logger.debug(f"[LocalVectorDB] Deleted {collection_name} collection")
+
+    def get_vector_store(self, collection_name: str, embeddings: Embeddings):
+        logger.debug(f"[LocalVectorDB] Getting vector store for collection {collection_name}")
+        return LocalVectorStore(
+            vector_db=self,
+            collection_name=collection_name,
+            embeddings=embeddings,
+        )
+
+    def get_vector_client(self):
+        # The database is in-process, there is no separate client
+        return self
+
+    def iter_data_point_vectors(self,
+                                collection_name: str,
+                                data_source_fqn: str,
+                                batch_size: int = BATCH_SIZE) -> Iterator[DataPointVectorBatch]:
+        logger.debug(
+            f"[LocalVectorDB] Iterating data point vectors of {data_source_fqn} for collection {collection_name}"
+        )
+        vectors_count = 0
+        for batch in self.get_collection(collection_name).iter_data_point_vectors(data_source_fqn, batch_size):
+            vectors_count += len(batch.ids)
+            yield batch
+        logger.debug(
+            f"[LocalVectorDB] Iterated {vectors_count} data point vectors for collection {collection_name}"
+        )
+
+    def list_data_point_vectors(self,
+                                collection_name: str,
+                                data_source_fqn: str,
+                                batch_size: int = BATCH_SIZE) -> List[DataPointVector]:
+        return [
+            DataPointVector(
+                data_point_vector_id=point_id,
+                data_point_fqn=data_point_fqn,
+                data_point_hash=data_point_hash,
+            )
+            for batch in self.iter_data_point_vectors(collection_name, data_source_fqn, batch_size)
+            for point_id, data_point_fqn, data_point_hash in zip(*batch)
+        ]
+
+    def delete_data_point_vectors(self,
+                                  collection_name: str,
+                                  data_point_vectors: List[DataPointVector],
+                                  batch_size: int = BATCH_SIZE):
+        """
+        Удаление вектора из коллекции
+        """
+        logger.debug(f"[LocalVectorDB] Deleting {len(data_point_vectors)} data point vectors")
+        collection = self.get_collection(collection_name)
+        deleted_vectors_count = 0
+        for i in range(0, len(data_point_vectors), batch_size):
+            point_ids = [vector.data_point_vector_id for vector in data_point_vectors[i: i + batch_size]]
+            deleted_vectors_count += collection.delete(
+                models.Filter(must=[models.HasIdCondition(has_id=point_ids)])
+            )
+        logger.debug(f"[LocalVectorDB] Deleted {deleted_vectors_count} data point vectors")
+
+    def delete_documents(self, collection_name: str, document_ids: List[str]):
+        """
+        Удаление документов из коллекции
+        """
+        logger.debug(
+            f"[LocalVectorDB] Deleting {len(document_ids)} documents from collection {collection_name}"
+        )
+        try:
+            collection = self.get_collection(collection_name)
+        except ValueError as exp:
+            logger.debug(exp)
+            return
+        for i in range(0, len(document_ids), SQL_BATCH_SIZE):
+            collection.delete(
+                models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
+                            match=models.MatchAny(any=document_ids[i: i + SQL_BATCH_SIZE]),
+                        ),
+                    ],
+                )
+            )
+        logger.debug(
+            f"[LocalVectorDB] Deleted {len(document_ids)} documents from collection {collection_name}"
+        )
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain VectorStore поверх коллекции LocalVectorDB.
+    Понимает те же search_kwargs, что и langchain Qdrant: k, fetch_k, lambda_mult,
+    score_threshold и filter (фильтр Qdrant).
+    """
+
+    def __init__(self, vector_db: LocalVectorDB, collection_name: str, embeddings: Embeddings):
+        self.vector_db = vector_db
+        self.collection_name = collection_name
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def add_texts(self,
+                  texts: Iterable[str],
+                  metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        ids = ids or [get_point_id(document) for document in documents]
+        self.vector_db.get_collection(self.collection_name).upsert(
+            ids, documents, self._embeddings.embed_documents(texts)
+        )
+        return ids
+
+    @classmethod
+    def from_texts(cls,
+                   texts: List[str],
+                   embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None,
+                   vector_db: Optional[LocalVectorDB] = None,
+                   collection_name: Optional[str] = None,
+                   **kwargs: Any) -> "LocalVectorStore":
+        if vector_db is None or collection_name is None:
+            raise ValueError("vector_db and collection_name are required")
+        if collection_name not in vector_db.get_collections():
+            vector_db.create_collection(collection_name, embedding)
+        vector_store = cls(vector_db=vector_db, collection_name=collection_name, embeddings=embedding)
+        vector_store.add_texts(texts, metadatas, **kwargs)
+        return vector_store
+
+    def similarity_search_with_score_by_vector(self,
+                                               embedding: List[float],
+                                               k: int = 4,
+                                               filter: Optional[Union[models.Filter, dict]] = None,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.vector_db.search(self.collection_name, embedding, k=k, query_filter=filter)
+
+    def similarity_search_with_score(self,
+                                     query: str,
+                                     k: int = 4,
+                                     filter: Optional[Union[models.Filter, dict]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embeddings.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_by_vector(self,
+                                    embedding: List[float],
+                                    k: int = 4,
+                                    filter: Optional[Union[models.Filter, dict]] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+        ]
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 4,
+                          filter: Optional[Union[models.Filter, dict]] = None,
+                          **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embeddings.embed_query(query), k=k, filter=filter)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Cosine similarity is already a relevance score, as in langchain Qdrant
+        return lambda score: score
+
+    def max_marginal_relevance_search_by_vector(self,
+                                                embedding: List[float],
+                                                k: int = 4,
+                                                fetch_k: int = 20,
+                                                lambda_mult: float = 0.5,
+                                                filter: Optional[Union[models.Filter, dict]] = None,
+                                                **kwargs: Any) -> List[Document]:
+        collection = self.vector_db.get_collection(self.collection_name)
+        rows, _ = collection.search(embedding, k=fetch_k, query_filter=_to_filter(filter))
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            collection.get_vectors(rows),
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return collection.get_documents(rows[selected], self.collection_name)
+
+    def max_marginal_relevance_search(self,
+                                      query: str,
+                                      k: int = 4,
+                                      fetch_k: int = 20,
+                                      lambda_mult: float = 0.5,
+                                      filter: Optional[Union[models.Filter, dict]] = None,
+                                      **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embeddings.embed_query(query), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+        )
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids:
+            self.vector_db.get_collection(self.collection_name).delete(
+                models.Filter(must=[models.HasIdCondition(has_id=ids)])
+            )
+        return True
@@ -1,18 +1,29 @@
-from typing import List
+import asyncio
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
 from langchain_community.vectorstores.qdrant import Qdrant
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from qdrant_client.http.models import Distance, VectorParams
 
-from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_POINT_HASH_METADATA_KEY
+from backend.constants import DATA_POINT_FQN_METADATA_KEY, DATA_POINT_HASH_METADATA_KEY, \
+    DATA_SOURCE_FQN_METADATA_KEY, FQN_SEPARATOR
 from backend.logger import logger
-from backend.rag.vector_db.base import BaseVectorDB
-from backend.rag.schemas import DataPointVector, VectorDBConfig
+from backend.rag.embedders.cache import CachedEmbeddings
+from backend.rag.vector_db.base import BaseVectorDB, DataPointVectorBatch, SearchHit
+from backend.rag.vector_db.utils import get_outdated_chunks_selector, get_point_id
+from backend.rag.schemas import DataPointVector, VectorDBConfig, VectorStorageConfig
 
 MAX_SCROLL_LIMIT = int(1e6)
 BATCH_SIZE = 1000
+UPLOAD_BATCH_SIZE = 256
+# Point ID that never exists, used as a no-op write to wait for queued updates
+BARRIER_POINT_ID = "00000000-0000-0000-0000-000000000000"
+BARRIER_SELECTOR = models.FilterSelector(
+    filter=models.Filter(must=[models.HasIdCondition(has_id=[BARRIER_POINT_ID])])
+)
 
 
 class QdrantVectorDB(BaseVectorDB):
@@ -23,6 +34,13 @@ class QdrantVectorDB(BaseVectorDB):
         self.port = 443 if self.url.startswith("https://") else 6333
         self.prefix = config.get("prefix", None)
         self.prefer_grpc = False if self.url.startswith("https://") else True
+        # Native upload of precomputed vectors
+        self.upload_batch_size = int(config.get("upload_batch_size", UPLOAD_BATCH_SIZE))
+        self.upload_parallel = int(config.get("upload_parallel", 1))
+        # Collections whose payload indexes are known to exist
+        self._indexed_collections = set()
+        # (collection, data source) pairs whose old points already have the data source fqn
+        self._backfilled_data_sources = set()
         self.qdrant_client = QdrantClient(
             url=self.url,
             **({"api_key": self.api_key} if self.api_key else {}),
@@ -30,129 +48,307 @@ class QdrantVectorDB(BaseVectorDB):
             prefer_grpc=self.prefer_grpc,
             prefix=self.prefix,
         )
+        # Used by the async query path, so searches do not block the event loop
+        self.async_qdrant_client = AsyncQdrantClient(
+            url=self.url,
+            **({"api_key": self.api_key} if self.api_key else {}),
+            port=self.port,
+            prefer_grpc=self.prefer_grpc,
+            prefix=self.prefix,
+        )
 
-    def create_collection(self, collection_name: str, embeddings: Embeddings):
+    def create_collection(self,
+                          collection_name: str,
+                          embeddings: Embeddings,
+                          storage_config: Optional[VectorStorageConfig] = None):
         logger.debug(f"[Qdrant] Creating new collection {collection_name}")
+        storage_config = storage_config or VectorStorageConfig()
 
         # Calculate embedding size
         partial_embeddings = embeddings.embed_documents(["Initial document"])
         vector_size = len(partial_embeddings[0])
 
+        hnsw_config = None
+        if storage_config.hnsw_m is not None or storage_config.hnsw_ef_construct is not None:
+            hnsw_config = models.HnswConfigDiff(
+                m=storage_config.hnsw_m,
+                ef_construct=storage_config.hnsw_ef_construct,
+            )
         self.qdrant_client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(
                 size=vector_size,  # embedding dimension
                 distance=Distance.COSINE,
+                on_disk=storage_config.on_disk,
             ),
             replication_factor=3,
+            on_disk_payload=storage_config.on_disk_payload,
+            hnsw_config=hnsw_config,
+            quantization_config=self._get_quantization_config(storage_config),
         )
-        self.qdrant_client.create_payload_index(
-            collection_name=collection_name,
-            field_name=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
-            field_schema=models.PayloadSchemaType.KEYWORD,
-        )
+        self._create_payload_indexes(collection_name)
         logger.debug(f"[Qdrant] Created new collection {collection_name}")
 
-    def _get_records_to_be_upserted(self,
-                                    collection_name: str,
-                                    data_point_fqns: List[str],
-                                    incremental: bool):
-        if not incremental:
-            return []
-        # For incremental deletion, we delete the documents with the same document_id
-        logger.debug(
-            f"[Qdrant] Incremental Ingestion: Fetching documents for {len(data_point_fqns)} data point fqns for collection {collection_name}"
-        )
-        stop = False
-        offset = None
-        record_ids_to_be_upserted = []
-        while stop is not True:
-            records, next_offset = self.qdrant_client.scroll(
-                collection_name=collection_name,
-                scroll_filter=models.Filter(
-                    should=[
-                        models.FieldCondition(
-                            key=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
-                            match=models.MatchAny(
-                                any=data_point_fqns,
-                            ),
-                        ),
-                    ]
+    @staticmethod
+    def _get_quantization_config(storage_config: VectorStorageConfig) -> Optional[models.QuantizationConfig]:
+        if storage_config.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    always_ram=storage_config.quantization_always_ram,
                 ),
-                limit=BATCH_SIZE,
-                offset=offset,
-                with_payload=False,
-                with_vectors=False,
             )
-            for record in records:
-                record_ids_to_be_upserted.append(record.id)
-                if len(record_ids_to_be_upserted) > MAX_SCROLL_LIMIT:
-                    stop = True
-                    break
-            if next_offset is None:
-                stop = True
-            else:
-                offset = next_offset
+        if storage_config.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=storage_config.quantization_always_ram),
+            )
+        return None
 
-        logger.debug(
-            f"[Qdrant] Incremental Ingestion: collection={collection_name} Addition={len(data_point_fqns)}, Updates={len(record_ids_to_be_upserted)}"
-        )
-        return record_ids_to_be_upserted
+    def get_search_params(self,
+                          storage_config: VectorStorageConfig,
+                          hnsw_ef: Optional[int] = None,
+                          oversampling: Optional[float] = None) -> Optional[models.SearchParams]:
+        hnsw_ef = hnsw_ef or storage_config.hnsw_ef
+        oversampling = oversampling or storage_config.oversampling
+        quantization = None
+        if storage_config.quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=storage_config.rescore, oversampling=oversampling)
+        if hnsw_ef is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+    def _create_payload_indexes(self, collection_name: str):
+        """
+        Keyword индексы по fqn точки данных и fqn источника данных
+        """
+        for key in (DATA_POINT_FQN_METADATA_KEY, DATA_SOURCE_FQN_METADATA_KEY):
+            self.qdrant_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=f"metadata.{key}",
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        self._indexed_collections.add(collection_name)
+
+    @staticmethod
+    def _get_payloads(documents: List[Document]) -> List[dict]:
+        # Same payload layout as langchain's Qdrant
+        return [
+            {
+                Qdrant.CONTENT_KEY: document.page_content,
+                Qdrant.METADATA_KEY: document.metadata,
+            }
+            for document in documents
+        ]
 
     def upsert_documents(self,
                          collection_name: str,
                          documents: List[Document],
                          embeddings: Embeddings,
-                         incremental: bool = True):
+                         incremental: bool = True,
+                         vectors: Optional[Union[np.ndarray, List[List[float]]]] = None,
+                         wait: bool = True):
 
         if len(documents) == 0:
             logger.warning("No documents to index")
             return
-        # get record IDs to be upserted
         logger.debug(
             f"[Qdrant] Adding {len(documents)} documents to collection {collection_name}"
         )
-        data_point_fqns = []
-        for document in documents:
-            if document.metadata.get(DATA_POINT_FQN_METADATA_KEY):
-                data_point_fqns.append(
-                    document.metadata.get(DATA_POINT_FQN_METADATA_KEY)
-                )
-        record_ids_to_be_upserted: List[str] = self._get_records_to_be_upserted(
-            collection_name=collection_name,
-            data_point_fqns=data_point_fqns,
-            incremental=incremental,
-        )
+        point_ids = [get_point_id(document) for document in documents]
 
-        # Add Documents
-        Qdrant(
-            client=self.qdrant_client,
-            collection_name=collection_name,
-            embeddings=embeddings,
-        ).add_documents(documents=documents)
+        # Add Documents, points of re-ingested chunks are overwritten in place
+        if vectors is None:
+            Qdrant(
+                client=self.qdrant_client,
+                collection_name=collection_name,
+                embeddings=embeddings,
+            ).add_documents(documents=documents, ids=point_ids)
+        else:
+            self.qdrant_client.upload_collection(
+                collection_name=collection_name,
+                vectors=np.asarray(vectors, dtype=np.float32),
+                payload=self._get_payloads(documents),
+                ids=point_ids,
+                batch_size=self.upload_batch_size,
+                parallel=self.upload_parallel,
+                wait=wait,
+            )
         logger.debug(
             f"[Qdrant] Added {len(documents)} documents to collection {collection_name}"
         )
+        if isinstance(embeddings, CachedEmbeddings):
+            logger.debug(f"[Qdrant] Embedding cache stats: {embeddings.store.stats()}")
 
         # Delete Documents
-        if len(record_ids_to_be_upserted):
+        points_selector = get_outdated_chunks_selector(documents, point_ids)
+        if points_selector is not None:
+            self.qdrant_client.delete(
+                collection_name=collection_name,
+                points_selector=points_selector,
+                wait=wait,
+            )
             logger.debug(
-                f"[Qdrant] Deleting {len(documents)} outdated documents from collection {collection_name}"
+                f"[Qdrant] Deleted outdated chunks from collection {collection_name}"
+            )
+
+    async def aupsert_documents(self,
+                                collection_name: str,
+                                documents: List[Document],
+                                embeddings: Embeddings,
+                                incremental: bool = True,
+                                vectors: Optional[Union[np.ndarray, List[List[float]]]] = None,
+                                wait: bool = True):
+        if len(documents) == 0:
+            logger.warning("No documents to index")
+            return
+        logger.debug(
+            f"[Qdrant] Adding {len(documents)} documents to collection {collection_name}"
+        )
+        point_ids = [get_point_id(document) for document in documents]
+
+        if vectors is None:
+            await self.get_vector_store(collection_name, embeddings).aadd_documents(
+                documents=documents, ids=point_ids
+            )
+        else:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            payloads = self._get_payloads(documents)
+            # Batches are sent concurrently, at most upload_parallel at a time
+            semaphore = asyncio.Semaphore(self.upload_parallel)
+
+            async def upload_batch(start: int):
+                end = start + self.upload_batch_size
+                async with semaphore:
+                    await self.async_qdrant_client.upsert(
+                        collection_name=collection_name,
+                        points=models.Batch(
+                            ids=point_ids[start:end],
+                            vectors=vectors[start:end].tolist(),
+                            payloads=payloads[start:end],
+                        ),
+                        wait=wait,
+                    )
+
+            await asyncio.gather(*[
+                upload_batch(start) for start in range(0, len(documents), self.upload_batch_size)
+            ])
+        logger.debug(
+            f"[Qdrant] Added {len(documents)} documents to collection {collection_name}"
+        )
+        if isinstance(embeddings, CachedEmbeddings):
+            logger.debug(f"[Qdrant] Embedding cache stats: {embeddings.store.stats()}")
+
+        points_selector = get_outdated_chunks_selector(documents, point_ids)
+        if points_selector is not None:
+            await self.async_qdrant_client.delete(
+                collection_name=collection_name,
+                points_selector=points_selector,
+                wait=wait,
             )
-            for i in range(0, len(record_ids_to_be_upserted), BATCH_SIZE):
-                record_ids_to_be_processed = record_ids_to_be_upserted[
-                                             i: i + BATCH_SIZE
-                                             ]
-                self.qdrant_client.delete(
-                    collection_name=collection_name,
-                    points_selector=models.PointIdsList(
-                        points=record_ids_to_be_processed,
-                    ),
-                )
             logger.debug(
-                f"[Qdrant] Deleted {len(documents)} outdated documents from collection {collection_name}"
+                f"[Qdrant] Deleted outdated chunks from collection {collection_name}"
             )
 
+    def wait_for_pending_updates(self, collection_name: str):
+        """
+        Дожидается применения всех обновлений, отправленных с wait=False.
+        Обновления коллекции применяются по порядку, поэтому достаточно
+        одной пустой операции с wait=True.
+        """
+        logger.debug(f"[Qdrant] Waiting for pending updates of collection {collection_name}")
+        self.qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=BARRIER_SELECTOR,
+            wait=True,
+        )
+        logger.debug(f"[Qdrant] Collection {collection_name} is consistent")
+
+    async def await_for_pending_updates(self, collection_name: str):
+        logger.debug(f"[Qdrant] Waiting for pending updates of collection {collection_name}")
+        await self.async_qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=BARRIER_SELECTOR,
+            wait=True,
+        )
+        logger.debug(f"[Qdrant] Collection {collection_name} is consistent")
+
+    async def asearch(self,
+                      collection_name: str,
+                      query_vector: List[float],
+                      k: int = 4,
+                      query_filter: Optional[models.Filter] = None) -> List[Tuple[Document, float]]:
+        results = await self.async_qdrant_client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            query_filter=query_filter,
+            limit=k,
+            with_payload=True,
+            with_vectors=False,
+        )
+        return [(self._get_document(result, collection_name), result.score) for result in results]
+
+    @staticmethod
+    def _get_document(point: models.ScoredPoint, collection_name: str) -> Document:
+        # Same metadata as langchain's Qdrant
+        return Document(
+            page_content=point.payload.get(Qdrant.CONTENT_KEY, ""),
+            metadata={
+                **(point.payload.get(Qdrant.METADATA_KEY) or {}),
+                "_id": point.id,
+                "_collection_name": collection_name,
+            },
+        )
+
+    @staticmethod
+    def _get_search_requests(query_vectors: Union[np.ndarray, List[List[float]]],
+                             k: int,
+                             query_filter: Optional[models.Filter],
+                             with_vectors: bool,
+                             search_params: Optional[models.SearchParams]) -> List[models.SearchRequest]:
+        return [
+            models.SearchRequest(
+                vector=query_vector,
+                filter=query_filter,
+                params=search_params,
+                limit=k,
+                with_payload=True,
+                with_vector=with_vectors,
+            )
+            for query_vector in np.asarray(query_vectors, dtype=np.float32).tolist()
+        ]
+
+    def _get_search_hits(self, results: List[List[models.ScoredPoint]], collection_name: str) -> List[List[SearchHit]]:
+        return [
+            [SearchHit(self._get_document(point, collection_name), point.score, point.vector) for point in points]
+            for points in results
+        ]
+
+    def search_batch(self,
+                     collection_name: str,
+                     query_vectors: Union[np.ndarray, List[List[float]]],
+                     k: int = 4,
+                     query_filter: Optional[models.Filter] = None,
+                     with_vectors: bool = False,
+                     search_params: Optional[models.SearchParams] = None) -> List[List[SearchHit]]:
+        results = self.qdrant_client.search_batch(
+            collection_name=collection_name,
+            requests=self._get_search_requests(query_vectors, k, query_filter, with_vectors, search_params),
+        )
+        return self._get_search_hits(results, collection_name)
+
+    async def asearch_batch(self,
+                            collection_name: str,
+                            query_vectors: Union[np.ndarray, List[List[float]]],
+                            k: int = 4,
+                            query_filter: Optional[models.Filter] = None,
+                            with_vectors: bool = False,
+                            search_params: Optional[models.SearchParams] = None) -> List[List[SearchHit]]:
+        results = await self.async_qdrant_client.search_batch(
+            collection_name=collection_name,
+            requests=self._get_search_requests(query_vectors, k, query_filter, with_vectors, search_params),
+        )
+        return self._get_search_hits(results, collection_name)
+
     def get_collections(self) -> List[str]:
         logger.debug(f"[Qdrant] Fetching collections")
         collections = self.qdrant_client.get_collections().collections
@@ -168,6 +364,7 @@ class QdrantVectorDB(BaseVectorDB):
         logger.debug(f"[Qdrant] Getting vector store for collection {collection_name}")
         return Qdrant(
             client=self.qdrant_client,
+            async_client=self.async_qdrant_client,
             embeddings=embeddings,
             collection_name=collection_name,
         )
@@ -176,62 +373,169 @@ class QdrantVectorDB(BaseVectorDB):
         logger.debug(f"[Qdrant] Getting Qdrant client")
         return self.qdrant_client
 
-    def list_data_point_vectors(self,
+    def get_async_vector_client(self):
+        logger.debug(f"[Qdrant] Getting async Qdrant client")
+        return self.async_qdrant_client
+
+    @staticmethod
+    def _get_data_source_scroll_kwargs(data_source_fqn: str, batch_size: int) -> dict:
+        return dict(
+            limit=batch_size,
+            with_payload=[
+                f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
+                f"metadata.{DATA_POINT_HASH_METADATA_KEY}",
+            ],
+            scroll_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key=f"metadata.{DATA_SOURCE_FQN_METADATA_KEY}",
+                        match=models.MatchValue(value=data_source_fqn),
+                    ),
+                ]
+            ),
+            with_vectors=False,
+        )
+
+    def _backfill_data_source_fqn(self, collection_name: str, data_source_fqn: str):
+        """
+        Дописывает fqn источника данных в payload точек, записанных до его появления,
+        иначе снимок по источнику их не видит и очистка FULL их не удаляет
+        """
+        if (collection_name, data_source_fqn) in self._backfilled_data_sources:
+            return
+        # The old lookup by the data point fqn, only points without the data source fqn
+        scroll_filter = models.Filter(
+            must=[
+                models.IsEmptyCondition(
+                    is_empty=models.PayloadField(key=f"metadata.{DATA_SOURCE_FQN_METADATA_KEY}"),
+                ),
+                models.FieldCondition(
+                    key=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
+                    match=models.MatchText(text=data_source_fqn),
+                ),
+            ]
+        )
+        prefix = f"{data_source_fqn}{FQN_SEPARATOR}"
+        offset = None
+        backfilled_count = 0
+        while True:
+            records, offset = self.qdrant_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=BATCH_SIZE,
+                offset=offset,
+                with_payload=[f"metadata.{DATA_POINT_FQN_METADATA_KEY}"],
+                with_vectors=False,
+            )
+            # Text match is not a prefix match
+            point_ids = [
+                record.id for record in records
+                if (record.payload.get("metadata") or {}).get(DATA_POINT_FQN_METADATA_KEY, "").startswith(prefix)
+            ]
+            if point_ids:
+                self.qdrant_client.set_payload(
+                    collection_name=collection_name,
+                    payload={DATA_SOURCE_FQN_METADATA_KEY: data_source_fqn},
+                    points=point_ids,
+                    key="metadata",
+                )
+                backfilled_count += len(point_ids)
+            if offset is None:
+                break
+        if backfilled_count:
+            logger.info(
+                f"[Qdrant] Backfilled data source fqn of {backfilled_count} points of {data_source_fqn} "
+                f"in collection {collection_name}"
+            )
+        self._backfilled_data_sources.add((collection_name, data_source_fqn))
+
+    @staticmethod
+    def _get_data_point_vector_batch(records: List[models.Record]) -> DataPointVectorBatch:
+        batch = DataPointVectorBatch(ids=[], data_point_fqns=[], data_point_hashes=[])
+        for record in records:
+            metadata: dict = record.payload.get("metadata")
+            if (
+                    metadata
+                    and metadata.get(DATA_POINT_FQN_METADATA_KEY)
+                    and metadata.get(DATA_POINT_HASH_METADATA_KEY)
+            ):
+                batch.ids.append(str(record.id))
+                batch.data_point_fqns.append(metadata[DATA_POINT_FQN_METADATA_KEY])
+                batch.data_point_hashes.append(metadata[DATA_POINT_HASH_METADATA_KEY])
+        return batch
+
+    def iter_data_point_vectors(self,
                                 collection_name: str,
                                 data_source_fqn: str,
-                                batch_size: int = BATCH_SIZE) -> List[DataPointVector]:
+                                batch_size: int = BATCH_SIZE) -> Iterator[DataPointVectorBatch]:
         logger.debug(
-            f"[Qdrant] Listing all data point vectors for collection {collection_name}"
+            f"[Qdrant] Iterating data point vectors of {data_source_fqn} for collection {collection_name}"
         )
-        stop = False
+        # Collections created before the data source index was added
+        if collection_name not in self._indexed_collections:
+            self._create_payload_indexes(collection_name)
+        self._backfill_data_source_fqn(collection_name, data_source_fqn)
+        scroll_kwargs = self._get_data_source_scroll_kwargs(data_source_fqn, batch_size)
         offset = None
-        data_point_vectors: List[DataPointVector] = []
-        while stop is not True:
-            records, next_offset = self.qdrant_client.scroll(
+        vectors_count = 0
+        while True:
+            records, offset = self.qdrant_client.scroll(
                 collection_name=collection_name,
-                limit=batch_size,
-                with_payload=[
-                    f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
-                    f"metadata.{DATA_POINT_HASH_METADATA_KEY}",
-                ],
-                scroll_filter=models.Filter(
-                    should=[
-                        models.FieldCondition(
-                            key=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
-                            match=models.MatchText(
-                                text=data_source_fqn,
-                            ),
-                        ),
-                    ]
-                ),
-                with_vectors=False,
                 offset=offset,
+                **scroll_kwargs,
             )
-            for record in records:
-                metadata: dict = record.payload.get("metadata")
-                if (
-                        metadata
-                        and metadata.get(DATA_POINT_FQN_METADATA_KEY)
-                        and metadata.get(DATA_POINT_HASH_METADATA_KEY)
-                ):
-                    data_point_vectors.append(
-                        DataPointVector(
-                            data_point_vector_id=record.id,
-                            data_point_fqn=metadata.get(DATA_POINT_FQN_METADATA_KEY),
-                            data_point_hash=metadata.get(DATA_POINT_HASH_METADATA_KEY),
-                        )
-                    )
-                if len(data_point_vectors) > MAX_SCROLL_LIMIT:
-                    stop = True
-                    break
-            if next_offset is None:
-                stop = True
-            else:
-                offset = next_offset
+            batch = self._get_data_point_vector_batch(records)
+            if batch.ids:
+                vectors_count += len(batch.ids)
+                yield batch
+            if offset is None:
+                break
+        logger.debug(
+            f"[Qdrant] Iterated {vectors_count} data point vectors for collection {collection_name}"
+        )
+
+    async def aiter_data_point_vectors(self,
+                                       collection_name: str,
+                                       data_source_fqn: str,
+                                       batch_size: int = BATCH_SIZE) -> AsyncIterator[DataPointVectorBatch]:
+        logger.debug(
+            f"[Qdrant] Iterating data point vectors of {data_source_fqn} for collection {collection_name}"
+        )
+        if collection_name not in self._indexed_collections:
+            await asyncio.to_thread(self._create_payload_indexes, collection_name)
+        await asyncio.to_thread(self._backfill_data_source_fqn, collection_name, data_source_fqn)
+        scroll_kwargs = self._get_data_source_scroll_kwargs(data_source_fqn, batch_size)
+        offset = None
+        vectors_count = 0
+        while True:
+            records, offset = await self.async_qdrant_client.scroll(
+                collection_name=collection_name,
+                offset=offset,
+                **scroll_kwargs,
+            )
+            batch = self._get_data_point_vector_batch(records)
+            if batch.ids:
+                vectors_count += len(batch.ids)
+                yield batch
+            if offset is None:
+                break
         logger.debug(
-            f"[Qdrant] Listing {len(data_point_vectors)} data point vectors for collection {collection_name}"
+            f"[Qdrant] Iterated {vectors_count} data point vectors for collection {collection_name}"
         )
-        return data_point_vectors
+
+    def list_data_point_vectors(self,
+                                collection_name: str,
+                                data_source_fqn: str,
+                                batch_size: int = BATCH_SIZE) -> List[DataPointVector]:
+        return [
+            DataPointVector(
+                data_point_vector_id=point_id,
+                data_point_fqn=data_point_fqn,
+                data_point_hash=data_point_hash,
+            )
+            for batch in self.iter_data_point_vectors(collection_name, data_source_fqn, batch_size)
+            for point_id, data_point_fqn, data_point_hash in zip(*batch)
+        ]
 
     def delete_data_point_vectors(self,
                                   collection_name: str,
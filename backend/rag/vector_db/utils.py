@@ -0,0 +1,116 @@
+import hashlib
+import uuid
+from typing import Any, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from qdrant_client import models
+
+from backend.constants import DATA_POINT_CHUNK_INDEX_METADATA_KEY, DATA_POINT_FQN_METADATA_KEY, \
+    DATA_SOURCE_FQN_METADATA_KEY, FQN_SEPARATOR
+
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1f5e-3c1a-5b7e-9d2f-7a1b0c9e4d21")
+
+# Payload keys that can be filtered on in SQL (LocalVectorDB, BM25), and their columns
+FILTER_COLUMNS = {
+    f"metadata.{DATA_POINT_FQN_METADATA_KEY}": "data_point_fqn",
+    f"metadata.{DATA_SOURCE_FQN_METADATA_KEY}": "data_source_fqn",
+}
+
+
+def get_point_id(document: Document) -> str:
+    """
+    Детерминированный ID точки для chunk'а: uuid5 от (fqn точки данных, номер chunk'а, hash текста).
+    Повторный прием того же chunk'а перезаписывает точку, а не добавляет новую.
+    Для документов без fqn возвращает случайный ID.
+    """
+    data_point_fqn = document.metadata.get(DATA_POINT_FQN_METADATA_KEY)
+    chunk_index = document.metadata.get(DATA_POINT_CHUNK_INDEX_METADATA_KEY)
+    if not data_point_fqn or chunk_index is None:
+        return uuid.uuid4().hex
+    content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{data_point_fqn}{FQN_SEPARATOR}{chunk_index}{FQN_SEPARATOR}{content_hash}"))
+
+
+def get_outdated_chunks_selector(documents: List[Document],
+                                 point_ids: List[str]) -> Optional[models.FilterSelector]:
+    """
+    Chunk'и точек данных батча, которые не были перезаписаны: хвост укороченного документа,
+    измененные chunk'и и точки со старыми случайными ID. Общий для всех векторных БД
+    """
+    data_point_fqns = list({
+        document.metadata[DATA_POINT_FQN_METADATA_KEY]
+        for document in documents
+        if document.metadata.get(DATA_POINT_FQN_METADATA_KEY)
+    })
+    if not data_point_fqns:
+        return None
+    return models.FilterSelector(
+        filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"metadata.{DATA_POINT_FQN_METADATA_KEY}",
+                    match=models.MatchAny(any=data_point_fqns),
+                ),
+            ],
+            must_not=[models.HasIdCondition(has_id=point_ids)],
+        )
+    )
+
+
+def _as_list(conditions: Any) -> list:
+    if conditions is None:
+        return []
+    return conditions if isinstance(conditions, list) else [conditions]
+
+
+def _get_condition_sql(condition: Any) -> Tuple[str, list]:
+    if isinstance(condition, models.Filter):
+        return get_filter_sql(condition)
+    if isinstance(condition, models.HasIdCondition):
+        ids = [str(point_id) for point_id in condition.has_id]
+        return f"id IN ({','.join('?' * len(ids))})", ids
+    if isinstance(condition, models.FieldCondition) and condition.key in FILTER_COLUMNS:
+        column = FILTER_COLUMNS[condition.key]
+        match = condition.match
+        if isinstance(match, models.MatchValue):
+            return f"{column} = ?", [match.value]
+        if isinstance(match, models.MatchAny):
+            return f"{column} IN ({','.join('?' * len(match.any))})", list(match.any)
+        if isinstance(match, models.MatchExcept):
+            return f"{column} NOT IN ({','.join('?' * len(match.except_))})", list(match.except_)
+        if isinstance(match, models.MatchText):
+            return f"instr({column}, ?) > 0", [match.text]
+    raise ValueError(
+        f"Unsupported filter condition for SQL: {condition}. "
+        f"Supported keys: {list(FILTER_COLUMNS)}"
+    )
+
+
+def get_filter_sql(query_filter: models.Filter) -> Tuple[str, list]:
+    """
+    Переводит фильтр Qdrant в условие SQL по таблице с колонками id, data_point_fqn и data_source_fqn.
+    Поддерживаются must/should/must_not, HasIdCondition и MatchValue/MatchAny/MatchExcept/MatchText
+    по полям из FILTER_COLUMNS.
+    Args:
+        query_filter (models.Filter): Фильтр Qdrant
+    Returns:
+        Tuple[str, list]: Условие SQL и его параметры
+    """
+    clauses, params = [], []
+
+    def add(conditions: list, operator: str, negate: bool = False):
+        if not conditions:
+            return
+        sqls = []
+        for condition in conditions:
+            sql, condition_params = _get_condition_sql(condition)
+            sqls.append(f"({sql})")
+            params.extend(condition_params)
+        clause = f" {operator} ".join(sqls)
+        clauses.append(f"NOT ({clause})" if negate else f"({clause})")
+
+    add(_as_list(query_filter.must), "AND")
+    add(_as_list(query_filter.should), "OR")
+    # A point matches must_not when it matches none of the conditions
+    add(_as_list(query_filter.must_not), "OR", negate=True)
+    return " AND ".join(clauses) or "1", params
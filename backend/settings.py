@@ -17,7 +17,7 @@ class Settings(BaseSettings):
     # Auth
     USER_DB_CONFIG: UserDBConfig
     AUTH_SECRET: str = os.getenv("AUTH_SECRET", "")
-    # Redis for celery
+    # Redis for celery, the ingestion job queue
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     # SMTP
     SMTP_CONFIG: SMTPConfig
@@ -25,11 +25,76 @@ class Settings(BaseSettings):
     VECTOR_DB_CONFIG: VectorDBConfig
     # Metastore
     METADATA_STORE_CONFIG: MetadataStoreConfig
+    # Connection pool of the mongo clients, per client
+    METADATA_STORE_MAX_POOL_SIZE: int = int(os.getenv("METADATA_STORE_MAX_POOL_SIZE", 100))
+    METADATA_STORE_MIN_POOL_SIZE: int = int(os.getenv("METADATA_STORE_MIN_POOL_SIZE", 0))
+    # Cache of collections and data ingestion runs, 0 entries disables it
+    METADATA_CACHE_MAX_ENTRIES: int = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", 1000))
+    METADATA_CACHE_TTL_SEC: int = int(os.getenv("METADATA_CACHE_TTL_SEC", 60))
 
     # LLM
     LOCAL: bool = os.getenv("LOCAL", True)  # Allow local models
     OLLAMA_URL: str = os.getenv("OLLAMA_URL", "http://localhost:11434")
     GIGACHAT_API_KEY: str = os.getenv("GIGACHAT_API_KEY", "")
+    LLM_CACHE_MAX_CLIENTS: int = int(os.getenv("LLM_CACHE_MAX_CLIENTS", 16))
+    LLM_MAX_CONCURRENT_GENERATIONS: int = int(os.getenv("LLM_MAX_CONCURRENT_GENERATIONS", 4))  # Per provider
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", 100))  # Ollama HTTP connection pool size
+    SSE_HEARTBEAT_SEC: float = float(os.getenv("SSE_HEARTBEAT_SEC", 15))  # Heartbeat comments of /answer streams
+    GIGACHAT_TOKEN_REFRESH_MARGIN_SEC: int = int(os.getenv("GIGACHAT_TOKEN_REFRESH_MARGIN_SEC", 60))
+
+    # Embedders
+    EMBEDDER_CACHE_MAX_MODELS: int = int(os.getenv("EMBEDDER_CACHE_MAX_MODELS", 4))
+    EMBEDDER_CACHE_MEMORY_BUDGET_MB: int = int(os.getenv("EMBEDDER_CACHE_MEMORY_BUDGET_MB", 4096))
+    EMBEDDER_WARMUP: bool = os.getenv("EMBEDDER_WARMUP", True)  # Load embedders of all collections at startup
+    # Disk cache of document embeddings, empty path disables it
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./volumes/backend/embedding_cache.sqlite")
+    EMBEDDING_CACHE_MAX_SIZE_MB: int = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE_MB", 2048))
+
+    # Answer cache, 0 entries disables it
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+    ANSWER_CACHE_TTL_SEC: int = int(os.getenv("ANSWER_CACHE_TTL_SEC", 3600))
+    # Min cosine similarity of the query embeddings to reuse an answer
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95))
+
+    # Retrieval cache, 0 entries disables it
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", 5000))
+    RETRIEVAL_CACHE_TTL_SEC: int = int(os.getenv("RETRIEVAL_CACHE_TTL_SEC", 3600))
+
+    # BM25 index of the hybrid retriever, empty path disables it.
+    # Off by default: it keeps a second copy of the chunk text, e.g. ./volumes/backend/bm25_index
+    BM25_INDEX_PATH: str = os.getenv("BM25_INDEX_PATH", "")
+    BM25_K1: float = float(os.getenv("BM25_K1", 1.2))
+    BM25_B: float = float(os.getenv("BM25_B", 0.75))
+
+    # Reranker
+    RERANKER_CACHE_MAX_MODELS: int = int(os.getenv("RERANKER_CACHE_MAX_MODELS", 2))
+    RERANKER_WORKERS: int = int(os.getenv("RERANKER_WORKERS", 2))  # Concurrent rerank calls of async requests
+    RERANKER_BATCH_SIZE: int = int(os.getenv("RERANKER_BATCH_SIZE", 32))
+    RERANKER_MAX_LENGTH: int = int(os.getenv("RERANKER_MAX_LENGTH", 512))  # 0 -> model default
+    RERANKER_QUANTIZE: bool = os.getenv("RERANKER_QUANTIZE", False)  # int8 dynamic quantization on CPU
+
+    # Dataloaders
+    # Sidecar manifests with file stats and content hashes of data sources
+    DATA_SOURCE_MANIFEST_DIR: str = os.getenv("DATA_SOURCE_MANIFEST_DIR", "./volumes/backend/manifests")
+    # none | hardlink | reflink | copy, can be overridden by `isolation` in the data source metadata
+    LOCALDIR_ISOLATION: str = os.getenv("LOCALDIR_ISOLATION", "none")
+
+    # Indexer
+    INGESTION_QUEUE_SIZE: int = int(os.getenv("INGESTION_QUEUE_SIZE", 2))  # Batches buffered between pipeline stages
+    # memory | celery, see backend/rag/jobs
+    JOB_QUEUE_PROVIDER: str = os.getenv("JOB_QUEUE_PROVIDER", "memory")
+    # Data sources ingested concurrently by the in-memory job queue
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", 2))
+    # Default budget of one data source, can be overridden by `ingestion_budget` in the data source metadata
+    INGESTION_SOURCE_MAX_PARSE_TASKS: int = int(os.getenv("INGESTION_SOURCE_MAX_PARSE_TASKS", min(4, os.cpu_count() or 1)))
+    # Embedding calls running at once in the process, all sources share the embedder models
+    INGESTION_EMBED_CONCURRENCY: int = int(os.getenv("INGESTION_EMBED_CONCURRENCY", 1))
+    # An unfinished run without status or progress updates for this long is considered dead and can be resumed
+    INGESTION_RUN_STALE_SEC: int = int(os.getenv("INGESTION_RUN_STALE_SEC", 900))
+
+    # Parsers
+    PARSER_WORKERS: int = int(os.getenv("PARSER_WORKERS", min(4, os.cpu_count() or 1)))  # 0 -> parse in a thread
+    PARSER_PAGES_PER_TASK: int = int(os.getenv("PARSER_PAGES_PER_TASK", 50))  # Large PDFs are split by page ranges
 
     SMTP_CONFIG: SMTPConfig = SMTPConfig(
         host=os.getenv("SMTP_HOST", "smtp.mail.ru"),
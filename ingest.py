@@ -1,6 +1,7 @@
 import asyncio
 import time
 
+from backend.rag.jobs.client import JOB_QUEUE
 from backend.rag.metadata_store.client import METADATA_STORE_CLIENT
 from backend.rag.schemas import IngestDataToCollectionDto
 from backend.rag.indexer.indexer import ingest_data as ingest_data_to_collection
@@ -22,6 +23,9 @@ async def ingest(
     )
 
     await ingest_data_to_collection(request=request)
+    # The run is only enqueued, in-process workers stop when the event loop exits
+    await JOB_QUEUE.join()
+    await JOB_QUEUE.stop()
 
 
 if __name__ == "__main__":
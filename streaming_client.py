@@ -1,4 +1,5 @@
-import time
+import json
+
 import httpx
 from httpx import Timeout
 
@@ -23,6 +24,14 @@ ENDPOINT_URL = 'http://localhost:8000/answer'
 
 print("Start\n")
 with httpx.stream('POST', ENDPOINT_URL, json=payload, timeout=Timeout(5.0*6000)) as r:
-    time.sleep(60)
-    for chunk in r.iter_text():
-        print(chunk)
+    # Server-Sent Events: one JSON event per `data:` line, lines starting with ':' are heartbeats
+    for line in r.iter_lines():
+        if not line.startswith("data: "):
+            continue
+        event = json.loads(line[len("data: "):])
+        if "answer" in event:
+            print(event["answer"], end="", flush=True)
+        elif "end" in event:
+            print(f"\n\n{event}")
+        else:
+            print(event)